@@ -0,0 +1,233 @@
+"""
+Generate a Python client module from the OpenAPI spec served at /swagger.json
+
+The module is standalone (it needs only requests): the runtime in
+app/client/runtime.py is inlined, followed by a TypedDict per component
+schema and per inline JSON response, and a `Client` / `AsyncClient` pair
+with one method per operation, named after its operationId.
+"""
+import ast
+import keyword
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import requests
+from app.utils import json_codec
+
+RUNTIME_FILE = Path(__file__).resolve().parent / "runtime.py"
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'patch', 'head', 'options')
+SCALAR_TYPES = {'string': 'str', 'integer': 'int', 'number': 'float', 'boolean': 'bool'}
+RAW_BODY_TYPE = 'Union[bytes, str, Iterable[bytes]]'
+
+class ClientGenerationError(Exception):
+    """Spec that cannot be turned into a client"""
+    pass
+
+def load_spec(source: str) -> Dict:
+    """
+    Read a spec from a URL (e.g. http://localhost:8000/swagger.json) or a file
+    Returns: The spec as a dict
+    """
+    if re.match(r'https?://', source):
+        response = requests.get(source, timeout=30)
+        response.raise_for_status()
+        return json_codec.loads(response.content)
+    return json_codec.loads(Path(source).read_bytes())
+
+def python_name(name: str) -> str:
+    """'Idempotency-Key' -> 'idempotency_key'; keywords get a trailing underscore"""
+    name = re.sub(r'\W+', '_', name).strip('_').lower() or 'value'
+    if name[0].isdigit():
+        name = f"_{name}"
+    return f"{name}_" if keyword.iskeyword(name) else name
+
+def class_name(name: str) -> str:
+    """'list_log_entries' -> 'ListLogEntries'"""
+    return ''.join(part[:1].upper() + part[1:] for part in re.split(r'[^0-9A-Za-z]+', name) if part)
+
+def _ref_name(ref: str) -> str:
+    return ref.rsplit('/', 1)[-1]
+
+def _resolve(spec: Dict, node: Dict) -> Dict:
+    """Follow a local $ref (#/components/...)"""
+    while '$ref' in node:
+        target = spec
+        for part in node['$ref'].lstrip('#/').split('/'):
+            target = target[part]
+        node = target
+    return node
+
+class TypeBuilder:
+    """Turns JSON schemas into annotations, collecting the TypedDicts they need"""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.typed_dicts: List[str] = []
+        self.aliases: List[str] = []
+
+    def annotation(self, schema: Optional[Dict], name: Optional[str] = None) -> str:
+        """Annotation for schema; a named inline object becomes a TypedDict called `name`"""
+        if not schema:
+            return 'Any'
+        if '$ref' in schema:
+            return class_name(_ref_name(schema['$ref']))
+        kind = schema.get('type')
+        if kind == 'object' and schema.get('properties') and name:
+            result = self.typed_dict(name, schema)
+        elif kind == 'object':
+            result = 'Dict[str, Any]'
+        elif kind == 'array':
+            result = f"List[{self.annotation(schema.get('items'))}]"
+        else:
+            result = SCALAR_TYPES.get(kind, 'Any')
+        return f"Optional[{result}]" if schema.get('nullable') else result
+
+    def typed_dict(self, name: str, schema: Dict) -> str:
+        properties = schema.get('properties', {})
+        required = set(schema.get('required', []))
+        total = bool(properties) and required >= set(properties)
+        fields = [(key, self.annotation(value)) for key, value in properties.items()]
+        if all(key.isidentifier() and not keyword.iskeyword(key) for key, _ in fields):
+            lines = [f"class {name}(TypedDict{'' if total else ', total=False'}):"]
+            lines += [f"    {key}: {annotation}" for key, annotation in fields] or ["    pass"]
+        else:
+            items = ', '.join(f"{key!r}: {annotation!r}" for key, annotation in fields)
+            lines = [f"{name} = TypedDict({name!r}, {{{items}}}, total={total})"]
+        self.typed_dicts.append('\n'.join(lines))
+        return name
+
+    def components(self) -> None:
+        for component, schema in self.spec.get('components', {}).get('schemas', {}).items():
+            name = class_name(component)
+            if schema.get('type', 'object') == 'object':
+                self.typed_dict(name, schema)
+            else:
+                self.aliases.append(f"{name} = {self.annotation(schema)}")
+
+def operations(spec: Dict) -> List[Tuple[str, str, Dict]]:
+    """Returns: [(path, METHOD, operation)] in path order"""
+    found = []
+    for path, item in sorted(spec.get('paths', {}).items()):
+        for method in HTTP_METHODS:
+            if method in item:
+                found.append((path, method.upper(), item[method]))
+    return found
+
+def _response_schema(spec: Dict, operation: Dict) -> Optional[Dict]:
+    """Schema of the first 2xx JSON response"""
+    for status, response in sorted(operation.get('responses', {}).items()):
+        if str(status).startswith('2'):
+            content = _resolve(spec, response).get('content', {})
+            if 'application/json' in content:
+                return content['application/json'].get('schema')
+    return None
+
+def _docstring(operation: Dict, method: str, path: str, parameters: List[Tuple[str, Dict]]) -> List[str]:
+    lines = [f'"""{operation.get("summary") or operation["operationId"]}', '', f'{method} {path}']
+    documented = [(name, parameter) for name, parameter in parameters if parameter.get('description')]
+    if documented:
+        lines.append('')
+        lines += [f"{name}: {parameter['description']}" for name, parameter in documented]
+    lines.append('"""')
+    return lines
+
+def operation_methods(spec: Dict, types: TypeBuilder) -> Tuple[List[str], List[str]]:
+    """Returns: (sync method sources, async method sources), one per operation"""
+    sync_methods, async_methods = [], []
+    seen = set()
+    for path, method, operation in operations(spec):
+        if 'operationId' not in operation:
+            raise ClientGenerationError(f"{method} {path} has no operationId")
+        name = python_name(operation['operationId'])
+        if name in seen:
+            raise ClientGenerationError(f"Duplicate operationId {operation['operationId']!r}")
+        seen.add(name)
+
+        parameters = [_resolve(spec, parameter) for parameter in operation.get('parameters', [])]
+        parameters = [(python_name(parameter['name']), parameter) for parameter in parameters]
+        positional, keyword_only, call = [], [], []
+        for location, argument in (('path', 'path_params'), ('query', 'query'), ('header', 'headers')):
+            group = [(arg, p) for arg, p in parameters if p['in'] == location]
+            if not group:
+                continue
+            for arg, parameter in group:
+                annotation = types.annotation(parameter.get('schema'))
+                if location == 'query' and parameter.get('schema', {}).get('format') == 'date-time':
+                    annotation = 'Union[str, datetime]'
+                if location == 'path':
+                    positional.append(f"{arg}: {annotation}")
+                elif parameter.get('required'):
+                    keyword_only.append(f"{arg}: {annotation}")
+                else:
+                    keyword_only.append(f"{arg}: Optional[{annotation}] = None")
+            values = ', '.join(f"{p['name']!r}: {arg}" for arg, p in group)
+            call.append(f"{argument}={{{values}}}")
+
+        body = _resolve(spec, operation['requestBody']) if 'requestBody' in operation else None
+        if body is not None:
+            content_type, media = next(iter(body.get('content', {}).items()))
+            annotation = types.annotation(media.get('schema')) if content_type == 'application/json' else RAW_BODY_TYPE
+            positional.append(f"body: {annotation}" if body.get('required') else f"body: Optional[{annotation}] = None")
+            call += ["body=body", f"content_type={content_type!r}"]
+
+        returns = types.annotation(_response_schema(spec, operation), f"{class_name(operation['operationId'])}Response")
+        arguments = ', '.join(['self'] + positional + (['*'] + keyword_only if keyword_only else []))
+        passed = ', '.join([arg.split(':')[0] for arg in positional] + [f"{arg}={arg}" for arg in
+                           (kw.split(':')[0] for kw in keyword_only)])
+        docstring = _docstring(operation, method, path, parameters)
+
+        sync_methods.append('\n'.join(
+            [f"    def {name}({arguments}) -> {returns}:"]
+            + [f"        {line}" if line else '' for line in docstring]
+            + [f"        return self._call({', '.join([repr(method), repr(path)] + call)})"]
+        ))
+        async_methods.append('\n'.join(
+            [f"    async def {name}({arguments}) -> {returns}:"]
+            + [f"        {line}" if line else '' for line in docstring]
+            + [f"        return await self._run({', '.join(['self.client.' + name] + ([passed] if passed else []))})"]
+        ))
+    return sync_methods, async_methods
+
+def runtime_source() -> str:
+    """runtime.py without its module docstring"""
+    source = RUNTIME_FILE.read_text()
+    first = ast.parse(source).body[0]
+    if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant):
+        source = ''.join(source.splitlines(keepends=True)[first.end_lineno:])
+    return source.strip('\n')
+
+def generate_client(spec: Dict, source: str = "/swagger.json") -> str:
+    """
+    Render the client module for spec
+    Returns: Python source
+    """
+    types = TypeBuilder(spec)
+    types.components()
+    sync_methods, async_methods = operation_methods(spec, types)
+    info = spec.get('info', {})
+    title = f"{info.get('title', 'API')} {info.get('version', '')}".strip()
+
+    parts = [
+        '"""\n'
+        f"Client for the {title}\n\n"
+        f"Generated from {source} by app/client/generator.py; regenerate with\n"
+        "`flask client generate` instead of editing.\n\n"
+        "    client = Client(\"http://localhost:8000\")\n"
+        "    with LogBatcher(client) as batcher:\n"
+        "        for document in documents:\n"
+        "            batcher.submit(document)\n"
+        '"""',
+        runtime_source(),
+        "# Schemas",
+        '\n\n'.join(types.typed_dicts),
+    ]
+    if types.aliases:
+        parts.append('\n'.join(types.aliases))
+    parts += [
+        '\n'.join(['class Client(BaseClient):', '    """Typed client, one method per API operation"""', '', ''])
+        + '\n\n'.join(sync_methods),
+        '\n'.join(['class AsyncClient(BaseAsyncClient):', '    """asyncio variant of Client"""',
+                   '    client_class = Client', '', ''])
+        + '\n\n'.join(async_methods),
+    ]
+    return '\n\n'.join(parts) + '\n'
@@ -0,0 +1,380 @@
+"""
+Runtime shared by every generated client (app/client/generator.py inlines
+this source into the client module, which then only needs requests)
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypedDict, Union
+from urllib.parse import quote
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+    import json
+
+# Retried with backoff for idempotent methods
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# The only statuses retried for POST: the request was turned away before anything
+# was stored (the API answers 503 with Retry-After when its write queue is full)
+REJECTED_STATUSES = frozenset({429, 503})
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class ApiError(Exception):
+    """Non-2xx response; `body` is the decoded JSON error (or the raw text)"""
+
+    def __init__(self, status: int, body: Any, method: str, url: str):
+        self.status = status
+        self.body = body
+        self.method = method
+        self.url = url
+        detail = body.get('error', body) if isinstance(body, dict) else body
+        super().__init__(f"{method} {url} returned {status}: {detail}")
+
+class RetryPolicy(Retry):
+    """
+    Retry that never repeats a POST the server may have acted on
+    GETs are retried after connection and read errors and RETRY_STATUSES;
+    POSTs only after connection errors (nothing was sent) and
+    REJECTED_STATUSES, not after read timeouts, 502 or 504
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if not self._is_method_retryable(method):
+            return bool(self.total) and status_code in REJECTED_STATUSES
+        return super().is_retry(method, status_code, has_retry_after)
+
+class BaseClient:
+    """
+    Synchronous client over one pooled keep-alive requests.Session
+    Connections are reused across calls and threads (up to pool_size open
+    at once). Failed calls are retried up to `retries` times with
+    exponential backoff, honouring Retry-After, as far as RetryPolicy
+    allows. Bodies given as iterators cannot be replayed; pass bytes when
+    a streamed upload should be retried.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", *, timeout: float = 30.0,
+                 retries: int = 3, backoff: float = 0.2, pool_size: int = 10,
+                 headers: Optional[Dict[str, str]] = None, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = session or requests.Session()
+        retry = RetryPolicy(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True, raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def _call(self, method: str, path: str, *, path_params: Optional[Dict[str, Any]] = None,
+              query: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, Any]] = None,
+              body: Any = None, content_type: Optional[str] = None) -> Any:
+        if path_params:
+            path = path.format(**{name: quote(str(value), safe='') for name, value in path_params.items()})
+        url = self.base_url + path
+        params = {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in (query or {}).items() if value is not None
+        }
+        request_headers = {name: str(value) for name, value in (headers or {}).items() if value is not None}
+        data = None
+        if content_type == 'application/json':
+            data = _dumps(body)
+        elif content_type is not None:
+            data = body
+        if content_type is not None:
+            request_headers['Content-Type'] = content_type
+
+        response = self.session.request(method, url, params=params or None, data=data,
+                                        headers=request_headers or None, timeout=self.timeout)
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            result = _loads(response.content)
+        else:
+            result = response.text
+        if response.status_code >= 400:
+            raise ApiError(response.status_code, result, method, url)
+        return result
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class BaseAsyncClient:
+    """
+    asyncio client: each call runs the synchronous client in a thread pool
+    sized to its connection pool, so coroutines share the same keep-alive
+    connections and retry policy
+    """
+    client_class = BaseClient
+
+    def __init__(self, base_url: str = "http://localhost:8000", *,
+                 executor: Optional[ThreadPoolExecutor] = None, **client_options):
+        self.client = self.client_class(base_url, **client_options)
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(self.client.pool_size, thread_name_prefix="api-client")
+
+    async def _run(self, call, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(call, *args, **kwargs))
+
+    async def close(self) -> None:
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+def _batch_key(idempotency: bool) -> Optional[str]:
+    return uuid.uuid4().hex if idempotency else None
+
+class LogBatcher:
+    """
+    Buffers single log submissions and sends them as /api/batch/process calls
+    A batch goes out when it holds max_batch documents or its oldest
+    document has waited max_delay seconds, from `senders` background
+    threads. submit() returns a Future that resolves to the summary of the
+    batch that carried the document (or its exception); it blocks while
+    max_pending documents are unsent. Use as a context manager, or call
+    close(), to send what is left.
+    """
+
+    def __init__(self, client: BaseClient, max_batch: int = 100, max_delay: float = 0.05,
+                 max_pending: int = 10000, senders: int = 2, idempotency: bool = True):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_batch)
+        self.idempotency = idempotency
+        self._buffer: List[Tuple[Any, Future]] = []
+        self._oldest = 0.0
+        self._pending = 0  # buffered plus in flight
+        self._flushing = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"log-batcher-{i}", daemon=True)
+            for i in range(max(1, senders))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, document: Dict[str, Any]) -> Future:
+        future = Future()
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._pending < self.max_pending)
+            if self._closed:
+                raise RuntimeError("LogBatcher is closed")
+            self._buffer.append((document, future))
+            self._pending += 1
+            if len(self._buffer) == 1:
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            elif len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+        return future
+
+    def _take(self) -> Optional[List[Tuple[Any, Future]]]:
+        """Wait for the next batch to be due; None once closed and drained"""
+        with self._cond:
+            while True:
+                if self._buffer:
+                    if len(self._buffer) >= self.max_batch or self._closed or self._flushing:
+                        break
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+            batch = self._buffer[:self.max_batch]
+            del self._buffer[:self.max_batch]
+            if self._buffer:
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                result = self.client.process_batch([document for document, _ in batch],
+                                                   idempotency_key=_batch_key(self.idempotency))
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(result)
+            with self._cond:
+                self._pending -= len(batch)
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send everything submitted so far; returns whether it finished within timeout"""
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._pending == 0, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class AsyncLogBatcher:
+    """
+    LogBatcher for asyncio producers: `await submit(doc)` returns an
+    asyncio.Future resolving to the batch summary, waiting first while
+    max_pending documents are unsent. At most `senders` batches are in flight.
+    """
+
+    def __init__(self, client: BaseAsyncClient, max_batch: int = 100, max_delay: float = 0.05,
+                 max_pending: int = 10000, senders: int = 2, idempotency: bool = True):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.idempotency = idempotency
+        self._slots = asyncio.Semaphore(max(max_pending, max_batch))
+        self._senders = asyncio.Semaphore(max(1, senders))
+        self._buffer: List[Tuple[Any, asyncio.Future]] = []
+        self._oldest = 0.0
+        self._wakeup = asyncio.Event()
+        self._sending = set()
+        self._task = None
+        self._flushing = 0
+        self._closed = False
+
+    async def submit(self, document: Dict[str, Any]) -> asyncio.Future:
+        if self._closed:
+            raise RuntimeError("AsyncLogBatcher is closed")
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._buffer.append((document, future))
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        if len(self._buffer) == 1:
+            self._oldest = loop.time()
+            self._wakeup.set()
+        elif len(self._buffer) >= self.max_batch:
+            self._wakeup.set()
+        return future
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._buffer or not self._closed:
+            if not self._buffer:
+                await self._wait(None)
+                continue
+            remaining = self._oldest + self.max_delay - loop.time()
+            if len(self._buffer) < self.max_batch and not self._closed and not self._flushing and remaining > 0:
+                await self._wait(remaining)
+                continue
+            batch = self._buffer[:self.max_batch]
+            del self._buffer[:self.max_batch]
+            if self._buffer:
+                self._oldest = loop.time()
+            await self._senders.acquire()
+            task = loop.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            result = await self.client.process_batch([document for document, _ in batch],
+                                                     idempotency_key=_batch_key(self.idempotency))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._senders.release()
+            for _ in batch:
+                self._slots.release()
+
+    async def flush(self) -> None:
+        """Send everything submitted so far"""
+        self._flushing += 1
+        try:
+            while self._buffer or self._sending:
+                self._wakeup.set()
+                if self._sending:
+                    await asyncio.wait(set(self._sending))
+                else:
+                    await asyncio.sleep(0)
+        finally:
+            self._flushing -= 1
+
+    async def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        if self._sending:
+            await asyncio.wait(set(self._sending))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
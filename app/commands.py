@@ -0,0 +1,124 @@
+from pathlib import Path
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import OperationalError
+from app.client.generator import generate_client, load_spec
+from app.models.database import create_schema, db, load_compression_settings, reconcile_counters
+from app.services.error_store import prune_validation_errors
+from app.services.latency_rollup import rebuild_latency_sketches
+from app.services.search import create_search_index, rebuild_search_index
+from app.services.text_compression import compress_existing_rows, compression_report, train_and_store_dictionary
+from app.swagger_config import get_apispec
+
+db_cli = AppGroup('db', help="Create and upgrade the database schema")
+
+@db_cli.command('create')
+def create_schema_command():
+    """Create missing tables and indexes (run before starting with SCHEMA_AUTO_CREATE off)"""
+    create_schema()
+    load_compression_settings(current_app.config)
+    if current_app.config.get('SEARCH_ENABLED', True):
+        try:
+            create_search_index()
+            current_app.extensions['search_index'] = True
+        except OperationalError as e:
+            click.echo(f"Search index not created, FTS5 unavailable: {str(e)}")
+    click.echo(f"Schema up to date: {db.engine.url.render_as_string(hide_password=True)}")
+
+stats_cli = AppGroup('stats', help="Maintain the materialized processing statistics")
+
+@stats_cli.command('reconcile')
+def reconcile_command():
+    """Recompute the stats counters from the log and error tables"""
+    counters = reconcile_counters()
+    for name, (count, last_created_at) in sorted(counters.items()):
+        last = last_created_at.isoformat() if last_created_at else '-'
+        click.echo(f"{name:<40} {count:>12}  {last}")
+
+@stats_cli.command('rebuild-latency')
+def rebuild_latency_command():
+    """Recompute the hourly latency sketches from the log table"""
+    written = rebuild_latency_sketches()
+    click.echo(f"Rebuilt {written} latency sketches")
+
+errors_cli = AppGroup('errors', help="Maintain the validation error table")
+
+@errors_cli.command('prune')
+@click.option('--days', type=float, default=None, help="Delete errors older than this many days")
+@click.option('--max-rows', type=int, default=None, help="Keep at most this many errors")
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help="Rows per delete transaction")
+def prune_errors_command(days, max_rows, chunk_size):
+    """Delete old validation errors (defaults to the ERROR_RETENTION_* settings)"""
+    if days is None and max_rows is None:
+        days = current_app.config.get('ERROR_RETENTION_DAYS')
+        max_rows = current_app.config.get('ERROR_RETENTION_MAX_ROWS')
+    deleted = prune_validation_errors(days, max_rows, chunk_size)
+    click.echo(f"Deleted {deleted} validation errors")
+
+storage_cli = AppGroup('storage', help="Maintain compressed text storage")
+
+@storage_cli.command('compress')
+@click.option('--train-dictionary', is_flag=True, help="Train a new dictionary from recent rows first")
+@click.option('--sample-size', type=int, default=2000, show_default=True, help="Rows sampled per column for training")
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help="Rows per update transaction")
+@click.option('--recompress', is_flag=True, help="Also rewrite values that are already compressed")
+@click.option('--vacuum', is_flag=True, help="VACUUM afterwards to return freed pages to the filesystem")
+def compress_command(train_dictionary, sample_size, chunk_size, recompress, vacuum):
+    """Compress text stored before compression was enabled"""
+    if train_dictionary:
+        dictionary = train_and_store_dictionary(sample_size)
+        click.echo(f"Dictionary: {dictionary if dictionary is not None else 'no samples, not trained'}")
+    for column, count in compress_existing_rows(chunk_size, recompress).items():
+        click.echo(f"{column:<40} {count:>12} rewritten")
+    if vacuum:
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+    report_command.callback()
+
+@storage_cli.command('report')
+def report_command():
+    """Show stored sizes of the compressed columns and the database"""
+    report = compression_report()
+    for column, stats in report['columns'].items():
+        click.echo(f"{column:<40} {stats['rows']:>10} rows  {stats['compressed_rows']:>10} compressed  "
+                   f"{stats['stored_bytes'] / 1024 / 1024:10.2f} MB")
+    click.echo(f"{'database':<40} {report['database_bytes'] / 1024 / 1024:.2f} MB "
+               f"({report['free_bytes'] / 1024 / 1024:.2f} MB free)")
+
+search_cli = AppGroup('search', help="Maintain the full-text search index")
+
+@search_cli.command('rebuild')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help="Entries per index transaction")
+def rebuild_search_command(chunk_size):
+    """Re-index every log entry for /api/search"""
+    if not current_app.extensions.get('search_index'):
+        raise click.ClickException("Search is disabled (SEARCH_ENABLED or FTS5 unavailable)")
+    indexed = rebuild_search_index(chunk_size)
+    click.echo(f"Indexed {indexed} log entries")
+
+client_cli = AppGroup('client', help="Generate the Python API client")
+
+@client_cli.command('generate')
+@click.option('--spec', 'spec_source', default=None,
+              help="URL or file of a /swagger.json to read (default: this app's spec)")
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path),
+              default=Path('clients') / 'json_logs_client.py', show_default=True)
+def generate_client_command(spec_source, output):
+    """Write a typed client module with pooled sessions, batching and retries"""
+    if spec_source:
+        spec = load_spec(spec_source)
+    else:
+        spec = get_apispec(current_app).to_dict()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(generate_client(spec, spec_source or "/swagger.json"))
+    click.echo(f"Client written to {output}")
+
+def register_commands(app):
+    """Attach the CLI command groups to the app"""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(errors_cli)
+    app.cli.add_command(storage_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(client_cli)
@@ -0,0 +1,167 @@
+import struct
+import threading
+import zlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+from sqlalchemy.types import Text, TypeDecorator
+
+# Compressed values are BLOBs starting with one of these markers; anything
+# stored as TEXT (short values, rows written before compression) is plain text
+ZLIB = 0x01
+ZLIB_DICTIONARY = 0x02
+_DICTIONARY_HEADER = struct.Struct('>BH')
+
+DEFAULT_MIN_BYTES = 128
+DEFAULT_LEVEL = 6
+MAX_DICTIONARY_BYTES = 32 * 1024  # zlib only looks back 32KB
+
+class CompressionError(Exception):
+    """Raised for values that cannot be decompressed"""
+    pass
+
+_settings = {"enabled": True, "min_bytes": DEFAULT_MIN_BYTES, "level": DEFAULT_LEVEL, "dictionary_id": None}
+_dictionaries: Dict[int, bytes] = {}
+_primed = {}  # dictionary-loaded (de)compressors, copied per value instead of re-loading the dictionary
+_lock = threading.Lock()
+_dictionary_loader: Optional[Callable[[int], Optional[bytes]]] = None
+
+def configure_compression(enabled: bool = True, min_bytes: int = DEFAULT_MIN_BYTES,
+                          level: int = DEFAULT_LEVEL, dictionary_id: Optional[int] = None,
+                          dictionaries: Optional[Dict[int, bytes]] = None) -> None:
+    """
+    Set how new values are written; existing values are always readable
+    `dictionaries` replaces every registered dictionary when given
+    """
+    if dictionaries is not None:
+        with _lock:
+            _dictionaries.clear()
+            _primed.clear()
+            _dictionaries.update({key: bytes(data) for key, data in dictionaries.items()})
+    if dictionary_id is not None and dictionary_id not in _dictionaries:
+        raise CompressionError(f"Unknown compression dictionary {dictionary_id}")
+    _settings.update(enabled=enabled, min_bytes=min_bytes, level=level, dictionary_id=dictionary_id)
+
+def register_dictionary(dictionary_id: int, data: bytes) -> None:
+    with _lock:
+        _dictionaries[dictionary_id] = bytes(data)
+        _primed.pop(('compress', dictionary_id, _settings["level"]), None)
+        _primed.pop(('decompress', dictionary_id), None)
+
+def set_dictionary_loader(loader: Optional[Callable[[int], Optional[bytes]]]) -> None:
+    """
+    Set how to fetch a dictionary this process has not registered; another
+    process (`flask storage compress --train-dictionary`) may have stored
+    it, and rewritten rows with it, after this one started
+    """
+    global _dictionary_loader
+    _dictionary_loader = loader
+
+def _dictionary(dictionary_id: int) -> bytes:
+    dictionary = _dictionaries.get(dictionary_id)
+    if dictionary is None and _dictionary_loader is not None:
+        with _lock:
+            dictionary = _dictionaries.get(dictionary_id)
+            if dictionary is None:
+                data = _dictionary_loader(dictionary_id)
+                if data is not None:
+                    dictionary = _dictionaries[dictionary_id] = bytes(data)
+    if dictionary is None:
+        raise CompressionError(f"Unknown compression dictionary {dictionary_id}")
+    return dictionary
+
+def _primed_copy(key, factory):
+    primed = _primed.get(key)
+    if primed is None:
+        with _lock:
+            primed = _primed.setdefault(key, factory())
+    return primed.copy()
+
+def compress_text(value: str) -> object:
+    """
+    Encode a string for storage
+    Returns: the string itself when compression is off, the value is shorter
+    than min_bytes or compression does not save space; otherwise a BLOB
+    """
+    encoded = value.encode('utf-8')
+    if not _settings["enabled"] or len(encoded) < _settings["min_bytes"]:
+        return value
+    dictionary_id = _settings["dictionary_id"]
+    if dictionary_id is None:
+        compressed = bytes([ZLIB]) + zlib.compress(encoded, _settings["level"])
+    else:
+        level = _settings["level"]
+        compressor = _primed_copy(('compress', dictionary_id, level),
+                                  lambda: zlib.compressobj(level, zdict=_dictionaries[dictionary_id]))
+        compressed = _DICTIONARY_HEADER.pack(ZLIB_DICTIONARY, dictionary_id) + \
+            compressor.compress(encoded) + compressor.flush()
+    return compressed if len(compressed) < len(encoded) else value
+
+def decompress_text(value: object) -> Optional[str]:
+    """Decode a stored value written by compress_text (or plain text)"""
+    if value is None or isinstance(value, str):
+        return value
+    data = bytes(value)
+    try:
+        if data[0] == ZLIB:
+            return zlib.decompress(data[1:]).decode('utf-8')
+        if data[0] == ZLIB_DICTIONARY:
+            _, dictionary_id = _DICTIONARY_HEADER.unpack_from(data)
+            dictionary = _dictionary(dictionary_id)
+            decompressor = _primed_copy(('decompress', dictionary_id),
+                                        lambda: zlib.decompressobj(zdict=dictionary))
+            return (decompressor.decompress(data[_DICTIONARY_HEADER.size:]) + decompressor.flush()).decode('utf-8')
+    except (zlib.error, struct.error, UnicodeDecodeError) as e:
+        raise CompressionError(f"Malformed compressed value: {str(e)}")
+    raise CompressionError(f"Unknown compression marker {data[:1]!r}")
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_BYTES) -> bytes:
+    """
+    Build a zlib preset dictionary from sample values
+    Lines that recur across samples go last, most frequent at the very end
+    (zlib matches closer to the end of the dictionary more cheaply); any room
+    left is filled with the samples themselves
+    """
+    samples = list(samples)
+    counts = Counter()
+    for sample in samples:
+        for line in set(sample.splitlines()):
+            if len(line) > 3:
+                counts[line] += 1
+    recurring = []
+    total = 0
+    for line, count in counts.most_common():
+        if count < 2:
+            break
+        encoded = line.encode('utf-8') + b'\n'
+        if total + len(encoded) > size:
+            continue
+        recurring.append(encoded)
+        total += len(encoded)
+    filler = []
+    for sample in samples:
+        encoded = sample.encode('utf-8')[:size - total]
+        if not encoded:
+            break
+        filler.append(encoded)
+        total += len(encoded)
+    return b''.join(filler) + b''.join(reversed(recurring))
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored zlib-compressed when that saves space
+
+    Values are compressed on the way in and decompressed when a row is
+    fetched. The column keeps its TEXT declaration: SQLite stores the
+    compressed BLOBs as they are, so existing tables need no rebuild and old
+    plain-text rows stay readable (`flask storage compress` converts them).
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
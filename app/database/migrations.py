@@ -0,0 +1,42 @@
+from typing import List
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from app.utils.logger import logger
+
+def upgrade_schema(engine: Engine, metadata: MetaData) -> List[str]:
+    """
+    Bring existing tables up to date with the models
+    create_all() only creates missing tables; this adds columns and indexes
+    that were introduced after a table was created. Only nullable columns
+    without server defaults can be added in place.
+    Returns: the DDL statements that were executed
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    statements = []
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            if not column.nullable or column.server_default is not None:
+                logger.warning(f"Cannot add column {table.name}.{column.name} in place; rebuild the table")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            statements.append(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                statements.append(str(CreateIndex(index).compile(dialect=engine.dialect)))
+
+    if statements:
+        with engine.begin() as connection:
+            for statement in statements:
+                logger.info(f"Schema upgrade: {statement}")
+                connection.execute(text(statement))
+    return statements
@@ -0,0 +1,68 @@
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.logger import logger
+
+# PRAGMA settings applied to every new SQLite connection, by profile name
+STORAGE_PROFILES = {
+    # SQLite defaults (rollback journal, no busy wait beyond the driver's)
+    "default": {},
+    # Concurrent readers with one writer; NORMAL is durable across app crashes,
+    # only an OS crash/power loss can drop the last transactions
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,  # negative = KiB, so ~64MB
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY"
+    },
+    # WAL with an fsync on every commit
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000
+    }
+}
+
+class StorageProfileError(Exception):
+    """Raised for unknown storage profiles"""
+    pass
+
+def resolve_pragmas(profile: str = "default", overrides: Optional[Dict] = None) -> Dict:
+    """
+    Merge a named profile with per-pragma overrides
+    Returns: {pragma_name: value} in the order they should be applied
+    """
+    if profile not in STORAGE_PROFILES:
+        raise StorageProfileError(f"Unknown storage profile: {profile}")
+    pragmas = dict(STORAGE_PROFILES[profile])
+    pragmas.update(overrides or {})
+    # busy_timeout first so switching journal mode can wait for other connections
+    if "busy_timeout" in pragmas:
+        pragmas = {"busy_timeout": pragmas.pop("busy_timeout"), **pragmas}
+    return pragmas
+
+def apply_storage_profile(engine: Engine, profile: str = "default", overrides: Optional[Dict] = None) -> Dict:
+    """
+    Apply the profile's PRAGMAs to every connection the engine opens
+    Non-SQLite engines are left untouched
+    Returns: the PRAGMAs that will be applied
+    """
+    if engine.dialect.name != "sqlite":
+        return {}
+    pragmas = resolve_pragmas(profile, overrides)
+    if not pragmas:
+        return pragmas
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite storage profile '{profile}': {pragmas}")
+    return pragmas
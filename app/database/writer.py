@@ -0,0 +1,198 @@
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
+from typing import Callable, Optional
+from flask import Flask, current_app, has_app_context
+from app.utils.logger import logger
+
+DEFAULT_WRITE_TIMEOUT = 60.0
+
+class WriterStoppedError(Exception):
+    """Raised when a write is submitted after the writer has stopped, or is still queued when it stops"""
+    pass
+
+class WriteTimeoutError(Exception):
+    """Raised by run_write when a queued write has not finished within SQLITE_WRITE_TIMEOUT"""
+    pass
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+class FileLock:
+    """
+    Exclusive lock on a file, shared by every process that opens the same path
+
+    Lets the writer threads of several server processes take turns, so
+    SQLite sees one writer at a time across the whole server instead of
+    failing with "database is locked" under contention
+    """
+
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise OSError("Inter-process write locks need fcntl (POSIX)")
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class SingleWriter:
+    """
+    Dedicated thread that runs every database write in turn
+
+    SQLite allows one writer at a time; funnelling writes through one thread
+    (with its own app context and session) means request threads never race
+    for the write lock, and with WAL readers are never blocked by it.
+
+    With a `lock` (FileLock) the thread also takes turns with the writers of
+    other processes: it holds the lock for up to `max_batch` queued writes
+    at a time, so the cost of passing the lock is spread over a batch.
+    """
+
+    def __init__(self, app: Flask, lock: Optional[FileLock] = None, max_batch: int = 64):
+        self.app = app
+        self.lock = lock
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopped = False
+        self._submit_lock = threading.Lock()  # no write can be queued behind the stop sentinel
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Finish queued writes and join the writer thread; writes it did not
+        get to within timeout fail with WriterStoppedError
+        """
+        if self._thread is None:
+            return
+        with self._submit_lock:
+            self._stopped = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+        self._fail_queued()
+        self._thread = None
+
+    def _fail_queued(self) -> None:
+        still_running = self._thread.is_alive()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            future = item[0]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(WriterStoppedError("Database writer stopped before running this write"))
+        if still_running:
+            self._queue.put(None)  # let the thread exit after its current write
+
+    @property
+    def on_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue func(*args, **kwargs) to run on the writer thread"""
+        future = Future()
+        with self._submit_lock:
+            if self._stopped:
+                raise WriterStoppedError("Database writer has stopped")
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def _next_batch(self):
+        """Block for one queued write, then take whatever else is already waiting"""
+        items = [self._queue.get()]
+        while items[-1] is not None and len(items) < self.max_batch:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        with self.app.app_context():
+            from app.models.database import db
+            while True:
+                items = self._next_batch()
+                writes = [item for item in items if item is not None]
+                if writes:
+                    with self.lock if self.lock is not None else nullcontext():
+                        self._execute(writes, db)
+                if len(writes) < len(items):
+                    if self.lock is not None:
+                        self.lock.close()
+                    return
+
+    def _execute(self, writes, db) -> None:
+        for future, func, args, kwargs in writes:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                # Never leave a half-finished transaction for the next write
+                db.session.rollback()
+
+def init_single_writer(app: Flask) -> Optional[SingleWriter]:
+    """
+    Start the single writer thread when SQLITE_SINGLE_WRITER is set
+    SQLITE_WRITE_LOCK_FILE makes it coordinate with the writers of other
+    processes using the same file (multi-process servers)
+    """
+    if not app.config.get('SQLITE_SINGLE_WRITER'):
+        return None
+    lock_path = app.config.get('SQLITE_WRITE_LOCK_FILE')
+    writer = SingleWriter(
+        app,
+        lock=FileLock(lock_path) if lock_path else None,
+        max_batch=app.config.get('SQLITE_WRITE_LOCK_BATCH', 64)
+    )
+    writer.start()
+    atexit.register(writer.stop)
+    app.extensions['single_writer'] = writer
+    logger.info("Database writes serialized through the single writer thread")
+    return writer
+
+def run_write(func: Callable, *args, **kwargs):
+    """
+    Run a write on the app's single writer thread and wait for its result
+    Runs inline when there is no writer or when already on the writer thread;
+    exceptions raised by func propagate to the caller. Waits at most
+    SQLITE_WRITE_TIMEOUT seconds, then raises WriteTimeoutError: the write
+    is cancelled if it has not started, otherwise it may still complete
+    """
+    writer = current_app.extensions.get('single_writer') if has_app_context() else None
+    if writer is None or writer.on_writer_thread:
+        return func(*args, **kwargs)
+    timeout = current_app.config.get('SQLITE_WRITE_TIMEOUT', DEFAULT_WRITE_TIMEOUT)
+    future = writer.submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        started = not future.cancel()
+        raise WriteTimeoutError(f"Database write did not finish within {timeout}s"
+                                f"{' (it is still running)' if started else ''}")
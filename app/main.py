@@ -1,35 +1,110 @@
-from flask import Flask, jsonify, send_from_directory, redirect, request, render_template
+from flask import Flask, Response, jsonify, redirect, request, render_template
+from flask.helpers import get_debug_flag
 from flask_swagger_ui import get_swaggerui_blueprint
-from app.models.database import db, init_db
+from app.models.database import init_db
+from app.database.writer import init_single_writer
+from app.commands import register_commands
 from app.routes.api import api
-from app.utils.logger import logger, log_function_call
-from app.swagger_config import get_apispec, get_swagger_config
-from app.services.log_processor import process_single_log
+from app.utils.logger import LOG_FILE, configure_log_sampling, configure_logging, logger, log_function_call
+from app.utils.log_reader import list_log_files, read_page
+from app.utils.response_cache import cached_response, init_response_cache
+from app.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS
+from app.swagger_config import get_apispec
+from app.schemas.validators import configure_validator
+from app.services.log_processor import process_single_log, process_uploaded_file
+from app.services.error_store import init_error_store
+from app.services.search import init_search
+from app.services.write_queue import init_write_queue
+from app.utils import json_codec
+from app.utils.json_codec import CodecJSONProvider, configure_json_codec
+from app.utils.json_stream import starts_with_array, upload_format
 import os
 import json
 from datetime import datetime
 
+def _optional_number(value, kind):
+    """Environment setting as kind, or None when unset"""
+    return kind(value) if value else None
+
 @log_function_call
 def create_app(config=None):
     """Create and configure the Flask application"""
+    configure_logging()
     app = Flask(__name__)
     app.secret_key = os.urandom(24)
     
     # Default configuration
     app.config.update(
-        SQLALCHEMY_DATABASE_URI='sqlite:///json_logs.db',
+        SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL', 'sqlite:///json_logs.db'),  # Relative SQLite paths live in instance/
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         JSON_SORT_KEYS=False,
-        DEBUG=True,
-        MAX_CONTENT_LENGTH=16 * 1024 * 1024  # 16MB max file size
+        JSON_CODEC=os.environ.get('JSON_CODEC', 'auto'),  # 'auto' (orjson when installed), 'orjson' or 'stdlib'
+        DEBUG=get_debug_flag(),  # FLASK_DEBUG; `python -m app.main` always runs the debug server
+        MAX_CONTENT_LENGTH=16 * 1024 * 1024,  # 16MB max request body
+        UPLOAD_MAX_CONTENT_LENGTH=1024 * 1024 * 1024,  # 1GB max /upload body; files are spooled to disk and read incrementally
+        INGEST_CHUNK_SIZE=500,  # Rows per bulk insert transaction
+        STREAM_MAX_CONTENT_LENGTH=None,  # No body cap for /api/ingest/stream
+        STREAM_MAX_LINE_BYTES=1024 * 1024,  # 1MB max NDJSON line
+        STREAM_MAX_REPORTED_LINES=1000,  # Rejected line numbers echoed back
+        VALIDATOR_BACKEND='compiled',  # 'compiled' or 'marshmallow'
+        ASYNC_INGEST_ENABLED=False,  # 202 + background writer for /api/validate and /api/batch/process
+        ASYNC_QUEUE_MAX_DEPTH=1000,  # Queued write items before 503
+        ASYNC_FLUSH_INTERVAL=0.5,  # Seconds the writer waits to coalesce writes
+        ASYNC_MAX_BATCH_SIZE=5000,  # Documents per coalesced transaction
+        VALIDATION_WORKERS=None,  # Validation processes for large batches (None = CPU count, 1 = serial)
+        VALIDATION_PARALLEL_THRESHOLD=5000,  # Batch size at which validation uses the pool
+        VALIDATION_CHUNK_SIZE=1000,  # Documents sent to a worker per task
+        SQLITE_STORAGE_PROFILE='wal',  # 'default', 'wal' or 'durable' (see app.database.storage)
+        SQLITE_PRAGMAS={},  # Per-PRAGMA overrides, e.g. {'mmap_size': 0}
+        SQLITE_SINGLE_WRITER=True,  # Serialize writes through one thread
+        SQLITE_WRITE_LOCK_FILE=os.environ.get('SQLITE_WRITE_LOCK_FILE'),  # Shared by the writers of all worker processes
+        SQLITE_WRITE_LOCK_BATCH=64,  # Writes run per turn holding the lock
+        SQLITE_WRITE_TIMEOUT=60.0,  # Seconds a request waits for its queued write
+        SCHEMA_AUTO_CREATE=os.environ.get('SCHEMA_AUTO_CREATE', '1') != '0',  # Off: run `flask db create` once before starting
+        IDEMPOTENCY_ENABLED=False,  # Dedupe log entries by content hash / Idempotency-Key
+        LOG_SAMPLE_RATES={},  # e.g. {'json_processor.calls': 0.01, 'json_processor.validation': 0.1}
+        METRICS_MULTIPROC_DIR=os.environ.get('METRICS_MULTIPROC_DIR'),  # Shared dir for multi-process servers
+        METRICS_FLUSH_INTERVAL=5.0,  # Seconds between per-process metric snapshots
+        ERROR_SNAPSHOT_MAX_BYTES=16 * 1024,  # Stored payload per validation error (None = unbounded)
+        ERROR_WRITE_BATCH_SIZE=100,  # Validation errors per transaction (1 = write immediately)
+        ERROR_FLUSH_INTERVAL=1.0,  # Max seconds a validation error waits in the buffer
+        ERROR_BUFFER_MAX_ROWS=10000,  # Unwritten errors kept across failed flushes; older ones are dropped
+        ERROR_RETENTION_DAYS=_optional_number(os.environ.get('ERROR_RETENTION_DAYS'), float),  # Delete validation errors older than this (unset = keep)
+        ERROR_RETENTION_MAX_ROWS=_optional_number(os.environ.get('ERROR_RETENTION_MAX_ROWS'), int),  # Keep at most this many validation errors (unset = no cap)
+        ERROR_RETENTION_INTERVAL=3600,  # Seconds between retention runs
+        ERROR_RETENTION_CHUNK_SIZE=1000,  # Rows deleted per retention transaction
+        TEXT_COMPRESSION_ENABLED=True,  # zlib-compress large input/step/pseudo-code text
+        TEXT_COMPRESSION_MIN_BYTES=128,  # Shorter values are stored as plain text
+        TEXT_COMPRESSION_LEVEL=6,  # zlib level 1-9
+        TEXT_COMPRESSION_DICTIONARY=True,  # Use the newest trained dictionary (flask storage compress --train-dictionary)
+        SEARCH_ENABLED=True,  # FTS5 index over inputs and steps for /api/search
+        RESPONSE_CACHE_ENABLED=True,  # ETag/304 cache for read endpoints, invalidated on writes
+        RESPONSE_CACHE_TTL=60.0,  # Seconds; bounds staleness from other worker processes
+        RESPONSE_CACHE_MAX_ENTRIES=1024  # LRU size
     )
     
     # Update with any custom configuration
     if config:
         app.config.update(config)
     
+    configure_json_codec(app.config['JSON_CODEC'])
+    app.json = CodecJSONProvider(app)
+    
+    if app.config['LOG_SAMPLE_RATES']:
+        configure_log_sampling(app.config['LOG_SAMPLE_RATES'])
+    
+    if app.config['METRICS_MULTIPROC_DIR']:
+        METRICS.enable_multiprocess(app.config['METRICS_MULTIPROC_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    
     # Initialize extensions
     init_db(app)
+    init_search(app)
+    init_response_cache(app)
+    init_single_writer(app)
+    init_error_store(app)
+    configure_validator(app.config['VALIDATOR_BACKEND'])
+    init_write_queue(app)
+    register_commands(app)
     
     # Create necessary directories
     os.makedirs(app.static_folder, exist_ok=True)
@@ -37,8 +112,9 @@ def create_app(config=None):
     
     # Serve swagger spec
     @app.route('/swagger.json')
+    @cached_response(ttl=0)
     def serve_swagger_spec():
-        return jsonify(get_apispec().to_dict())
+        return jsonify(get_apispec(app).to_dict())
     
     # Configure Swagger UI
     swagger_url = '/swagger'
@@ -68,7 +144,9 @@ def create_app(config=None):
     @app.route('/upload', methods=['POST'])
     @log_function_call
     def upload_file():
-        """Handle JSON file upload"""
+        """Handle JSON, NDJSON, gzip and zip file uploads"""
+        # Archives of daily exports exceed MAX_CONTENT_LENGTH; set before the form is parsed
+        request.max_content_length = app.config.get('UPLOAD_MAX_CONTENT_LENGTH')
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
         
@@ -76,13 +154,25 @@ def create_app(config=None):
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        if not file.filename.endswith('.json'):
-            return jsonify({"error": "Only JSON files are allowed"}), 400
+        file_format = upload_format(file.filename)
+        if file_format is None:
+            return jsonify({"error": "Only .json, .ndjson, .json.gz, .ndjson.gz and .zip files are allowed"}), 400
         
         try:
-            content = file.read()
-            json_data = json.loads(content)
-            success, result = process_single_log(json_data)
+            if file_format == '.json' and not starts_with_array(file.stream):
+                # A single document keeps the per-entry response
+                json_data = json_codec.load(file.stream)
+                success, result = process_single_log(json_data)
+                status = 200 if success else 422
+            else:
+                result = process_uploaded_file(
+                    file.stream,
+                    file.filename,
+                    max_line_bytes=app.config.get('STREAM_MAX_LINE_BYTES'),
+                    max_reported_documents=app.config.get('STREAM_MAX_REPORTED_LINES')
+                )
+                success = result['rejected'] == 0
+                status = 200
             
             response = {
                 "success": success,
@@ -92,7 +182,7 @@ def create_app(config=None):
             }
             
             logger.info(f"File upload processed: {file.filename}, Success: {success}")
-            return jsonify(response), 200 if success else 422
+            return jsonify(response), status
             
         except json.JSONDecodeError as e:
             error_msg = f"Invalid JSON format: {str(e)}"
@@ -106,20 +196,46 @@ def create_app(config=None):
     @app.route('/logs')
     @log_function_call
     def view_logs():
-        """View application logs"""
+        """
+        View application logs, newest first, one page at a time
+        Query: file (active log or an archive), before (cursor), limit, level, function
+        """
         try:
-            log_file = 'logs/app_' + datetime.now().strftime('%Y%m%d') + '.log'
-            if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    logs = f.readlines()
-                return render_template('logs.html', logs=logs)
-            else:
-                logger.warning(f"Log file not found: {log_file}")
-                return render_template('logs.html', logs=["No logs found for today"])
+            files = list_log_files(LOG_FILE)
+            names = [entry['name'] for entry in files]
+            if not names:
+                return render_template('logs.html', entries=[], files=[], page=None,
+                                       message="No logs found")
+            
+            selected = request.args.get('file') or names[0]
+            if selected not in names:
+                return jsonify({"error": "Unknown log file"}), 404
+            
+            limit = max(1, min(request.args.get('limit', default=200, type=int), 2000))
+            page = read_page(
+                LOG_FILE.parent / selected,
+                before=request.args.get('before', type=int),
+                limit=limit,
+                level=request.args.get('level') or None,
+                function=request.args.get('function') or None
+            )
+            return render_template('logs.html', entries=page['entries'], files=files, page=page,
+                                   selected=selected, limit=limit,
+                                   level=request.args.get('level', ''),
+                                   function=request.args.get('function', ''), message=None)
         except Exception as e:
             error_msg = f"Error reading logs: {str(e)}"
             logger.error(error_msg)
-            return render_template('logs.html', logs=[f"Error reading logs: {error_msg}"])
+            return render_template('logs.html', entries=[], files=[], page=None, message=error_msg)
+    
+    @app.route('/metrics')
+    def metrics():
+        """
+        Prometheus metrics for this server (all workers in multi-process mode)
+        ?per_worker=1 keeps one series per worker process, labelled by pid
+        """
+        per_worker = request.args.get('per_worker', '0') not in ('', '0', 'false')
+        return Response(METRICS.render(per_worker), mimetype=METRICS_CONTENT_TYPE)
     
     # Redirect /swagger/ to /swagger
     @app.route('/swagger/')
@@ -149,9 +265,20 @@ def create_app(config=None):
     
     return app
 
-# Create the application instance
-app = create_app()
+_app = None
+
+def __getattr__(name):
+    """
+    `app` is created on first access (`flask --app app.main`, gunicorn
+    `app.main:app`), so importing this module has no side effects
+    """
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 8000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    create_app().run(host='0.0.0.0', port=port, debug=True)
@@ -1,10 +1,23 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import deferred, object_session
 from datetime import datetime
 import uuid
-from app.utils.logger import log_function_call
+from app.database.compression import CompressedText, configure_compression, set_dictionary_loader
+from app.database.migrations import upgrade_schema
+from app.database.storage import apply_storage_profile
+from app.database.writer import run_write
+from app.utils.hashing import line_hash
+from app.utils.logger import log_function_call, logger
+from app.utils.response_cache import LOG_ENTRIES, VALIDATION_ERRORS, invalidate_responses
+from app.utils.snapshot import bound_snapshot
 
 db = SQLAlchemy()
 
+HASH_LOOKUP_CHUNK = 500  # stays under SQLite's bound-parameter limit
+
 class BaseModel(db.Model):
     """Abstract base model with common fields"""
     __abstract__ = True
@@ -13,27 +26,149 @@ class BaseModel(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class PseudoCodeLine(db.Model):
+    """Content-addressed pseudo-code line, stored once per distinct text"""
+    __tablename__ = 'pseudo_code_lines'
+    
+    hash = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    text = db.Column(CompressedText, nullable=False)
+    
+    def __repr__(self):
+        return f"<PseudoCodeLine {self.hash}>"
+
+class PseudoCodeCollisionError(Exception):
+    """Two different pseudo-code lines have the same 64-bit hash"""
+    pass
+
+def insert_pseudo_code_lines():
+    """Insert statement that skips lines which are already stored"""
+    return PseudoCodeLine.__table__.insert().prefix_with('OR IGNORE', dialect='sqlite')
+
+def add_pseudo_code_line(lines: dict, digest: int, text: str) -> None:
+    """Add a line to a {hash: text} batch, refusing a second text for the same hash"""
+    if lines.setdefault(digest, text) != text:
+        raise PseudoCodeCollisionError(f"Pseudo-code lines {lines[digest]!r} and {text!r} share hash {digest}")
+
+def write_pseudo_code_lines(lines: dict) -> None:
+    """
+    Insert {hash: text} lines in the current session, skipping stored ones
+    When any were skipped, the stored text is compared with the new text
+    Raises: PseudoCodeCollisionError if a hash is stored with a different text
+    """
+    if not lines:
+        return
+    result = db.session.execute(
+        insert_pseudo_code_lines(),
+        [{"hash": digest, "text": text} for digest, text in lines.items()]
+    )
+    if result.rowcount == len(lines):
+        return
+    stored = resolve_pseudo_code(lines)
+    for digest, text in lines.items():
+        if stored.get(digest, text) != text:
+            raise PseudoCodeCollisionError(f"Pseudo-code lines {stored[digest]!r} and {text!r} share hash {digest}")
+
+def store_pseudo_code(lines: list) -> list:
+    """Store pseudo-code lines in the current session and return their hashes"""
+    rows = {}
+    hashes = []
+    for line in lines:
+        digest = line_hash(line)
+        add_pseudo_code_line(rows, digest, line)
+        hashes.append(digest)
+    write_pseudo_code_lines(rows)
+    return hashes
+
+def resolve_pseudo_code(hashes) -> dict:
+    """
+    Map line hashes back to their text, in queries of HASH_LOOKUP_CHUNK
+    Legacy entries that hold the text itself are skipped
+    """
+    wanted = list({h for h in hashes if isinstance(h, int)})
+    lines = {}
+    for start in range(0, len(wanted), HASH_LOOKUP_CHUNK):
+        rows = db.session.query(PseudoCodeLine.hash, PseudoCodeLine.text)\
+            .filter(PseudoCodeLine.hash.in_(wanted[start:start + HASH_LOOKUP_CHUNK]))
+        lines.update(rows)
+    return lines
+
+def pseudo_code_text(hashes: list, lines: dict) -> list:
+    """
+    A step's pseudo-code column as text, using lines from resolve_pseudo_code
+    Steps written before lines were content-addressed hold the text itself
+    """
+    text = []
+    for h in hashes:
+        if not isinstance(h, int):
+            text.append(h)
+        elif h in lines:
+            text.append(lines[h])
+        else:
+            logger.warning(f"Pseudo-code line {h} is missing from pseudo_code_lines")
+    return text
+
 class Step(db.Model):
     """Model for individual steps in the output"""
     __tablename__ = 'steps'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    log_entry_id = db.Column(db.String(36), db.ForeignKey('log_entries.id'), nullable=False)
+    log_entry_id = db.Column(db.String(36), db.ForeignKey('log_entries.id'), nullable=False, index=True)
     step_number = db.Column(db.Integer, nullable=False)
-    description = db.Column(db.Text, nullable=False)
-    pseudo_code = db.Column(db.JSON, nullable=False)  # Store as JSON array
+    # Compressed, and only loaded (and decompressed) when first accessed
+    description = deferred(db.Column(CompressedText, nullable=False))
+    # JSON array of PseudoCodeLine hashes; the text is stored once in pseudo_code_lines
+    pseudo_code_hashes = db.Column('pseudo_code', db.JSON, nullable=False)
+    
+    @property
+    def pseudo_code(self) -> list:
+        """
+        Pseudo-code lines resolved from the content-addressed store
+        The first access resolves every step loaded in the session with one lookup
+        """
+        lines = self.__dict__.get('_pseudo_code_lines', {})
+        if any(isinstance(h, int) and h not in lines for h in self.pseudo_code_hashes):
+            lines = _resolve_loaded_steps(self)
+        return pseudo_code_text(self.pseudo_code_hashes, lines)
+    
+    @pseudo_code.setter
+    def pseudo_code(self, lines: list) -> None:
+        """Store lines in the current session, so Step(pseudo_code=[...]) keeps working"""
+        self.pseudo_code_hashes = store_pseudo_code(lines)
+        self.__dict__['_pseudo_code_lines'] = dict(zip(self.pseudo_code_hashes, lines))
     
     def __repr__(self):
         return f"<Step {self.step_number} for Log {self.log_entry_id}>"
 
+def _resolve_loaded_steps(step: Step) -> dict:
+    """Resolve the lines of step and of the other loaded, not yet resolved steps in its session"""
+    session = object_session(step)
+    steps = [step]
+    if session is not None:
+        steps += [
+            other for other in session.identity_map.values()
+            if isinstance(other, Step) and other is not step
+            and '_pseudo_code_lines' not in other.__dict__ and 'pseudo_code_hashes' in other.__dict__
+        ]
+    lines = resolve_pseudo_code([h for other in steps for h in other.pseudo_code_hashes])
+    for other in steps:
+        other._pseudo_code_lines = lines
+    return lines
+
 class LogEntry(BaseModel):
     """Model for JSON log entries"""
     __tablename__ = 'log_entries'
+    __table_args__ = (
+        # Keyset pagination for GET /api/logs: newest first, id breaks ties
+        db.Index('ix_log_entries_model_timestamp', 'model', 'timestamp', 'id'),
+        db.Index('ix_log_entries_timestamp_id', 'timestamp', 'id'),
+    )
     
     model = db.Column(db.String(100), nullable=False, index=True)
-    input_text = db.Column(db.Text, nullable=False)
+    input_text = deferred(db.Column(CompressedText, nullable=False))
     response_time = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False)
+    # Canonical content hash or hashed Idempotency-Key; NULL when idempotency is off
+    content_hash = db.Column(db.String(32), nullable=True, unique=True, index=True)
     
     # Relationship with steps
     steps = db.relationship('Step', backref='log_entry', lazy=True,
@@ -54,33 +189,277 @@ class LogEntry(BaseModel):
     def __repr__(self):
         return f"<LogEntry {self.id} Model: {self.model}>"
 
+def find_entries_by_hash(hashes) -> dict:
+    """
+    Bulk lookup of log entries by content hash, using the unique index
+    Returns: {content_hash: log_entry_id} for the hashes already stored
+    """
+    wanted = list({h for h in hashes if h})
+    found = {}
+    for start in range(0, len(wanted), HASH_LOOKUP_CHUNK):
+        rows = db.session.query(LogEntry.content_hash, LogEntry.id)\
+            .filter(LogEntry.content_hash.in_(wanted[start:start + HASH_LOOKUP_CHUNK]))
+        found.update(rows)
+    return found
+
 class ValidationError(BaseModel):
     """Model for validation errors"""
     __tablename__ = 'validation_errors'
+    __table_args__ = (
+        # get_recent_errors and retention both walk errors by age
+        db.Index('ix_validation_errors_created_at', 'created_at'),
+    )
     
     error_type = db.Column(db.String(100), nullable=False, index=True)
     error_message = db.Column(db.Text, nullable=False)
+    # Bounded by ERROR_SNAPSHOT_MAX_BYTES (see app.utils.snapshot)
     data_snapshot = db.Column(db.JSON, nullable=True)
     
     @classmethod
     @log_function_call
     def log_error(cls, error_type: str, message: str, data: dict = None):
-        """Create a new validation error entry"""
+        """
+        Create a new validation error entry
+        The row is queued on the app's error buffer when one is running (and
+        written with other errors in one transaction), otherwise written on
+        the single writer thread; the returned instance is not attached to
+        the caller's session
+        """
+        now = datetime.utcnow()
+        snapshot = bound_snapshot(data)
         error = cls(
+            id=str(uuid.uuid4()),
             error_type=error_type,
             error_message=message,
-            data_snapshot=data
+            data_snapshot=snapshot,
+            created_at=now,
+            updated_at=now
         )
-        db.session.add(error)
-        db.session.commit()
+        row = {
+            "id": error.id,
+            "error_type": error_type,
+            "error_message": message,
+            "data_snapshot": snapshot,
+            "created_at": now,
+            "updated_at": now
+        }
+        error_buffer = current_app.extensions.get('error_buffer') if has_app_context() else None
+        if error_buffer is not None:
+            error_buffer.add(row)
+        else:
+            run_write(cls.insert_rows, [row])
         return error
     
+    @classmethod
+    def insert_rows(cls, rows: list):
+        """Insert error rows and their counter updates in one transaction"""
+        try:
+            db.session.execute(cls.__table__.insert(), rows)
+            apply_counter_deltas(counter_deltas(errors=rows))
+            db.session.commit()
+            invalidate_responses(VALIDATION_ERRORS)
+        except Exception:
+            db.session.rollback()
+            raise
+    
     def __repr__(self):
         return f"<ValidationError {self.id} Type: {self.error_type}>"
 
+class StatsCounter(db.Model):
+    """
+    Materialized row counts, updated in the same transaction as the rows
+    Names: 'log_entries', 'validation_errors' and 'model:<model name>'
+    """
+    __tablename__ = 'stats_counters'
+    
+    name = db.Column(db.String(150), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    last_created_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<StatsCounter {self.name}={self.count}>"
+
+class LatencySketch(db.Model):
+    """Serialized DDSketch of response times for one model and hour"""
+    __tablename__ = 'latency_sketches'
+    
+    model = db.Column(db.String(100), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # start of the hour, by entry timestamp
+    count = db.Column(db.Integer, nullable=False)
+    sketch = db.Column(db.LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f"<LatencySketch {self.model} {self.bucket}>"
+
+class SearchDocument(db.Model):
+    """Maps full-text index rowids (see app.services.search) to log entries"""
+    __tablename__ = 'log_search_docs'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    log_entry_id = db.Column(db.String(36), db.ForeignKey('log_entries.id'), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f"<SearchDocument {self.id} for Log {self.log_entry_id}>"
+
+class CompressionDictionary(db.Model):
+    """Preset zlib dictionary; compressed values name the one they were written with"""
+    __tablename__ = 'compression_dictionaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CompressionDictionary {self.id} ({len(self.data)} bytes)>"
+
+def load_compression_settings(config) -> None:
+    """
+    Register every stored dictionary and apply the TEXT_COMPRESSION_* settings
+    New values use the newest dictionary when TEXT_COMPRESSION_DICTIONARY is on
+    """
+    dictionaries = dict(db.session.query(CompressionDictionary.id, CompressionDictionary.data))
+    dictionary_id = max(dictionaries) if dictionaries else None
+    configure_compression(
+        enabled=config.get('TEXT_COMPRESSION_ENABLED', True),
+        min_bytes=config.get('TEXT_COMPRESSION_MIN_BYTES', 128),
+        level=config.get('TEXT_COMPRESSION_LEVEL', 6),
+        dictionary_id=dictionary_id if config.get('TEXT_COMPRESSION_DICTIONARY', True) else None,
+        dictionaries=dictionaries
+    )
+
+def load_dictionary(dictionary_id: int):
+    """
+    Read one stored dictionary on its own connection (called while a row
+    is being decoded, so the session may be mid-query)
+    Returns: its bytes, or None when it does not exist or there is no app context
+    """
+    if not has_app_context():
+        return None
+    with db.engine.connect() as connection:
+        return connection.execute(
+            db.select(CompressionDictionary.data).where(CompressionDictionary.id == dictionary_id)
+        ).scalar()
+
+LOG_ENTRIES_COUNTER = 'log_entries'
+VALIDATION_ERRORS_COUNTER = 'validation_errors'
+MODEL_COUNTER_PREFIX = 'model:'
+
+def counter_deltas(entries: list = (), errors: list = (), sign: int = 1) -> dict:
+    """
+    Counter changes for inserted (sign=1) or deleted (sign=-1) row dicts
+    Returns: {counter_name: (delta, latest created_at or None)}
+    """
+    deltas = {}
+    
+    def add(name, created_at):
+        count, latest = deltas.get(name, (0, None))
+        if sign > 0 and created_at is not None and (latest is None or created_at > latest):
+            latest = created_at
+        deltas[name] = (count + sign, latest)
+    
+    for row in entries:
+        add(LOG_ENTRIES_COUNTER, row.get('created_at'))
+        add(MODEL_COUNTER_PREFIX + row['model'], row.get('created_at'))
+    for row in errors:
+        add(VALIDATION_ERRORS_COUNTER, row.get('created_at'))
+    return deltas
+
+def apply_counter_deltas(deltas: dict) -> None:
+    """Upsert counter changes in the current transaction (does not commit)"""
+    if not deltas:
+        return
+    table = StatsCounter.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "last_created_at": func.max(
+                func.coalesce(table.c.last_created_at, stmt.excluded.last_created_at),
+                func.coalesce(stmt.excluded.last_created_at, table.c.last_created_at)
+            )
+        }
+    )
+    db.session.execute(stmt, [
+        {"name": name, "count": count, "last_created_at": latest}
+        for name, (count, latest) in deltas.items()
+    ])
+
+def read_counters() -> dict:
+    """Returns: {counter_name: (count, last_created_at)}"""
+    return {
+        row.name: (row.count, row.last_created_at)
+        for row in db.session.query(StatsCounter.name, StatsCounter.count, StatsCounter.last_created_at)
+    }
+
+@log_function_call
+def reconcile_counters() -> dict:
+    """
+    Recompute every counter from the base tables in one transaction
+    Returns: {counter_name: (count, last_created_at)} after reconciliation
+    """
+    rows = [{
+        "name": LOG_ENTRIES_COUNTER,
+        "count": LogEntry.query.count(),
+        "last_created_at": db.session.query(func.max(LogEntry.created_at)).scalar()
+    }, {
+        "name": VALIDATION_ERRORS_COUNTER,
+        "count": ValidationError.query.count(),
+        "last_created_at": db.session.query(func.max(ValidationError.created_at)).scalar()
+    }]
+    per_model = db.session.query(LogEntry.model, func.count(), func.max(LogEntry.created_at))\
+        .group_by(LogEntry.model)
+    for model, count, latest in per_model:
+        rows.append({"name": MODEL_COUNTER_PREFIX + model, "count": count, "last_created_at": latest})
+    try:
+        db.session.execute(StatsCounter.__table__.delete())
+        db.session.execute(StatsCounter.__table__.insert(), rows)
+        db.session.commit()
+        invalidate_responses(LOG_ENTRIES, VALIDATION_ERRORS)
+    except Exception:
+        db.session.rollback()
+        raise
+    return read_counters()
+
+def create_schema() -> None:
+    """
+    Create missing tables, apply column/index upgrades and seed the stats
+    counters (inside an app context). Run once per deployment with
+    `flask db create`, or on every start when SCHEMA_AUTO_CREATE is set
+    """
+    db.create_all()
+    upgrade_schema(db.engine, db.metadata)
+    if not db.session.query(StatsCounter.name).first():
+        # New counters table (or an empty database): seed it once
+        reconcile_counters()
+
+def schema_exists() -> bool:
+    """Whether create_schema has run against this database"""
+    return inspect(db.engine).has_table(StatsCounter.__tablename__)
+
 @log_function_call
 def init_db(app):
-    """Initialize the database"""
+    """
+    Initialize the database
+    SQLITE_STORAGE_PROFILE / SQLITE_PRAGMAS select the PRAGMAs applied to
+    every SQLite connection (see app.database.storage); TEXT_COMPRESSION_*
+    control how large text columns are stored (see app.database.compression).
+    The schema is created here only when SCHEMA_AUTO_CREATE is set (the default)
+    """
     db.init_app(app)
+    set_dictionary_loader(load_dictionary)
+    auto_create = app.config.get('SCHEMA_AUTO_CREATE', True)
     with app.app_context():
-        db.create_all()
+        apply_storage_profile(
+            db.engine,
+            app.config.get('SQLITE_STORAGE_PROFILE', 'default'),
+            app.config.get('SQLITE_PRAGMAS')
+        )
+        if auto_create:
+            create_schema()
+        if auto_create or schema_exists():
+            load_compression_settings(app.config)
+        else:
+            logger.warning("Database schema not found; run `flask db create`")
+        db.session.remove()
@@ -1,12 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import get_input_stream
 from app.services.log_processor import (
     process_single_log,
     process_batch_logs,
+    process_ndjson_stream,
+    queue_single_log,
+    queue_batch_logs,
     get_processing_stats,
     get_recent_errors,
+    get_error,
     LogProcessingError
 )
+from app.services.latency_rollup import get_latency_stats
+from app.services.log_query import QueryParameterError, get_log, list_logs, parse_number, parse_timestamp
+from app.services.search import search_enabled, search_logs
+from app.services.write_queue import QueueFullError, get_write_queue
 from app.utils.logger import log_function_call, logger
+from app.utils.response_cache import LOG_ENTRIES, VALIDATION_ERRORS, cached_response
 
 api = Blueprint('api', __name__)
 
@@ -16,6 +27,7 @@ def health_check():
     """Health check endpoint
     ---
     get:
+      operationId: health_check
       tags:
         - monitoring
       summary: Check API health status
@@ -44,10 +56,18 @@ def validate_log():
     """Validate a single JSON log entry
     ---
     post:
+      operationId: validate_log
       tags:
         - validation
       summary: Validate a single JSON log entry
       description: Validates the structure and content of a single JSON log entry
+      parameters:
+        - in: header
+          name: Idempotency-Key
+          required: false
+          schema:
+            type: string
+          description: Retries with the same key return the original entry id (when idempotency is enabled)
       requestBody:
         required: true
         content:
@@ -68,17 +88,33 @@ def validate_log():
                     type: string
                   message:
                     type: string
+                  duplicate:
+                    type: boolean
+        202:
+          description: Entry validated and queued for writing (asynchronous mode)
         422:
           $ref: '#/components/responses/ErrorResponse'
+        503:
+          $ref: '#/components/responses/ErrorResponse'
     """
     if not request.is_json:
         return jsonify({"error": "Content-Type must be application/json"}), 415
     
+    write_queue = get_write_queue()
     try:
-        success, result = process_single_log(request.json)
+        if write_queue is not None:
+            success, result, queued = queue_single_log(request.json, write_queue, request.headers.get('Idempotency-Key'))
+            if queued:
+                result['status_url'] = url_for('api.get_job', job_id=result['job_id'])
+                return jsonify(result), 202
+            return jsonify(result), 200 if success else 422
+        
+        success, result = process_single_log(request.json, request.headers.get('Idempotency-Key'))
         if success:
             return jsonify(result), 200
         return jsonify(result), 422
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error in validate_log: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -89,10 +125,18 @@ def process_batch():
     """Process a batch of JSON log entries
     ---
     post:
+      operationId: process_batch
       tags:
         - logs
       summary: Process multiple JSON log entries
       description: Validates and processes multiple JSON log entries in a single request
+      parameters:
+        - in: header
+          name: Idempotency-Key
+          required: false
+          schema:
+            type: string
+          description: Applied per entry position; retries return the original entry ids (when idempotency is enabled)
       requestBody:
         required: true
         content:
@@ -115,33 +159,375 @@ def process_batch():
                     type: integer
                   processing_failed:
                     type: integer
+                  duplicates:
+                    type: integer
+                  duplicate_ids:
+                    type: array
+                    items:
+                      type: string
+                    description: Stored ids of the entries skipped as duplicates (when idempotency is enabled)
+        202:
+          description: Batch validated and queued for writing (asynchronous mode)
         400:
           $ref: '#/components/responses/ErrorResponse'
+        503:
+          $ref: '#/components/responses/ErrorResponse'
     """
     if not request.is_json:
         return jsonify({"error": "Content-Type must be application/json"}), 415
     
+    write_queue = get_write_queue()
     try:
-        result = process_batch_logs(request.json)
+        if write_queue is not None:
+            result = queue_batch_logs(request.json, write_queue, idempotency_key=request.headers.get('Idempotency-Key'))
+            result['status_url'] = url_for('api.get_job', job_id=result['job_id'])
+            return jsonify(result), 202
+        
+        result = process_batch_logs(request.json, idempotency_key=request.headers.get('Idempotency-Key'))
         return jsonify(result), 200
     except LogProcessingError as e:
         return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error in process_batch: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@api.route('/jobs/<job_id>')
+@log_function_call
+def get_job(job_id):
+    """Get the status of an asynchronous ingest job
+    ---
+    get:
+      operationId: get_job
+      tags:
+        - logs
+      summary: Retrieve asynchronous job progress
+      description: Reports how many queued entries of a job have been written. Entries
+        whose write timed out may or may not be stored and are counted in write_unknown;
+        the job then ends with status unknown.
+      parameters:
+        - in: path
+          name: job_id
+          required: true
+          schema:
+            type: string
+      responses:
+        200:
+          description: Job status
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  id:
+                    type: string
+                  status:
+                    type: string
+                  accepted:
+                    type: integer
+                  written:
+                    type: integer
+                  write_failed:
+                    type: integer
+                  write_unknown:
+                    type: integer
+        404:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    write_queue = get_write_queue()
+    job = write_queue.get_job(job_id) if write_queue is not None else None
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    status = job.to_dict()
+    status['queue_depth'] = write_queue.depth
+    return jsonify(status), 200
+
+@api.route('/ingest/stream', methods=['POST'])
+@log_function_call
+def ingest_stream():
+    """Ingest newline-delimited JSON log entries as a stream
+    ---
+    post:
+      operationId: ingest_stream
+      tags:
+        - logs
+      summary: Stream NDJSON log entries
+      description: Parses, validates and stores one JSON document per line without buffering the whole body
+      requestBody:
+        required: true
+        content:
+          application/x-ndjson:
+            schema:
+              type: string
+      responses:
+        200:
+          description: Stream processing summary
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  total_received:
+                    type: integer
+                  accepted:
+                    type: integer
+                  rejected:
+                    type: integer
+                  rejected_lines:
+                    type: array
+                    items:
+                      type: integer
+                  rejected_lines_truncated:
+                    type: boolean
+        415:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    if request.mimetype != 'application/x-ndjson':
+        return jsonify({"error": "Content-Type must be application/x-ndjson"}), 415
+    
+    # Bypass MAX_CONTENT_LENGTH: memory use here does not grow with the body
+    stream = get_input_stream(
+        request.environ,
+        max_content_length=current_app.config.get('STREAM_MAX_CONTENT_LENGTH')
+    )
+    
+    try:
+        summary = process_ndjson_stream(
+            stream,
+            max_line_bytes=current_app.config.get('STREAM_MAX_LINE_BYTES'),
+            max_reported_lines=current_app.config.get('STREAM_MAX_REPORTED_LINES')
+        )
+        return jsonify(summary), 200
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in ingest_stream: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/logs')
+@cached_response(LOG_ENTRIES)
+@log_function_call
+def list_log_entries():
+    """List stored log entries
+    ---
+    get:
+      operationId: list_log_entries
+      tags:
+        - logs
+      summary: List log entries, newest first
+      description: Filters by model, timestamp range and response time range. Pages are
+        keyset-paginated; pass next_cursor back as cursor to fetch the following page.
+      parameters:
+        - in: query
+          name: model
+          schema:
+            type: string
+        - in: query
+          name: since
+          schema:
+            type: string
+            format: date-time
+          description: Inclusive lower bound on timestamp
+        - in: query
+          name: until
+          schema:
+            type: string
+            format: date-time
+          description: Exclusive upper bound on timestamp
+        - in: query
+          name: min_response_time
+          schema:
+            type: number
+        - in: query
+          name: max_response_time
+          schema:
+            type: number
+        - in: query
+          name: cursor
+          schema:
+            type: string
+        - limit
+      responses:
+        200:
+          description: One page of log entries
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  items:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        id:
+                          type: string
+                        model:
+                          type: string
+                        input:
+                          type: string
+                        response_time_seconds:
+                          type: number
+                        timestamp:
+                          type: string
+                          format: date-time
+                  next_cursor:
+                    type: string
+                    nullable: true
+                  limit:
+                    type: integer
+        400:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    try:
+        page = list_logs(
+            model=request.args.get('model'),
+            since=parse_timestamp(request.args.get('since'), 'since'),
+            until=parse_timestamp(request.args.get('until'), 'until'),
+            min_response_time=parse_number(request.args.get('min_response_time'), 'min_response_time'),
+            max_response_time=parse_number(request.args.get('max_response_time'), 'max_response_time'),
+            limit=parse_number(request.args.get('limit'), 'limit', int, default=100),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify(page), 200
+    except QueryParameterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in list_log_entries: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/logs/<entry_id>')
+@cached_response(LOG_ENTRIES)
+@log_function_call
+def get_log_entry(entry_id):
+    """Get a single log entry
+    ---
+    get:
+      operationId: get_log_entry
+      tags:
+        - logs
+      summary: Retrieve a log entry with its steps
+      parameters:
+        - in: path
+          name: entry_id
+          required: true
+          schema:
+            type: string
+      responses:
+        200:
+          description: The log entry
+        404:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    entry = get_log(entry_id)
+    if entry is None:
+        return jsonify({"error": "Log entry not found"}), 404
+    return jsonify(entry), 200
+
+@api.route('/search')
+@cached_response(LOG_ENTRIES)
+@log_function_call
+def search_log_entries():
+    """Full-text search over log entries
+    ---
+    get:
+      operationId: search_log_entries
+      tags:
+        - logs
+      summary: Search prompts, step descriptions and pseudo-code
+      description: Every word in q must match (word* matches a prefix). Hits are ranked
+        by BM25, best first; pass next_cursor back as cursor for the following page.
+        Snippets are HTML-escaped text with matches wrapped in <mark> tags.
+      parameters:
+        - in: query
+          name: q
+          required: true
+          schema:
+            type: string
+        - in: query
+          name: model
+          schema:
+            type: string
+        - in: query
+          name: cursor
+          schema:
+            type: string
+        - in: query
+          name: limit
+          schema:
+            type: integer
+            default: 20
+            maximum: 100
+      responses:
+        200:
+          description: One page of ranked hits
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  items:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        id:
+                          type: string
+                        model:
+                          type: string
+                        timestamp:
+                          type: string
+                          format: date-time
+                        score:
+                          type: number
+                        input_snippet:
+                          type: string
+                          nullable: true
+                        steps_snippet:
+                          type: string
+                          nullable: true
+                  next_cursor:
+                    type: string
+                    nullable: true
+                  limit:
+                    type: integer
+        400:
+          $ref: '#/components/responses/ErrorResponse'
+        503:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    if not search_enabled():
+        return jsonify({"error": "Search is not enabled"}), 503
+    try:
+        page = search_logs(
+            request.args.get('q', ''),
+            model=request.args.get('model'),
+            limit=parse_number(request.args.get('limit'), 'limit', int, default=20),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify(page), 200
+    except QueryParameterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in search_log_entries: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @api.route('/errors')
+@cached_response(VALIDATION_ERRORS)
 @log_function_call
 def get_errors():
     """Get recent validation errors
     ---
     get:
+      operationId: get_errors
       tags:
         - monitoring
       summary: Retrieve recent validation errors
-      description: Returns a list of recent validation errors with details
+      description: Returns a list of recent validation errors. Large payload snapshots are returned in their bounded stored form; fetch /api/errors/{error_id} for the decompressed payload.
       parameters:
-        - $ref: '#/components/parameters/limit'
+        - limit
       responses:
         200:
           description: List of validation errors
@@ -161,21 +547,55 @@ def get_errors():
                     timestamp:
                       type: string
                       format: date-time
+        400:
+          $ref: '#/components/responses/ErrorResponse'
     """
     try:
-        limit = request.args.get('limit', default=100, type=int)
+        limit = parse_number(request.args.get('limit'), 'limit', int, default=100)
         errors = get_recent_errors(limit)
         return jsonify(errors), 200
+    except QueryParameterError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error in get_errors: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@api.route('/errors/<error_id>')
+@cached_response(VALIDATION_ERRORS)
+@log_function_call
+def get_error_detail(error_id):
+    """Get one validation error with its full payload
+    ---
+    get:
+      operationId: get_error
+      tags:
+        - monitoring
+      summary: Retrieve a validation error with its decompressed payload snapshot
+      parameters:
+        - in: path
+          name: error_id
+          required: true
+          schema:
+            type: string
+      responses:
+        200:
+          description: The validation error
+        404:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    error = get_error(error_id)
+    if error is None:
+        return jsonify({"error": "Validation error not found"}), 404
+    return jsonify(error), 200
+
 @api.route('/stats')
+@cached_response(LOG_ENTRIES, VALIDATION_ERRORS)
 @log_function_call
 def get_stats():
     """Get processing statistics
     ---
     get:
+      operationId: get_stats
       tags:
         - monitoring
       summary: Retrieve processing statistics
@@ -195,6 +615,10 @@ def get_stats():
                   last_processed:
                     type: string
                     format: date-time
+                  models:
+                    type: object
+                    additionalProperties:
+                      type: integer
                   status:
                     type: string
     """
@@ -204,3 +628,65 @@ def get_stats():
     except Exception as e:
         logger.error(f"Error in get_stats: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+@api.route('/stats/latency')
+@cached_response(LOG_ENTRIES)
+@log_function_call
+def get_latency():
+    """Get response-time percentiles
+    ---
+    get:
+      operationId: get_latency
+      tags:
+        - monitoring
+      summary: Retrieve p50/p95/p99 response times
+      description: Merges hourly per-model quantile sketches (1% relative error) instead of
+        scanning entries. Both time bounds are rounded down to their hour and `to` is exclusive.
+      parameters:
+        - in: query
+          name: model
+          schema:
+            type: string
+        - in: query
+          name: from
+          schema:
+            type: string
+            format: date-time
+        - in: query
+          name: to
+          schema:
+            type: string
+            format: date-time
+      responses:
+        200:
+          description: Latency percentiles, overall and per model
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  count:
+                    type: integer
+                  p50:
+                    type: number
+                  p95:
+                    type: number
+                  p99:
+                    type: number
+                  models:
+                    type: object
+        400:
+          $ref: '#/components/responses/ErrorResponse'
+    """
+    try:
+        stats = get_latency_stats(
+            model=request.args.get('model'),
+            since=parse_timestamp(request.args.get('from'), 'from'),
+            until=parse_timestamp(request.args.get('to'), 'to')
+        )
+        return jsonify(stats), 200
+    except QueryParameterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in get_latency: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,184 @@
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Callable, Dict
+from marshmallow import EXCLUDE, Schema, ValidationError, fields
+from marshmallow.error_store import ErrorStore
+from marshmallow.utils import missing
+
+SCHEMA = "_schema"
+
+class CompilationError(Exception):
+    """Raised when a schema uses a feature the compiler does not reproduce"""
+    pass
+
+def parse_iso_datetime(value: str) -> datetime:
+    """
+    Fast ISO-8601 parser (the C implementation of datetime.fromisoformat)
+    Only used when the field itself parses with fromisoformat, so the accepted
+    formats are exactly the ones marshmallow accepts
+    """
+    return datetime.fromisoformat(value)
+
+def _check_field(name: str, field: fields.Field) -> None:
+    if field.data_key is not None or field.attribute is not None or '.' in name:
+        raise CompilationError(f"{name}: data_key/attribute are not supported")
+    if field.validators or field.load_default is not missing:
+        raise CompilationError(f"{name}: validators and load defaults are not supported")
+    if getattr(field, 'pre_load', None) or getattr(field, 'post_load', None):
+        raise CompilationError(f"{name}: field processors are not supported")
+
+def _compile_field(name: str, field: fields.Field) -> Callable[[Any], Any]:
+    """
+    Build a loader for one field
+    Common JSON types take a specialized fast path; anything else is handed to
+    the marshmallow field itself so results and error messages stay identical
+    """
+    _check_field(name, field)
+    deserialize = field.deserialize
+
+    if isinstance(field, fields.Nested):
+        if field.many:
+            raise CompilationError(f"{name}: Nested(many=True) is not supported")
+        load_nested = _compile_schema_instance(field.schema)
+
+        def load(value):
+            if value is None:
+                return deserialize(value)
+            return load_nested(value)
+        return load
+
+    if isinstance(field, fields.List):
+        load_item = _compile_field(name, field.inner)
+
+        def load(value):
+            if type(value) is not list:
+                return deserialize(value)
+            result = []
+            errors = None
+            for idx, each in enumerate(value):
+                try:
+                    result.append(load_item(each))
+                except ValidationError as error:
+                    if errors is None:
+                        errors = {}
+                    errors[idx] = error.messages
+            if errors:
+                raise ValidationError(errors)
+            return result
+        return load
+
+    if type(field) is fields.String:
+        def load(value):
+            if type(value) is str:
+                return value
+            return deserialize(value)
+        return load
+
+    if type(field) is fields.Integer:
+        def load(value):
+            if type(value) is int:
+                return value
+            return deserialize(value)
+        return load
+
+    if type(field) is fields.Float:
+        allow_nan = field.allow_nan
+
+        def load(value):
+            if type(value) is float and (allow_nan or value - value == 0.0):
+                return value
+            if type(value) is int and -2 ** 53 <= value <= 2 ** 53:
+                return float(value)
+            return deserialize(value)
+        return load
+
+    if type(field) is fields.DateTime:
+        parser = field.DESERIALIZATION_FUNCS.get(field.format or field.DEFAULT_FORMAT)
+        if parser is datetime.fromisoformat:
+            parser = parse_iso_datetime
+
+        def load(value):
+            if type(value) is str and parser is not None:
+                try:
+                    return parser(value)
+                except (TypeError, AttributeError, ValueError):
+                    pass
+            return deserialize(value)
+        return load
+
+    # Unknown field types keep marshmallow's behaviour
+    return deserialize
+
+def _compile_schema_instance(schema: Schema) -> Callable[[Any], Dict]:
+    if schema.unknown != EXCLUDE or schema.partial or schema.many:
+        raise CompilationError(f"{type(schema).__name__}: only unknown=EXCLUDE single-object loads are supported")
+    for tag in ('pre_load', 'post_load', 'validates'):
+        if schema._hooks.get(tag):
+            raise CompilationError(f"{type(schema).__name__}: {tag} hooks are not supported")
+
+    plan = []
+    for name, field in schema.load_fields.items():
+        plan.append((name, _compile_field(name, field), field.required, field.allow_none,
+                     field.error_messages))
+
+    validators = []
+    for attr_name, pass_collection, kwargs in schema._hooks.get('validates_schema', []):
+        if pass_collection:
+            raise CompilationError(f"{type(schema).__name__}.{attr_name}: pass_collection is not supported")
+        validators.append((getattr(schema, attr_name), kwargs['skip_on_field_errors'],
+                           kwargs.get('pass_original', False)))
+
+    type_error = schema.error_messages['type']
+
+    def load(data):
+        if not isinstance(data, Mapping):
+            raise ValidationError({SCHEMA: [type_error]})
+
+        result = {}
+        error_store = None
+        for name, load_field, required, allow_none, messages in plan:
+            value = data.get(name, missing)
+            try:
+                if value is missing:
+                    if required:
+                        raise ValidationError(messages['required'])
+                    continue
+                if value is None:
+                    if not allow_none:
+                        raise ValidationError(messages['null'])
+                    result[name] = None
+                    continue
+                result[name] = load_field(value)
+            except ValidationError as error:
+                if error_store is None:
+                    error_store = ErrorStore()
+                error_store.store_error(error.messages, name)
+
+        field_errors = error_store is not None
+        for validator, skip_on_field_errors, pass_original in validators:
+            if field_errors and skip_on_field_errors:
+                continue
+            try:
+                if pass_original:
+                    validator(result, data, partial=None, many=False, unknown=EXCLUDE)
+                else:
+                    validator(result, partial=None, many=False, unknown=EXCLUDE)
+            except ValidationError as error:
+                if error_store is None:
+                    error_store = ErrorStore()
+                error_store.store_error(error.messages, error.field_name)
+
+        if error_store is not None:
+            raise ValidationError(error_store.errors, data=data)
+        return result
+
+    return load
+
+def compile_schema(schema_cls) -> Callable[[Any], Dict]:
+    """
+    Compile a marshmallow schema into a flat loader function
+    The loader returns the same data as `schema_cls().load(data)` and raises
+    marshmallow's ValidationError with identical messages
+    Raises CompilationError if the schema uses unsupported features
+    """
+    return _compile_schema_instance(schema_cls())
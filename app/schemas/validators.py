@@ -1,6 +1,6 @@
 from marshmallow import Schema, fields, validates_schema, ValidationError, EXCLUDE
 from datetime import datetime
-from app.utils.logger import log_function_call, log_validation_result, logger
+from app.utils.logger import log_function_call, log_validation_result, logger, validation_logger
 
 class StepSchema(Schema):
     """Schema for validating individual steps"""
@@ -59,6 +59,38 @@ class LogEntrySchema(Schema):
         if data['timestamp'] > datetime.utcnow():
             raise ValidationError("Timestamp cannot be in the future")
 
+VALIDATOR_BACKENDS = ('marshmallow', 'compiled')
+
+_backend = 'compiled'
+_log_entry_loader = None
+
+def configure_validator(backend: str = 'compiled'):
+    """
+    Select how log entries are loaded
+    'marshmallow' runs LogEntrySchema.load, 'compiled' runs the equivalent
+    flat loader built from the same schema definitions
+    """
+    global _backend, _log_entry_loader
+    if backend not in VALIDATOR_BACKENDS:
+        raise ValueError(f"Unknown validator backend: {backend}")
+    _backend = backend
+    _log_entry_loader = None
+
+def validator_backend() -> str:
+    """Returns: the backend chosen with configure_validator"""
+    return _backend
+
+def get_log_entry_loader():
+    """Return the loader for the configured backend, building it on first use"""
+    global _log_entry_loader
+    if _log_entry_loader is None:
+        if _backend == 'compiled':
+            from app.schemas.compiled import compile_schema
+            _log_entry_loader = compile_schema(LogEntrySchema)
+        else:
+            _log_entry_loader = LogEntrySchema().load
+    return _log_entry_loader
+
 def detect_json_type(data: dict) -> str:
     """
     Detect the type of JSON data
@@ -66,12 +98,12 @@ def detect_json_type(data: dict) -> str:
     """
     # Check if it's a JSON Schema
     if '$schema' in data and 'type' in data:
-        logger.info("Detected JSON Schema document")
+        validation_logger.info("Detected JSON Schema document")
         return 'schema'
     
     # Check if it's a log entry
     if all(key in data for key in ['model', 'input', 'output', 'response_time_seconds', 'timestamp']):
-        logger.info("Detected Log Entry document")
+        validation_logger.info("Detected Log Entry document")
         return 'log_entry'
     
     logger.warning("Unknown JSON document type")
@@ -107,9 +139,9 @@ def validate_json_data(data: dict) -> tuple:
             
         elif json_type == 'log_entry':
             # Validate log entry
-            schema = LogEntrySchema()
+            load_log_entry = get_log_entry_loader()
             try:
-                result = schema.load(data)
+                result = load_log_entry(data)
                 log_validation_result(True, str(data.get('timestamp', 'unknown')))
                 return True, result, None
             except ValidationError as e:
@@ -134,13 +166,14 @@ def validate_json_data(data: dict) -> tuple:
 def validate_batch(data_list: list) -> tuple:
     """
     Validate a batch of JSON entries
+    Large batches are validated across a process pool (see VALIDATION_WORKERS)
     Returns: (valid_entries: list, invalid_entries: list)
     """
+    from app.services.parallel_validation import validate_documents
     valid_entries = []
     invalid_entries = []
     
-    for idx, entry in enumerate(data_list):
-        is_valid, result, errors = validate_json_data(entry)
+    for idx, (entry, (is_valid, result, errors)) in enumerate(zip(data_list, validate_documents(data_list))):
         if is_valid:
             valid_entries.append(result)
         else:
@@ -0,0 +1,346 @@
+"""
+Production server: N prefork worker processes sharing one listening socket
+
+The master binds the socket, creates the schema once (`flask db create`),
+then forks the workers. Each worker builds its own app after the fork and
+serves the inherited socket with a threaded werkzeug server, so the kernel
+spreads connections across them. The master imports none of the app, which
+is what lets a reload pick up new code.
+
+Coordination between workers:
+- Writes: every worker's single writer thread takes turns on one file lock
+  (SQLITE_WRITE_LOCK_FILE), running up to SQLITE_WRITE_LOCK_BATCH queued
+  writes per turn, so SQLite sees one writer across the server.
+- Metrics: per-process snapshots in a shared directory; /metrics sums them
+  and /metrics?per_worker=1 breaks them out by worker pid.
+- Logs: workers forward records to the master, the only process that
+  writes and rotates the log files.
+- Retention runs in worker 0 only.
+Still per process: the response cache (bounded by RESPONSE_CACHE_TTL) and
+the in-memory job registry of the write-behind queue, so with more than one
+worker /api/jobs/<id> only answers on the worker that accepted the job.
+
+Signals to the master: TERM/INT stop gracefully (in-flight requests finish,
+queued writes are flushed), HUP reloads (new workers start, old ones drain),
+dead workers are replaced. A worker that fails to start is retried with
+backoff; the master exits with status 1 if no worker of the first
+generation starts. POSIX only.
+
+Usage: python -m app.server [--bind HOST:PORT] [--workers N] [--graceful-timeout S] [--pid-file PATH]
+                            [--access-log]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import select
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+from app.utils.logger import configure_logging, configure_worker_logging, listen_for_workers, logger
+
+RESPAWN_BACKOFF = (1.0, 60.0)  # first and longest wait before retrying a worker that did not start
+
+class InFlightRequests:
+    """WSGI middleware counting requests still being served, for graceful shutdown"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.active = 0
+        self._idle = threading.Condition()
+
+    def _done(self) -> None:
+        with self._idle:
+            self.active -= 1
+            self._idle.notify_all()
+
+    def __call__(self, environ, start_response):
+        with self._idle:
+            self.active += 1
+        try:
+            response = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self._done()
+            raise
+        return ClosingIterator(response, self._done)
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Returns: whether every request finished within timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.active == 0, timeout)
+
+def metrics_dir(runtime_dir: str) -> str:
+    """Directory the workers share their metric snapshots through"""
+    return os.path.join(runtime_dir, "metrics")
+
+def worker_config(index: int, workers: int, runtime_dir: str) -> Dict:
+    """create_app overrides for worker `index` of `workers`"""
+    config = {
+        'DEBUG': False,
+        'SCHEMA_AUTO_CREATE': False,  # the master ran `flask db create`
+        'SQLITE_WRITE_LOCK_FILE': os.path.join(runtime_dir, "sqlite-write.lock"),
+        'METRICS_MULTIPROC_DIR': metrics_dir(runtime_dir),
+        # The workers already use the cores; don't give each a full-size pool too
+        'VALIDATION_WORKERS': max(1, (os.cpu_count() or 1) // workers)
+    }
+    if index:
+        config.update(ERROR_RETENTION_DAYS=None, ERROR_RETENTION_MAX_ROWS=None)
+    return config
+
+def stop_app(app) -> None:
+    """Flush and stop the app's background threads (atexit does not run in forked workers)"""
+    from app.services.parallel_validation import shutdown_pool
+    from app.utils.metrics import REGISTRY
+    for name in ('write_queue', 'error_buffer', 'error_retention', 'single_writer'):
+        extension = app.extensions.get(name)
+        if extension is not None:
+            extension.stop()
+    shutdown_pool()
+    REGISTRY.flush()
+
+def run_worker(listener: socket.socket, index: int, config: Dict, ready_fd: int,
+               graceful_timeout: float, access_log: bool = False) -> None:
+    """Body of a forked worker process (logging already forwards to the master); returns once it has drained"""
+    if not access_log:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    from app.main import create_app  # imported after the fork so a reload runs new code
+    app = create_app(config)
+    in_flight = InFlightRequests(app.wsgi_app)
+    app.wsgi_app = in_flight
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+
+    stopping = threading.Event()
+    def stop(signum, frame):
+        if not stopping.is_set():
+            stopping.set()
+            threading.Thread(target=server.shutdown, name="server-shutdown").start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the master, which stops us
+
+    os.write(ready_fd, b"1")
+    os.close(ready_fd)
+    logger.info(f"Worker {index} (pid {os.getpid()}) serving on {host}:{port}")
+    server.serve_forever()
+    if not in_flight.wait_idle(graceful_timeout):
+        logger.warning(f"Worker {index} stopping with {in_flight.active} requests still running")
+    stop_app(app)
+    logger.info(f"Worker {index} (pid {os.getpid()}) stopped")
+
+class PreforkServer:
+    """Master process: owns the socket, forks, watches and replaces workers"""
+
+    def __init__(self, host: str, port: int, workers: int, graceful_timeout: float = 30.0,
+                 pid_file: Optional[str] = None, access_log: bool = False):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.pid_file = pid_file
+        self.access_log = access_log
+        self.runtime_dir = None
+        self.listener = None
+        self.log_queue = None
+        self.generation: Dict[int, int] = {}  # pid -> worker index, current workers
+        self.retiring: Dict[int, float] = {}  # pid -> kill deadline, workers draining after a reload
+        self.failed: Dict[int, Tuple[float, float]] = {}  # worker index -> (next attempt, backoff), not running
+        self._stopping = False
+        self._reload = False
+
+    def prepare_database(self) -> bool:
+        """Create or upgrade the schema in a separate process (once, not per worker)"""
+        result = subprocess.run([sys.executable, "-m", "flask", "--app", "app.main", "db", "create"],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            logger.error(f"`flask db create` failed: {result.stderr.strip()[-2000:]}")
+        return result.returncode == 0
+
+    def spawn(self, index: int) -> Optional[int]:
+        """Fork worker `index`; returns its pid once it is serving, None if it failed to start"""
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            configure_worker_logging(self.log_queue)
+            code = 0
+            try:
+                run_worker(self.listener, index, worker_config(index, self.workers, self.runtime_dir),
+                           ready_write, self.graceful_timeout, self.access_log)
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                code = 1
+            finally:
+                self.log_queue.close()
+                self.log_queue.join_thread()
+                os._exit(code)
+        os.close(ready_write)
+        try:
+            ready, _, _ = select.select([ready_read], [], [], 60)
+            started = bool(ready) and os.read(ready_read, 1) == b"1"
+        finally:
+            os.close(ready_read)
+        if not started:
+            self._signal(pid, signal.SIGKILL)
+            self.schedule_retry(index)
+            return None
+        self.failed.pop(index, None)
+        self.generation[pid] = index
+        return pid
+
+    def schedule_retry(self, index: int) -> float:
+        """Returns: seconds until worker `index` is started again (doubling per failure)"""
+        _, previous = self.failed.get(index, (0.0, 0.0))
+        backoff = min(max(previous * 2, RESPAWN_BACKOFF[0]), RESPAWN_BACKOFF[1])
+        self.failed[index] = (time.monotonic() + backoff, backoff)
+        logger.error(f"Worker {index} did not start; retrying in {backoff:.0f}s")
+        return backoff
+
+    def retry_failed(self) -> None:
+        now = time.monotonic()
+        for index, (due, _) in list(self.failed.items()):
+            if now >= due and not self._stopping:
+                self.spawn(index)
+
+    def spawn_generation(self) -> Dict[int, int]:
+        previous, self.generation = self.generation, {}
+        self.failed = {}
+        for index in range(self.workers):
+            self.spawn(index)
+        return previous
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def retire(self, workers: Dict[int, int]) -> None:
+        """Ask workers to drain; they are killed if still running after the graceful timeout"""
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        for pid in workers:
+            self._signal(pid, signal.SIGTERM)
+            self.retiring[pid] = deadline
+
+    def reload(self) -> None:
+        logger.info("Reloading: starting new workers")
+        if not self.prepare_database():
+            logger.error("Reload aborted, old workers keep serving")
+            return
+        failed = self.failed
+        previous = self.spawn_generation()
+        if not self.generation:
+            logger.error("Reload aborted, no new worker started")
+            self.generation, self.failed = previous, failed
+            return
+        self.retire(previous)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.forget_metrics(pid)
+            self.retiring.pop(pid, None)
+            index = self.generation.pop(pid, None)
+            if index is not None and not self._stopping:
+                logger.warning(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+                self.spawn(index)
+
+    def forget_metrics(self, pid: int) -> None:
+        """Fold an exited worker's metric snapshot into the dead-process totals"""
+        from app.utils.metrics import compact_snapshots  # stdlib only; keeps the master free of the app
+        try:
+            compact_snapshots(metrics_dir(self.runtime_dir), [pid])
+        except OSError as e:
+            logger.warning(f"Could not fold the metrics of worker pid {pid}: {e}")
+
+    def _handle(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self._reload = True
+        else:
+            self._stopping = True
+
+    def run(self) -> int:
+        """Serve until stopped; returns the exit status"""
+        configure_logging()
+        self.listener = socket.create_server((self.host, self.port), backlog=2048)
+        self.runtime_dir = tempfile.mkdtemp(prefix="json-logs-server-")
+        self.log_queue = multiprocessing.get_context("fork").Queue(10000)
+        log_listener = listen_for_workers(self.log_queue)
+        if self.pid_file:
+            with open(self.pid_file, 'w') as f:
+                f.write(f"{os.getpid()}\n")
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._handle)
+        try:
+            if not self.prepare_database():
+                return 1
+            self.spawn_generation()
+            if not self.generation:
+                logger.error("No worker started; exiting")
+                return 1
+            logger.info(f"Serving on {self.host}:{self.port} with {len(self.generation)} workers (master pid {os.getpid()})")
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self.reload()
+                self.reap()
+                self.retry_failed()
+                now = time.monotonic()
+                for pid, deadline in list(self.retiring.items()):
+                    if now > deadline:
+                        self._signal(pid, signal.SIGKILL)
+                time.sleep(0.2)
+            return 0
+        finally:
+            self.shutdown()
+            log_listener.stop()
+            self.listener.close()
+            shutil.rmtree(self.runtime_dir, ignore_errors=True)
+            if self.pid_file and os.path.exists(self.pid_file):
+                os.remove(self.pid_file)
+
+    def shutdown(self) -> None:
+        """Drain every worker, killing those that outlive the graceful timeout"""
+        self._stopping = True
+        self.retire(self.generation)
+        self.generation = {}
+        self.failed = {}
+        while self.retiring:
+            self.reap()
+            now = time.monotonic()
+            for pid, deadline in list(self.retiring.items()):
+                if now > deadline:
+                    self._signal(pid, signal.SIGKILL)
+            time.sleep(0.1)
+        logger.info("Server stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', default=f"0.0.0.0:{os.environ.get('PORT', 8000)}", help="HOST:PORT")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--graceful-timeout', type=float, default=30.0,
+                        help="Seconds a stopping worker may spend finishing requests")
+    parser.add_argument('--pid-file', default=None, help="Write the master pid here (for `kill -HUP`)")
+    parser.add_argument('--access-log', action='store_true', help="Log every request (werkzeug format)")
+    args = parser.parse_args()
+
+    host, _, port = args.bind.rpartition(':')
+    sys.exit(PreforkServer(host or "0.0.0.0", int(port), max(1, args.workers), args.graceful_timeout,
+                           args.pid_file, args.access_log).run())
+
+if __name__ == '__main__':
+    main()
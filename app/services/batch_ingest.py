@@ -0,0 +1,347 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import time
+import uuid
+from flask import current_app, has_app_context
+from sqlalchemy.exc import IntegrityError
+from app.database.writer import run_write
+from app.models.database import (
+    db,
+    LogEntry,
+    Step,
+    ValidationError,
+    add_pseudo_code_line,
+    apply_counter_deltas,
+    counter_deltas,
+    find_entries_by_hash,
+    write_pseudo_code_lines
+)
+from app.schemas.validators import validate_json_data
+from app.services.latency_rollup import update_latency_sketches
+from app.services.search import index_entries
+from app.utils.hashing import content_hash, idempotency_key_hash, line_hash
+from app.utils.logger import logger
+from app.utils.metrics import DB_WRITE_ROWS, DB_WRITE_SECONDS, record_validation
+from app.utils.response_cache import LOG_ENTRIES, VALIDATION_ERRORS, invalidate_responses
+from app.utils.snapshot import bound_snapshot
+
+DEFAULT_CHUNK_SIZE = 500
+
+def get_chunk_size(chunk_size: Optional[int] = None) -> int:
+    """Resolve the write chunk size from the argument or the app config"""
+    if chunk_size is None and has_app_context():
+        chunk_size = current_app.config.get('INGEST_CHUNK_SIZE')
+    return max(1, int(chunk_size or DEFAULT_CHUNK_SIZE))
+
+def idempotency_enabled() -> bool:
+    """Whether log entries are deduplicated by content hash (IDEMPOTENCY_ENABLED)"""
+    return has_app_context() and bool(current_app.config.get('IDEMPOTENCY_ENABLED'))
+
+def entry_hash(data, idempotency_key: Optional[str] = None) -> Optional[str]:
+    """
+    Dedup hash for a document: the hashed Idempotency-Key when one is given,
+    otherwise the canonical content hash; None when idempotency is off
+    """
+    if not idempotency_enabled():
+        return None
+    if idempotency_key:
+        return idempotency_key_hash(idempotency_key)
+    return content_hash(data)
+
+def log_entry_row(result: Dict, now: datetime = None, content_hash: Optional[str] = None) -> Dict:
+    """Map a validated log entry onto a `log_entries` row"""
+    now = now or datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "model": result['model'],
+        "input_text": result['input'],
+        "response_time": result['response_time_seconds'],
+        "timestamp": result['timestamp'],
+        "content_hash": content_hash,
+        "created_at": now,
+        "updated_at": now
+    }
+
+def error_row(error_type: str, message: str, data=None, now: datetime = None) -> Dict:
+    """Build a `validation_errors` row (snapshot bounded by ERROR_SNAPSHOT_MAX_BYTES)"""
+    now = now or datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "error_type": error_type,
+        "error_message": message,
+        "data_snapshot": bound_snapshot(data),
+        "created_at": now,
+        "updated_at": now
+    }
+
+class ChunkRows:
+    """Rows staged for a single write transaction"""
+
+    def __init__(self):
+        self.entries = []
+        self.steps = []
+        self.lines = {}
+        self.errors = []
+
+    def add_entry(self, result: Dict, now: datetime = None, content_hash: Optional[str] = None) -> str:
+        """Stage a validated log entry with its steps; returns the new entry id"""
+        row = log_entry_row(result, now, content_hash)
+        self.entries.append(row)
+        for step in result['output']['steps']:
+            hashes = []
+            for line in step['pseudoCode']:
+                digest = line_hash(line)
+                add_pseudo_code_line(self.lines, digest, line)
+                hashes.append(digest)
+            self.steps.append({
+                "id": str(uuid.uuid4()),
+                "log_entry_id": row['id'],
+                "step_number": step['step'],
+                "description": step['description'],
+                "pseudo_code": hashes
+            })
+        return row['id']
+
+    def add_error(self, error_type: str, message: str, data=None, now: datetime = None) -> None:
+        """Stage a validation error row"""
+        self.errors.append(error_row(error_type, message, data, now))
+
+    def extend(self, other: 'ChunkRows') -> None:
+        """Merge another set of staged rows into this one"""
+        self.entries.extend(other.entries)
+        self.steps.extend(other.steps)
+        for digest, line in other.lines.items():
+            add_pseudo_code_line(self.lines, digest, line)
+        self.errors.extend(other.errors)
+
+    def __len__(self) -> int:
+        return len(self.entries) + len(self.errors)
+
+def write_rows(rows: ChunkRows) -> Dict[str, str]:
+    """
+    Write staged rows in one transaction
+    Each table is written with a single executemany; rolls back and re-raises on failure
+    Runs on the single writer thread when one is running
+    Returns: {staged_entry_id: existing_entry_id} for entries skipped as duplicates
+    """
+    DB_WRITE_ROWS.observe(len(rows))
+    start = time.perf_counter()
+    try:
+        return run_write(_write_rows, rows)
+    except IntegrityError:
+        # A concurrent writer stored the same content hash first; the retry sees it
+        if not any(row['content_hash'] for row in rows.entries):
+            raise
+        return run_write(_write_rows, rows)
+    finally:
+        DB_WRITE_SECONDS.observe(time.perf_counter() - start)
+
+def split_duplicates(rows: ChunkRows) -> Tuple[List[Dict], List[Dict], Dict[str, str]]:
+    """
+    Separate staged entries whose content hash is already stored, or staged
+    earlier in the same rows, using one bulk index lookup
+    Returns: (entries to insert, steps to insert, {staged_entry_id: existing_entry_id})
+    """
+    hashes = [row['content_hash'] for row in rows.entries if row['content_hash']]
+    if not hashes:
+        return rows.entries, rows.steps, {}
+    known = find_entries_by_hash(hashes)
+    duplicates = {}
+    entries = []
+    for row in rows.entries:
+        digest = row['content_hash']
+        if digest and digest in known:
+            duplicates[row['id']] = known[digest]
+            continue
+        if digest:
+            known[digest] = row['id']
+        entries.append(row)
+    if not duplicates:
+        return entries, rows.steps, duplicates
+    steps = [step for step in rows.steps if step['log_entry_id'] not in duplicates]
+    return entries, steps, duplicates
+
+def _write_rows(rows: ChunkRows) -> Dict[str, str]:
+    try:
+        entries, steps, duplicates = split_duplicates(rows)
+        write_pseudo_code_lines(rows.lines)
+        if entries:
+            db.session.execute(LogEntry.__table__.insert(), entries)
+        if steps:
+            db.session.execute(Step.__table__.insert(), steps)
+        if rows.errors:
+            db.session.execute(ValidationError.__table__.insert(), rows.errors)
+        apply_counter_deltas(counter_deltas(entries, rows.errors))
+        update_latency_sketches(entries)
+        index_entries(entries, steps, rows.lines)
+        db.session.commit()
+        invalidate_responses(LOG_ENTRIES, VALIDATION_ERRORS)
+        return duplicates
+    except Exception:
+        db.session.rollback()
+        raise
+
+def validation_error_message(errors: Optional[List[Dict]]) -> str:
+    """Pick the message stored for a rejected document"""
+    if errors:
+        return errors[0].get('message', 'Unknown validation error')
+    return "Validation failed"
+
+def stage_document(rows: ChunkRows, data, is_valid: bool, result, errors,
+                   content_hash: Optional[str] = None) -> Tuple[Optional[str], Optional[Tuple[bool, Dict]]]:
+    """
+    Stage one validated document into rows
+    Returns: (entry_id, None) for a staged log entry whose outcome depends on
+    the write, or (None, (success, result)) when the outcome is already known
+    """
+    record_validation(is_valid, errors)
+    if not is_valid:
+        rows.add_error(
+            "ValidationError",
+            validation_error_message(errors),
+            {"errors": errors, "data": data}
+        )
+        return None, (False, {"errors": errors})
+    if isinstance(result, dict) and result.get('type') == 'json_schema':
+        return None, (True, {
+            "message": "Valid JSON Schema document",
+            "details": {
+                "title": result.get('title'),
+                "description": result.get('description'),
+                "properties": result.get('properties_count')
+            }
+        })
+    if isinstance(result, dict) and all(key in result for key in ['model', 'input', 'output']):
+        return rows.add_entry(result, content_hash=content_hash), None
+    return None, (True, {
+        "message": "Valid JSON document",
+        "type": result.get('type', 'unknown'),
+        "details": result
+    })
+
+class BatchIngestor:
+    """
+    Stage validated documents and write them in chunked bulk transactions
+
+    Accepted log entries and rejected documents are kept as plain rows and
+    flushed every `chunk_size` documents, one transaction per chunk. When a
+    chunk fails to commit only the entries of that chunk are reported as
+    failed; earlier and later chunks are unaffected. With IDEMPOTENCY_ENABLED,
+    entries already stored are reported with their original id instead of
+    being written again (an idempotency_key is applied per position).
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None, keep_results: bool = True,
+                 max_rejected_positions: Optional[int] = None, idempotency_key: Optional[str] = None):
+        self.chunk_size = get_chunk_size(chunk_size)
+        self.idempotency_key = idempotency_key
+        self.idempotent = idempotency_enabled()
+        self.keep_results = keep_results
+        self.max_rejected_positions = max_rejected_positions
+        self.results = {}
+        self.accepted = 0
+        self.rejected = 0
+        self.rejected_positions = []
+        self.chunks_written = 0
+        self.chunks_failed = 0
+        self.duplicates = 0
+        self._pending = []
+        self._rows = ChunkRows()
+
+    def add(self, data, position: int) -> None:
+        """Validate a document and stage it for writing"""
+        is_valid, result, errors = validate_json_data(data)
+        self.add_validated(data, position, is_valid, result, errors)
+
+    def add_validated(self, data, position: int, is_valid: bool, result, errors) -> None:
+        """Stage a document whose validation result is already known"""
+        digest = None
+        if is_valid and self.idempotent:
+            key = f"{self.idempotency_key}:{position}" if self.idempotency_key else None
+            digest = entry_hash(data, key)
+        entry_id, outcome = stage_document(self._rows, data, is_valid, result, errors, digest)
+        if entry_id is not None:
+            self._pending.append((position, data, entry_id))
+        else:
+            self._record(position, *outcome)
+
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def reject(self, position: int, error_type: str, message: str, data=None) -> None:
+        """Stage a document that failed before validation (e.g. unparseable input)"""
+        self._rows.add_error(error_type, message, data)
+        self._record(position, False, {"error": message})
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything staged so far as one transaction"""
+        if not self._rows:
+            return
+
+        pending, rows = self._pending, self._rows
+        self._pending, self._rows = [], ChunkRows()
+
+        try:
+            duplicates = write_rows(rows)
+            self.chunks_written += 1
+            for position, _, entry_id in pending:
+                if entry_id in duplicates:
+                    self.duplicates += 1
+                    self._record(position, True, {
+                        "message": "Duplicate log entry",
+                        "id": duplicates[entry_id],
+                        "duplicate": True
+                    })
+                    continue
+                self._record(position, True, {
+                    "message": "Log entry processed successfully",
+                    "id": entry_id
+                })
+        except Exception as e:
+            self.chunks_failed += 1
+            error_msg = f"Error processing JSON: {str(e)}"
+            logger.error(f"Batch chunk of {len(rows)} documents failed: {str(e)}")
+            for position, _, _ in pending:
+                self._record(position, False, {"error": error_msg})
+            self._log_chunk_failure(pending, rows.errors, error_msg)
+
+    def close(self) -> Dict:
+        """Flush the remaining rows and return the running summary"""
+        self.flush()
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "chunks_written": self.chunks_written,
+            "chunks_failed": self.chunks_failed,
+            "duplicates": self.duplicates
+        }
+
+    def ordered_results(self) -> List[Tuple[bool, Dict]]:
+        """Per-document results in input order (requires keep_results)"""
+        return [self.results[position] for position in sorted(self.results)]
+
+    def _record(self, position: int, success: bool, result: Dict) -> None:
+        if success:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+            if self.max_rejected_positions is None or len(self.rejected_positions) < self.max_rejected_positions:
+                self.rejected_positions.append(position)
+        if self.keep_results:
+            self.results[position] = (success, result)
+
+    def _log_chunk_failure(self, pending: List, errors: List[Dict], error_msg: str) -> None:
+        """
+        Best-effort record of a failed chunk, in its own transaction: the
+        chunk's validation errors plus a ProcessingError per accepted entry
+        """
+        rows = ChunkRows()
+        rows.errors.extend(errors)
+        for _, data, _ in pending:
+            rows.add_error("ProcessingError", error_msg, data)
+        try:
+            write_rows(rows)
+        except Exception as e:
+            logger.error(f"Could not record failed chunk: {str(e)}")
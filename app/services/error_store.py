@@ -0,0 +1,238 @@
+import atexit
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from flask import Flask
+from app.database.writer import run_write
+from app.models.database import (
+    db,
+    HASH_LOOKUP_CHUNK,
+    ValidationError,
+    VALIDATION_ERRORS_COUNTER,
+    apply_counter_deltas,
+    counter_deltas,
+    read_counters
+)
+from app.utils.logger import log_function_call, logger
+from app.utils.metrics import VALIDATION_ERRORS_DROPPED
+from app.utils.response_cache import VALIDATION_ERRORS, invalidate_responses
+
+DEFAULT_PRUNE_CHUNK_SIZE = 1000
+
+class ErrorBuffer:
+    """
+    Collects validation-error rows and writes them in batched transactions
+
+    ValidationError.log_error hands rows to the buffer instead of committing
+    one transaction per failure. A background thread writes whatever has
+    accumulated once `batch_size` rows are waiting or `flush_interval`
+    seconds have passed, whichever comes first. Rows from a failed write go
+    back into the buffer for the next flush; beyond `max_rows` the oldest
+    are dropped and counted in validation_errors_dropped_total.
+    """
+
+    def __init__(self, app: Flask, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_rows: int = 10000):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_rows = max(max_rows, batch_size)
+        self._rows = []
+        self._retrying = False
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="error-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Write everything still buffered and join the thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def add(self, row: Dict) -> None:
+        with self._condition:
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self) -> int:
+        """
+        Write the buffered rows now; on failure they are kept for the next flush
+        Returns: number of rows written
+        """
+        with self._condition:
+            rows, self._rows = self._rows, []
+            retrying = self._retrying
+        if retrying and rows:
+            # A write that timed out may have committed after all
+            stored = _stored_error_ids([row['id'] for row in rows])
+            rows = [row for row in rows if row['id'] not in stored]
+        if rows:
+            try:
+                run_write(ValidationError.insert_rows, rows)
+            except Exception as e:
+                dropped = self._requeue(rows)
+                logger.error(f"Could not write {len(rows)} buffered validation errors "
+                             f"({dropped} dropped, the rest kept for the next flush): {str(e)}")
+                return 0
+        with self._condition:
+            self._retrying = False
+        return len(rows)
+
+    def _requeue(self, rows: List[Dict]) -> int:
+        """Put rows back ahead of newer ones, dropping the oldest beyond max_rows; returns the number dropped"""
+        with self._condition:
+            self._rows = rows + self._rows
+            self._retrying = True
+            dropped = max(0, len(self._rows) - self.max_rows)
+            del self._rows[:dropped]
+        if dropped:
+            VALIDATION_ERRORS_DROPPED.inc(dropped)
+        return dropped
+
+    def _run(self) -> None:
+        with self.app.app_context():
+            while True:
+                with self._condition:
+                    if (len(self._rows) < self.batch_size or self._retrying) and not self._stopping:
+                        self._condition.wait(self.flush_interval)
+                    stopping = self._stopping
+                self.flush()
+                if stopping:
+                    with self._condition:
+                        lost, self._rows = len(self._rows), []
+                    if lost:
+                        VALIDATION_ERRORS_DROPPED.inc(lost)
+                        logger.error(f"Dropped {lost} validation errors that could not be written before shutdown")
+                    return
+
+def _stored_error_ids(ids: List[str]) -> set:
+    stored = set()
+    for start in range(0, len(ids), HASH_LOOKUP_CHUNK):
+        stored.update(
+            error_id for error_id, in db.session.query(ValidationError.id)
+            .filter(ValidationError.id.in_(ids[start:start + HASH_LOOKUP_CHUNK]))
+        )
+    db.session.rollback()  # end the read transaction before the writer inserts
+    return stored
+
+def _delete_errors(rows: List[Dict]) -> None:
+    try:
+        db.session.execute(
+            ValidationError.__table__.delete().where(ValidationError.id.in_([row['id'] for row in rows]))
+        )
+        apply_counter_deltas(counter_deltas(errors=rows, sign=-1))
+        db.session.commit()
+        invalidate_responses(VALIDATION_ERRORS)
+    except Exception:
+        db.session.rollback()
+        raise
+
+def _oldest_errors(limit: int, before: Optional[datetime] = None) -> List[Dict]:
+    query = db.session.query(ValidationError.id, ValidationError.created_at)
+    if before is not None:
+        query = query.filter(ValidationError.created_at < before)
+    rows = query.order_by(ValidationError.created_at).limit(limit).all()
+    db.session.rollback()  # end the read transaction before the writer deletes
+    return [{"id": error_id, "created_at": created_at} for error_id, created_at in rows]
+
+@log_function_call
+def prune_validation_errors(max_age_days: Optional[float] = None, max_rows: Optional[int] = None,
+                            chunk_size: int = DEFAULT_PRUNE_CHUNK_SIZE) -> int:
+    """
+    Delete validation errors older than `max_age_days`, then the oldest ones
+    beyond `max_rows`, oldest first in transactions of at most `chunk_size`
+    rows so writers are never blocked for long
+    Returns: number of rows deleted
+    """
+    deleted = 0
+    if max_age_days is not None:
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        while True:
+            rows = _oldest_errors(chunk_size, before=cutoff)
+            if not rows:
+                break
+            run_write(_delete_errors, rows)
+            deleted += len(rows)
+    if max_rows is not None:
+        count, _ = read_counters().get(VALIDATION_ERRORS_COUNTER, (0, None))
+        excess = count - max_rows
+        while excess > 0:
+            rows = _oldest_errors(min(chunk_size, excess))
+            if not rows:
+                break
+            run_write(_delete_errors, rows)
+            deleted += len(rows)
+            excess -= len(rows)
+    if deleted:
+        logger.info(f"Pruned {deleted} validation errors")
+    return deleted
+
+class RetentionWorker:
+    """Runs prune_validation_errors every `interval` seconds in the background"""
+
+    def __init__(self, app: Flask, interval: float, max_age_days: Optional[float] = None,
+                 max_rows: Optional[int] = None, chunk_size: int = DEFAULT_PRUNE_CHUNK_SIZE):
+        self.app = app
+        self.interval = interval
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self.chunk_size = chunk_size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="error-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        with self.app.app_context():
+            while not self._stop.wait(self.interval):
+                try:
+                    prune_validation_errors(self.max_age_days, self.max_rows, self.chunk_size)
+                except Exception as e:
+                    logger.error(f"Validation error retention failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+def init_error_store(app: Flask) -> None:
+    """
+    Start the error buffer (ERROR_WRITE_BATCH_SIZE > 1) and the retention
+    job (ERROR_RETENTION_DAYS or ERROR_RETENTION_MAX_ROWS set)
+    """
+    batch_size = app.config.get('ERROR_WRITE_BATCH_SIZE', 1)
+    if batch_size and batch_size > 1:
+        error_buffer = ErrorBuffer(app, batch_size, app.config.get('ERROR_FLUSH_INTERVAL', 1.0),
+                                   app.config.get('ERROR_BUFFER_MAX_ROWS', 10000))
+        error_buffer.start()
+        atexit.register(error_buffer.stop)
+        app.extensions['error_buffer'] = error_buffer
+
+    max_age_days = app.config.get('ERROR_RETENTION_DAYS')
+    max_rows = app.config.get('ERROR_RETENTION_MAX_ROWS')
+    if max_age_days is not None or max_rows is not None:
+        retention = RetentionWorker(
+            app,
+            app.config.get('ERROR_RETENTION_INTERVAL', 3600),
+            max_age_days,
+            max_rows,
+            app.config.get('ERROR_RETENTION_CHUNK_SIZE', DEFAULT_PRUNE_CHUNK_SIZE)
+        )
+        retention.start()
+        atexit.register(retention.stop)
+        app.extensions['error_retention'] = retention
@@ -0,0 +1,145 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, tuple_
+from app.models.database import db, LatencySketch, LogEntry
+from app.utils.logger import log_function_call
+from app.utils.response_cache import LOG_ENTRIES, invalidate_responses
+from app.utils.sketch import DDSketch
+
+SKETCH_ACCURACY = 0.01  # 1% relative error on every reported quantile
+QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+REBUILD_CHUNK = 50000
+
+def hour_bucket(timestamp: datetime) -> datetime:
+    """Start of the (UTC) hour containing timestamp, as a naive datetime"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def build_sketches(entries: List[Dict]) -> Dict[Tuple[str, datetime], DDSketch]:
+    """Group `log_entries` rows by (model, hour) and sketch their response times"""
+    sketches = {}
+    for row in entries:
+        key = (row['model'], hour_bucket(row['timestamp']))
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = DDSketch(SKETCH_ACCURACY)
+        sketch.add(row['response_time'])
+    return sketches
+
+def update_latency_sketches(entries: List[Dict]) -> None:
+    """
+    Merge the response times of newly inserted rows into the stored sketches
+    Runs inside the caller's write transaction (after its inserts, so the
+    write lock is already held) and does not commit
+    """
+    sketches = build_sketches(entries)
+    if not sketches:
+        return
+    table = LatencySketch.__table__
+    keys = list(sketches)
+    stored = db.session.query(LatencySketch.model, LatencySketch.bucket, LatencySketch.sketch)\
+        .filter(tuple_(LatencySketch.model, LatencySketch.bucket).in_(keys))
+    existing = set()
+    for model, bucket, data in stored:
+        key = (model, bucket)
+        merged = DDSketch.from_bytes(data)
+        merged.merge(sketches[key])
+        sketches[key] = merged
+        existing.add(key)
+
+    updates = [
+        {"b_model": model, "b_bucket": bucket, "count": sketch.count, "sketch": sketch.to_bytes()}
+        for (model, bucket), sketch in sketches.items() if (model, bucket) in existing
+    ]
+    inserts = [
+        {"model": model, "bucket": bucket, "count": sketch.count, "sketch": sketch.to_bytes()}
+        for (model, bucket), sketch in sketches.items() if (model, bucket) not in existing
+    ]
+    if updates:
+        db.session.execute(
+            table.update()
+            .where(table.c.model == bindparam('b_model'))
+            .where(table.c.bucket == bindparam('b_bucket'))
+            .values(count=bindparam('count'), sketch=bindparam('sketch')),
+            updates
+        )
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+
+def summarize(sketch: DDSketch) -> Dict:
+    summary = {"count": sketch.count}
+    for name, q in QUANTILES:
+        summary[name] = sketch.quantile(q)
+    summary["min"] = sketch.min if sketch.count else None
+    summary["max"] = sketch.max if sketch.count else None
+    summary["mean"] = sketch.mean
+    return summary
+
+@log_function_call
+def get_latency_stats(model: Optional[str] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Dict:
+    """
+    Response-time percentiles from the hourly sketches, without scanning entries
+    Both bounds are rounded down to their hour; `until` is exclusive, so
+    until=10:30 stops before the 10:00 bucket
+    Returns: overall summary plus one per model
+    """
+    query = db.session.query(LatencySketch.model, LatencySketch.sketch)
+    if model is not None:
+        query = query.filter(LatencySketch.model == model)
+    if since is not None:
+        query = query.filter(LatencySketch.bucket >= hour_bucket(since))
+    if until is not None:
+        query = query.filter(LatencySketch.bucket < hour_bucket(until))
+
+    overall = DDSketch(SKETCH_ACCURACY)
+    per_model = {}
+    buckets = 0
+    for name, data in query:
+        sketch = DDSketch.from_bytes(data)
+        overall.merge(sketch)
+        if name in per_model:
+            per_model[name].merge(sketch)
+        else:
+            per_model[name] = sketch
+        buckets += 1
+
+    return {
+        "model": model,
+        "from": since.isoformat() if since else None,
+        "to": until.isoformat() if until else None,
+        "relative_accuracy": SKETCH_ACCURACY,
+        "buckets": buckets,
+        **summarize(overall),
+        "models": {name: summarize(sketch) for name, sketch in sorted(per_model.items())}
+    }
+
+@log_function_call
+def rebuild_latency_sketches() -> int:
+    """
+    Recompute every sketch from log_entries in one transaction
+    Returns: number of (model, hour) sketches written
+    """
+    sketches = {}
+    rows = db.session.query(LogEntry.model, LogEntry.timestamp, LogEntry.response_time)\
+        .yield_per(REBUILD_CHUNK)
+    for model, timestamp, response_time in rows:
+        key = (model, hour_bucket(timestamp))
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = DDSketch(SKETCH_ACCURACY)
+        sketch.add(response_time)
+    try:
+        db.session.execute(LatencySketch.__table__.delete())
+        if sketches:
+            db.session.execute(LatencySketch.__table__.insert(), [
+                {"model": model, "bucket": bucket, "count": sketch.count, "sketch": sketch.to_bytes()}
+                for (model, bucket), sketch in sketches.items()
+            ])
+        db.session.commit()
+        invalidate_responses(LOG_ENTRIES)
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(sketches)
@@ -1,30 +1,48 @@
-from typing import Dict, List, Tuple
-from datetime import datetime
-from app.models.database import db, LogEntry, ValidationError
-from app.schemas.validators import validate_json_data, validate_batch
+from typing import IO, Dict, List, Optional, Tuple
+from app.models.database import (
+    db,
+    ValidationError,
+    LOG_ENTRIES_COUNTER,
+    MODEL_COUNTER_PREFIX,
+    VALIDATION_ERRORS_COUNTER,
+    read_counters
+)
+from app.schemas.validators import validate_json_data
+from app.services.batch_ingest import (
+    BatchIngestor,
+    ChunkRows,
+    entry_hash,
+    stage_document,
+    validation_error_message,
+    write_rows
+)
+from app.services.parallel_validation import validate_documents
+from app.services.write_queue import WriteBehindQueue
+from app.utils.json_stream import iter_file_documents, iter_ndjson
 from app.utils.logger import log_function_call, logger
+from app.utils.metrics import BATCH_SIZE, record_validation
+from app.utils.snapshot import expand_snapshot
 
 class LogProcessingError(Exception):
     """Custom exception for log processing errors"""
     pass
 
 @log_function_call
-def process_single_log(data: Dict) -> Tuple[bool, Dict]:
+def process_single_log(data: Dict, idempotency_key: Optional[str] = None) -> Tuple[bool, Dict]:
     """
     Process a single JSON file
+    With IDEMPOTENCY_ENABLED a repeated document (or Idempotency-Key) returns
+    the original entry id instead of writing a new entry
     Returns: (success: bool, result: dict)
     """
     try:
         is_valid, result, errors = validate_json_data(data)
+        record_validation(is_valid, errors)
         
         if not is_valid:
-            error_msg = "Validation failed"
-            if errors:
-                error_msg = errors[0].get('message', 'Unknown validation error')
-            
             ValidationError.log_error(
                 "ValidationError",
-                error_msg,
+                validation_error_message(errors),
                 {"errors": errors, "data": data}
             )
             return False, {"errors": errors}
@@ -43,21 +61,22 @@ def process_single_log(data: Dict) -> Tuple[bool, Dict]:
         
         # For log entries, store in database
         if isinstance(result, dict) and all(key in result for key in ['model', 'input', 'output']):
-            log_entry = LogEntry(
-                model=result['model'],
-                input_text=result['input'],
-                output=result['output'],
-                response_time=result['response_time_seconds'],
-                timestamp=result['timestamp']
-            )
+            rows = ChunkRows()
+            entry_id = rows.add_entry(result, content_hash=entry_hash(data, idempotency_key))
+            duplicates = write_rows(rows)
             
-            db.session.add(log_entry)
-            db.session.commit()
+            if entry_id in duplicates:
+                logger.info(f"Duplicate log entry, returning original: {duplicates[entry_id]}")
+                return True, {
+                    "message": "Duplicate log entry",
+                    "id": duplicates[entry_id],
+                    "duplicate": True
+                }
             
-            logger.info(f"Successfully processed log entry: {log_entry.id}")
+            logger.info(f"Successfully processed log entry: {entry_id}")
             return True, {
                 "message": "Log entry processed successfully",
-                "id": log_entry.id
+                "id": entry_id
             }
         
         # For other valid JSON types
@@ -75,19 +94,29 @@ def process_single_log(data: Dict) -> Tuple[bool, Dict]:
         return False, {"error": error_msg}
 
 @log_function_call
-def process_batch_logs(data_list: List[Dict]) -> Dict:
+def process_batch_logs(data_list: List[Dict], chunk_size: Optional[int] = None,
+                       idempotency_key: Optional[str] = None) -> Dict:
     """
     Process a batch of JSON entries
+    All entries are validated first (across a process pool for large batches),
+    then written from this process in chunked bulk transactions
+    (`INGEST_CHUNK_SIZE` rows per transaction unless chunk_size is given)
     Returns: Summary of processing results
     """
     if not isinstance(data_list, list):
         raise LogProcessingError("Input must be a list of JSON documents")
     
+    BATCH_SIZE.labels("batch").observe(len(data_list))
+    validations = validate_documents(data_list)
+    
+    ingestor = BatchIngestor(chunk_size, idempotency_key=idempotency_key)
+    for position, (entry, (is_valid, result, errors)) in enumerate(zip(data_list, validations)):
+        ingestor.add_validated(entry, position, is_valid, result, errors)
+    totals = ingestor.close()
+    
     processed_entries = []
     failed_entries = []
-    
-    for entry in data_list:
-        success, result = process_single_log(entry)
+    for success, result in ingestor.ordered_results():
         if success:
             processed_entries.append(result)
         else:
@@ -97,6 +126,8 @@ def process_batch_logs(data_list: List[Dict]) -> Dict:
         "total_received": len(data_list),
         "successfully_processed": len(processed_entries),
         "processing_failed": len(failed_entries),
+        "duplicates": totals['duplicates'],
+        "duplicate_ids": [entry['id'] for entry in processed_entries if entry.get('duplicate')],
         "processed_entries": processed_entries,
         "failed_entries": failed_entries
     }
@@ -104,18 +135,201 @@ def process_batch_logs(data_list: List[Dict]) -> Dict:
     logger.info(f"Batch processing complete. Success: {len(processed_entries)}, Failed: {len(failed_entries)}")
     return summary
 
+@log_function_call
+def queue_single_log(data: Dict, write_queue: WriteBehindQueue,
+                     idempotency_key: Optional[str] = None) -> Tuple[bool, Dict, bool]:
+    """
+    Validate a single JSON document now and queue its write
+    Documents already stored or queued (IDEMPOTENCY_ENABLED) are answered
+    immediately with the id of that entry
+    Returns: (success: bool, result: dict, queued: bool)
+    Raises QueueFullError when the queue cannot take the document
+    """
+    is_valid, result, errors = validate_json_data(data)
+    digest = entry_hash(data, idempotency_key) if is_valid else None
+    
+    rows = ChunkRows()
+    entry_id, outcome = stage_document(rows, data, is_valid, result, errors, digest)
+    job = write_queue.submit(rows, total=1, accepted=int(is_valid), rejected=int(not is_valid))
+    
+    if entry_id is None:
+        return outcome[0], outcome[1], False
+    if entry_id in job.duplicate_of:
+        return True, {
+            "message": "Duplicate log entry",
+            "id": job.duplicate_of[entry_id],
+            "duplicate": True
+        }, False
+    
+    logger.info(f"Queued log entry {entry_id} as job {job.id}")
+    return True, {
+        "message": "Log entry queued",
+        "id": entry_id,
+        "job_id": job.id
+    }, True
+
+@log_function_call
+def queue_batch_logs(data_list: List[Dict], write_queue: WriteBehindQueue,
+                     idempotency_key: Optional[str] = None) -> Dict:
+    """
+    Validate a batch of JSON entries now and queue their writes as one job
+    Entries repeated in the batch, queued by an earlier request or already
+    stored (IDEMPOTENCY_ENABLED) are reported in `duplicates` with the id
+    that is written instead of being queued
+    Returns: Summary with the job id and the ids assigned to accepted entries
+    Raises QueueFullError when the queue cannot take the batch
+    """
+    if not isinstance(data_list, list):
+        raise LogProcessingError("Input must be a list of JSON documents")
+    
+    BATCH_SIZE.labels("queue").observe(len(data_list))
+    validations = validate_documents(data_list)
+    digests = [
+        entry_hash(entry, f"{idempotency_key}:{position}" if idempotency_key else None) if is_valid else None
+        for position, (entry, (is_valid, _, _)) in enumerate(zip(data_list, validations))
+    ]
+    
+    rows = ChunkRows()
+    accepted_ids = []  # (staged entry id, repeats an earlier entry of the batch)
+    staged = {}
+    failed_entries = []
+    for entry, (is_valid, result, errors), digest in zip(data_list, validations, digests):
+        if digest in staged:
+            accepted_ids.append((staged[digest], True))
+            continue
+        entry_id, outcome = stage_document(rows, entry, is_valid, result, errors, digest)
+        if entry_id is not None:
+            accepted_ids.append((entry_id, False))
+            if digest:
+                staged[digest] = entry_id
+        elif not outcome[0]:
+            failed_entries.append(outcome[1])
+    
+    job = write_queue.submit(
+        rows,
+        total=len(data_list),
+        accepted=len(data_list) - len(failed_entries),
+        rejected=len(failed_entries),
+        duplicates=sum(1 for _, repeated in accepted_ids if repeated)
+    )
+    
+    queued_ids = []
+    duplicates = []
+    for entry_id, repeated in accepted_ids:
+        if repeated or entry_id in job.duplicate_of:
+            duplicates.append(job.duplicate_of.get(entry_id, entry_id))
+        else:
+            queued_ids.append(entry_id)
+    
+    logger.info(f"Queued batch job {job.id}. Queued: {len(queued_ids)}, Failed: {len(failed_entries)}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total_received": len(data_list),
+        "queued": len(queued_ids),
+        "validation_failed": len(failed_entries),
+        "queued_ids": queued_ids,
+        "duplicates": len(duplicates),
+        "duplicate_ids": duplicates,
+        "failed_entries": failed_entries
+    }
+
+@log_function_call
+def process_ndjson_stream(stream: IO[bytes], chunk_size: Optional[int] = None,
+                          max_line_bytes: Optional[int] = None,
+                          max_reported_lines: Optional[int] = None) -> Dict:
+    """
+    Process a newline-delimited JSON stream without buffering the whole body
+    Lines are parsed and validated one at a time and written in chunks
+    Returns: Compact summary with counts and rejected line numbers
+    """
+    ingestor = BatchIngestor(chunk_size, keep_results=False,
+                             max_rejected_positions=max_reported_lines)
+    
+    total_lines = 0
+    for line_number, document, error in iter_ndjson(stream, max_line_bytes):
+        total_lines += 1
+        if error:
+            ingestor.reject(line_number, "ParseError", error)
+        else:
+            ingestor.add(document, line_number)
+    
+    result = ingestor.close()
+    BATCH_SIZE.labels("stream").observe(total_lines)
+    summary = {
+        "total_received": total_lines,
+        "accepted": result['accepted'],
+        "rejected": result['rejected'],
+        "rejected_lines": ingestor.rejected_positions,
+        "rejected_lines_truncated": result['rejected'] > len(ingestor.rejected_positions),
+        "duplicates": result['duplicates'],
+        "chunks_written": result['chunks_written'],
+        "chunks_failed": result['chunks_failed']
+    }
+    
+    logger.info(f"Stream processing complete. Accepted: {summary['accepted']}, Rejected: {summary['rejected']}")
+    return summary
+
+@log_function_call
+def process_uploaded_file(stream: IO[bytes], filename: str, chunk_size: Optional[int] = None,
+                          max_line_bytes: Optional[int] = None,
+                          max_reported_documents: Optional[int] = None) -> Dict:
+    """
+    Process an uploaded JSON, NDJSON, gzip or zip file through the batch pipeline
+    Documents are decoded one at a time and written in chunks
+    Returns: Compact summary with counts and rejected document positions
+    """
+    ingestor = BatchIngestor(chunk_size, keep_results=False,
+                             max_rejected_positions=max_reported_documents)
+    
+    total_documents = 0
+    sources = set()
+    for source, position, document, error in iter_file_documents(stream, filename, max_line_bytes):
+        total_documents += 1
+        sources.add(source)
+        key = {"file": source, "position": position}
+        if error:
+            ingestor.reject(key, "ParseError", error)
+        else:
+            ingestor.add(document, key)
+    
+    result = ingestor.close()
+    BATCH_SIZE.labels("upload").observe(total_documents)
+    summary = {
+        "files_processed": len(sources),
+        "total_received": total_documents,
+        "accepted": result['accepted'],
+        "rejected": result['rejected'],
+        "rejected_documents": ingestor.rejected_positions,
+        "rejected_documents_truncated": result['rejected'] > len(ingestor.rejected_positions),
+        "duplicates": result['duplicates'],
+        "chunks_written": result['chunks_written'],
+        "chunks_failed": result['chunks_failed']
+    }
+    
+    logger.info(f"Upload processing complete. Accepted: {summary['accepted']}, Rejected: {summary['rejected']}")
+    return summary
+
 @log_function_call
 def get_processing_stats() -> Dict:
-    """Get statistics about processed logs"""
+    """
+    Get statistics about processed logs
+    Read from the materialized counters, so the cost does not grow with the tables
+    """
     try:
-        total_logs = LogEntry.query.count()
-        total_errors = ValidationError.query.count()
-        latest_log = LogEntry.query.order_by(LogEntry.created_at.desc()).first()
+        counters = read_counters()
+        total_logs, last_processed = counters.get(LOG_ENTRIES_COUNTER, (0, None))
+        total_errors, _ = counters.get(VALIDATION_ERRORS_COUNTER, (0, None))
         
         stats = {
             "total_logs_processed": total_logs,
             "total_validation_errors": total_errors,
-            "last_processed": latest_log.created_at.isoformat() if latest_log else None,
+            "last_processed": last_processed.isoformat() if last_processed else None,
+            "models": {
+                name[len(MODEL_COUNTER_PREFIX):]: count
+                for name, (count, _) in sorted(counters.items())
+                if name.startswith(MODEL_COUNTER_PREFIX) and count
+            },
             "status": "healthy"
         }
         
@@ -130,25 +344,32 @@ def get_processing_stats() -> Dict:
             "details": str(e)
         }
 
+def error_dict(error: ValidationError, expand: bool = False) -> Dict:
+    """
+    Serialize a validation error; the snapshot stays in its bounded stored
+    form (see app.utils.snapshot) unless `expand` decompresses it
+    """
+    return {
+        "id": error.id,
+        "type": error.error_type,
+        "message": error.error_message,
+        "timestamp": error.created_at.isoformat(),
+        "data": expand_snapshot(error.data_snapshot) if expand else error.data_snapshot
+    }
+
 @log_function_call
 def get_recent_errors(limit: int = 100) -> List[Dict]:
-    """Get recent validation errors"""
+    """
+    Get recent validation errors with their snapshots as stored, so a page
+    costs at most limit * ERROR_SNAPSHOT_MAX_BYTES (get_error expands one)
+    """
     try:
         errors = ValidationError.query\
             .order_by(ValidationError.created_at.desc())\
             .limit(limit)\
             .all()
         
-        error_list = [
-            {
-                "id": error.id,
-                "type": error.error_type,
-                "message": error.error_message,
-                "timestamp": error.created_at.isoformat(),
-                "data": error.data_snapshot
-            }
-            for error in errors
-        ]
+        error_list = [error_dict(error) for error in errors]
         
         logger.info(f"Retrieved {len(error_list)} recent errors")
         return error_list
@@ -156,3 +377,12 @@ def get_recent_errors(limit: int = 100) -> List[Dict]:
         error_msg = f"Error retrieving validation errors: {str(e)}"
         logger.error(error_msg)
         return []
+
+@log_function_call
+def get_error(error_id: str) -> Optional[Dict]:
+    """
+    Get one validation error with its snapshot decompressed
+    Returns: None when there is no such error
+    """
+    error = db.session.get(ValidationError, error_id)
+    return error_dict(error, expand=True) if error is not None else None
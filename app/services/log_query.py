@@ -0,0 +1,139 @@
+import base64
+import json
+import math
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy import tuple_
+from sqlalchemy.orm import undefer
+from app.models.database import db, LogEntry, Step, pseudo_code_text, resolve_pseudo_code
+from app.utils.logger import log_function_call
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class QueryParameterError(Exception):
+    """Raised for malformed filters or cursors"""
+    pass
+
+def parse_timestamp(value: Optional[str], name: str) -> Optional[datetime]:
+    """Parse an ISO-8601 filter value; aware values are converted to naive UTC"""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise QueryParameterError(f"{name} must be an ISO-8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def parse_number(value: Optional[str], name: str, kind: type = float, default=None):
+    """Parse a numeric filter value (kind float or int); missing values give default"""
+    if value is None or value == '':
+        return default
+    try:
+        parsed = kind(value)
+    except ValueError:
+        raise QueryParameterError(f"{name} must be {'an integer' if kind is int else 'a number'}")
+    if kind is float and not math.isfinite(parsed):
+        raise QueryParameterError(f"{name} must be a finite number")
+    return parsed
+
+def encode_cursor(timestamp: datetime, entry_id: str) -> str:
+    """Opaque cursor for the position after (timestamp, id)"""
+    raw = json.dumps([timestamp.isoformat(), entry_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str):
+    """Returns: (timestamp, id) encoded by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, entry_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), str(entry_id)
+    except (ValueError, TypeError):
+        raise QueryParameterError("Invalid cursor")
+
+@log_function_call
+def list_logs(model: Optional[str] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None, min_response_time: Optional[float] = None,
+              max_response_time: Optional[float] = None, limit: int = DEFAULT_PAGE_SIZE,
+              cursor: Optional[str] = None) -> Dict:
+    """
+    Page through log entries, newest first, with keyset pagination
+    Each page continues strictly after the (timestamp, id) in the cursor, so
+    its cost does not grow with depth the way OFFSET does. Model and timestamp
+    filters use the composite indexes; response time is filtered on the way.
+    Returns: {"items": [...], "next_cursor": str or None, "limit": int}
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    query = db.session.query(
+        LogEntry.id,
+        LogEntry.model,
+        LogEntry.input_text,
+        LogEntry.response_time,
+        LogEntry.timestamp,
+        LogEntry.created_at
+    )
+    if model is not None:
+        query = query.filter(LogEntry.model == model)
+    if since is not None:
+        query = query.filter(LogEntry.timestamp >= since)
+    if until is not None:
+        query = query.filter(LogEntry.timestamp < until)
+    if min_response_time is not None:
+        query = query.filter(LogEntry.response_time >= min_response_time)
+    if max_response_time is not None:
+        query = query.filter(LogEntry.response_time <= max_response_time)
+    if cursor:
+        after_timestamp, after_id = decode_cursor(cursor)
+        query = query.filter(tuple_(LogEntry.timestamp, LogEntry.id) < (after_timestamp, after_id))
+
+    rows = query.order_by(LogEntry.timestamp.desc(), LogEntry.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
+        {
+            "id": row.id,
+            "model": row.model,
+            "input": row.input_text,
+            "response_time_seconds": row.response_time,
+            "timestamp": row.timestamp.isoformat(),
+            "created_at": row.created_at.isoformat() if row.created_at else None
+        }
+        for row in rows
+    ]
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if has_more else None
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
+
+@log_function_call
+def get_log(entry_id: str) -> Optional[Dict]:
+    """
+    Get one log entry with its steps
+    Returns: the entry as a dict, or None if it does not exist
+    """
+    entry = db.session.get(LogEntry, entry_id)
+    if entry is None:
+        return None
+
+    steps = Step.query.options(undefer(Step.description))\
+        .filter_by(log_entry_id=entry_id).order_by(Step.step_number).all()
+    lines = resolve_pseudo_code([h for step in steps for h in step.pseudo_code_hashes])
+    return {
+        "id": entry.id,
+        "model": entry.model,
+        "input": entry.input_text,
+        "response_time_seconds": entry.response_time,
+        "timestamp": entry.timestamp.isoformat(),
+        "created_at": entry.created_at.isoformat() if entry.created_at else None,
+        "output": {
+            "steps": [
+                {
+                    "step": step.step_number,
+                    "description": step.description,
+                    "pseudoCode": pseudo_code_text(step.pseudo_code_hashes, lines)
+                }
+                for step in steps
+            ]
+        }
+    }
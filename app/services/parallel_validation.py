@@ -0,0 +1,101 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from flask import current_app, has_app_context
+from app.schemas.validators import configure_validator, validate_json_data, validator_backend
+from app.utils.logger import logger
+
+DEFAULT_PARALLEL_THRESHOLD = 5000
+DEFAULT_VALIDATION_CHUNK_SIZE = 1000
+# Never fork: the app process already runs the writer, log listener, error
+# buffer and metrics threads, whose locks a forked child could inherit held
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+def _init_worker(backend: str) -> None:
+    """Pool initializer: use the same validator backend as the parent"""
+    configure_validator(backend)
+
+def _validate_chunk(chunk: List[Dict]) -> List[Tuple]:
+    return [validate_json_data(entry) for entry in chunk]
+
+def get_validation_settings() -> Dict:
+    """
+    Resolve pool settings from the app config
+    VALIDATION_WORKERS: None uses os.cpu_count(); 0 or 1 disables the pool
+    """
+    config = current_app.config if has_app_context() else {}
+    workers = config.get('VALIDATION_WORKERS')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return {
+        "workers": int(workers),
+        "threshold": int(config.get('VALIDATION_PARALLEL_THRESHOLD', DEFAULT_PARALLEL_THRESHOLD)),
+        "chunk_size": max(1, int(config.get('VALIDATION_CHUNK_SIZE', DEFAULT_VALIDATION_CHUNK_SIZE)))
+    }
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the shared validation pool, creating it on first use
+    The pool is rebuilt if the worker count or validator backend changes
+    """
+    global _pool, _pool_key
+    backend = validator_backend()
+    key = (workers, backend)
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(backend,),
+                                        mp_context=multiprocessing.get_context(START_METHOD))
+            _pool_key = key
+        return _pool
+
+def shutdown_pool() -> None:
+    """Stop the shared validation pool, if one was started"""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool, _pool_key = None, None
+
+atexit.register(shutdown_pool)
+
+def validate_in_pool(data_list: List[Dict], workers: int, chunk_size: int = DEFAULT_VALIDATION_CHUNK_SIZE) -> List[Tuple]:
+    """
+    Validate documents across a process pool in order-preserving chunks
+    Returns: [(is_valid, result, errors), ...] in input order
+    """
+    chunks = [data_list[start:start + chunk_size] for start in range(0, len(data_list), chunk_size)]
+    results = []
+    for chunk_results in get_pool(workers).map(_validate_chunk, chunks):
+        results.extend(chunk_results)
+    return results
+
+def validate_documents(data_list: List[Dict], workers: Optional[int] = None,
+                       threshold: Optional[int] = None, chunk_size: Optional[int] = None) -> List[Tuple]:
+    """
+    Validate a list of documents, in parallel when the batch is large enough
+    Batches smaller than the threshold, or a single worker, validate serially
+    in this process; pool failures fall back to serial validation
+    Returns: [(is_valid, result, errors), ...] in input order
+    """
+    settings = get_validation_settings()
+    workers = settings['workers'] if workers is None else workers
+    threshold = settings['threshold'] if threshold is None else threshold
+    chunk_size = settings['chunk_size'] if chunk_size is None else chunk_size
+
+    if workers > 1 and len(data_list) >= threshold:
+        try:
+            return validate_in_pool(data_list, workers, chunk_size)
+        except Exception as e:
+            logger.error(f"Parallel validation failed, validating serially: {str(e)}")
+            shutdown_pool()
+    return [validate_json_data(entry) for entry in data_list]
@@ -0,0 +1,269 @@
+import base64
+import html
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import undefer
+from app.database.writer import run_write
+from app.models.database import db, LogEntry, SearchDocument, Step, pseudo_code_text, resolve_pseudo_code
+from app.services.log_query import QueryParameterError
+from app.utils.logger import log_function_call, logger
+from app.utils.response_cache import LOG_ENTRIES, invalidate_responses
+
+SEARCH_TABLE = 'log_search'
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+REBUILD_CHUNK = 1000
+SNIPPET_CHARS = 160
+HIGHLIGHT = ("<mark>", "</mark>")
+
+# Contentless: the text already lives (compressed) in log_entries, steps and
+# pseudo_code_lines, so the index keeps only its inverted lists. Its rowids
+# are log_search_docs ids, which (unlike log_entries rowids) survive VACUUM.
+SEARCH_TABLE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "input, steps, content='', tokenize=\"unicode61 tokenchars '_'\")"
+)
+
+TERM_PATTERN = re.compile(r'\w+\*?')
+
+def search_enabled() -> bool:
+    """Whether the full-text index exists and is maintained on write"""
+    return has_app_context() and bool(current_app.extensions.get('search_index'))
+
+def create_search_index() -> None:
+    """Create the FTS5 table (inside an app context); raises OperationalError without FTS5"""
+    with db.engine.begin() as connection:
+        connection.execute(text(SEARCH_TABLE_DDL))
+
+def init_search(app: Flask) -> bool:
+    """
+    Enable search when SEARCH_ENABLED is set and the FTS5 index exists
+    (created here when SCHEMA_AUTO_CREATE is set and SQLite supports it)
+    Returns: whether search is available
+    """
+    if not app.config.get('SEARCH_ENABLED', True):
+        return False
+    with app.app_context():
+        if app.config.get('SCHEMA_AUTO_CREATE', True):
+            try:
+                create_search_index()
+            except OperationalError as e:
+                logger.warning(f"Full-text search disabled, FTS5 unavailable: {str(e)}")
+                return False
+        elif not inspect(db.engine).has_table(SEARCH_TABLE):
+            logger.warning("Full-text search disabled, index not created; run `flask db create`")
+            return False
+        indexed = db.session.query(SearchDocument.id).first() is not None
+        if not indexed and db.session.query(LogEntry.id).first() is not None:
+            logger.warning("Search index is empty but log entries exist; run `flask search rebuild`")
+        db.session.remove()
+    app.extensions['search_index'] = True
+    return True
+
+def entry_documents(entries: List[Dict], steps: List[Dict], lines: Dict[int, str]) -> List[Dict]:
+    """Searchable text for staged `log_entries` / `steps` rows"""
+    steps_by_entry = {}
+    for step in sorted(steps, key=lambda step: step['step_number']):
+        parts = steps_by_entry.setdefault(step['log_entry_id'], [])
+        parts.append(step['description'])
+        parts.extend(lines[digest] for digest in step['pseudo_code'])
+    return [
+        {"entry_id": row['id'], "input": row['input_text'], "steps": "\n".join(steps_by_entry.get(row['id'], ()))}
+        for row in entries
+    ]
+
+def index_documents(documents: List[Dict]) -> None:
+    """
+    Add documents to the index inside the caller's write transaction
+    (after its inserts, so the write lock is held); does not commit
+    """
+    if not documents:
+        return
+    first = db.session.execute(text("SELECT coalesce(max(id), 0) + 1 FROM log_search_docs")).scalar()
+    db.session.execute(SearchDocument.__table__.insert(), [
+        {"id": first + offset, "log_entry_id": document['entry_id']}
+        for offset, document in enumerate(documents)
+    ])
+    db.session.execute(
+        text(f"INSERT INTO {SEARCH_TABLE} (rowid, input, steps) VALUES (:rowid, :input, :steps)"),
+        [
+            {"rowid": first + offset, "input": document['input'], "steps": document['steps']}
+            for offset, document in enumerate(documents)
+        ]
+    )
+
+def index_entries(entries: List[Dict], steps: List[Dict], lines: Dict[int, str]) -> None:
+    """Index newly inserted rows when search is enabled (see index_documents)"""
+    if entries and search_enabled():
+        index_documents(entry_documents(entries, steps, lines))
+
+def match_expression(query: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, `word*`
+    matches a prefix; FTS5 operators in the input are treated as words
+    """
+    terms = TERM_PATTERN.findall(query or '')
+    if not terms:
+        raise QueryParameterError("q must contain at least one word")
+    return " ".join(
+        f'"{term[:-1]}"*' if term.endswith('*') else f'"{term}"'
+        for term in terms
+    )
+
+def _encode_cursor(rank: float, rowid: int) -> str:
+    raw = json.dumps([rank, rowid], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, rowid = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), int(rowid)
+    except (ValueError, TypeError):
+        raise QueryParameterError("Invalid cursor")
+
+def snippet(value: str, terms: Iterable[str], width: int = SNIPPET_CHARS) -> Optional[str]:
+    """
+    Window of `value` around the first matching term, with matches highlighted
+    The text is HTML-escaped, so the snippet is safe to render as markup
+    """
+    if not value:
+        return None
+    patterns = [
+        re.escape(term[:-1]) + r'\w*' if term.endswith('*') else re.escape(term) + r'\b'
+        for term in terms
+    ]
+    matcher = re.compile(r'\b(?:' + '|'.join(patterns) + ')', re.IGNORECASE)
+    first = matcher.search(value)
+    if first is None:
+        return None
+    start = max(0, first.start() - width // 3)
+    end = min(len(value), start + width)
+    parts = []
+    position = start
+    for match in matcher.finditer(value, start, end):
+        parts.append(html.escape(value[position:match.start()]))
+        parts.append(f"{HIGHLIGHT[0]}{html.escape(match.group(0))}{HIGHLIGHT[1]}")
+        position = match.end()
+    parts.append(html.escape(value[position:end]))
+    window = ''.join(parts)
+    return ("…" if start else "") + window + ("…" if end < len(value) else "")
+
+def _step_text(entry_ids: List[str]) -> Dict[str, str]:
+    steps = Step.query.options(undefer(Step.description))\
+        .filter(Step.log_entry_id.in_(entry_ids)).order_by(Step.step_number).all()
+    lines = resolve_pseudo_code([h for step in steps for h in step.pseudo_code_hashes])
+    parts = {}
+    for step in steps:
+        parts.setdefault(step.log_entry_id, []).append(step.description)
+        parts[step.log_entry_id].extend(pseudo_code_text(step.pseudo_code_hashes, lines))
+    return {entry_id: "\n".join(values) for entry_id, values in parts.items()}
+
+@log_function_call
+def search_logs(query: str, model: Optional[str] = None, limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+                cursor: Optional[str] = None) -> Dict:
+    """
+    Ranked full-text search over prompts and steps (BM25, best first)
+    Pages continue after the (rank, rowid) in the cursor; snippets are cut
+    from the decompressed text of the entries on the page only
+    Returns: {"items": [...], "next_cursor": str or None, "limit": int}
+    """
+    limit = max(1, min(int(limit), MAX_SEARCH_PAGE_SIZE))
+    expression = match_expression(query)
+    sql = (
+        f"SELECT d.log_entry_id, s.rank, s.rowid FROM {SEARCH_TABLE} s "
+        "JOIN log_search_docs d ON d.id = s.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH :expression"
+    )
+    params = {"expression": expression, "limit": limit + 1}
+    if model is not None:
+        sql += " AND d.log_entry_id IN (SELECT id FROM log_entries WHERE model = :model)"
+        params["model"] = model
+    if cursor:
+        params["after_rank"], params["after_rowid"] = _decode_cursor(cursor)
+        sql += " AND (s.rank > :after_rank OR (s.rank = :after_rank AND s.rowid > :after_rowid))"
+    sql += " ORDER BY s.rank, s.rowid LIMIT :limit"
+    try:
+        rows = db.session.execute(text(sql), params).all()
+    except OperationalError as e:
+        raise QueryParameterError(f"Invalid search query: {str(e.orig)}")
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    entry_ids = [row.log_entry_id for row in rows]
+    entries = {
+        entry.id: entry
+        for entry in db.session.query(LogEntry.id, LogEntry.model, LogEntry.timestamp, LogEntry.input_text)
+        .filter(LogEntry.id.in_(entry_ids))
+    }
+    step_text = _step_text(entry_ids)
+    terms = TERM_PATTERN.findall(query)
+    items = [
+        {
+            "id": row.log_entry_id,
+            "model": entries[row.log_entry_id].model,
+            "timestamp": entries[row.log_entry_id].timestamp.isoformat(),
+            "score": -row.rank,
+            "input_snippet": snippet(entries[row.log_entry_id].input_text, terms),
+            "steps_snippet": snippet(step_text.get(row.log_entry_id), terms)
+        }
+        for row in rows
+    ]
+    next_cursor = _encode_cursor(rows[-1].rank, rows[-1].rowid) if has_more else None
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
+
+def _reset_index() -> None:
+    try:
+        db.session.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('delete-all')"))
+        db.session.execute(SearchDocument.__table__.delete())
+        db.session.commit()
+        invalidate_responses(LOG_ENTRIES)
+    except Exception:
+        db.session.rollback()
+        raise
+
+def _index_chunk(documents: List[Dict]) -> None:
+    try:
+        # Entries written since the reset were already indexed by their writer
+        indexed = {
+            entry_id for entry_id, in db.session.query(SearchDocument.log_entry_id)
+            .filter(SearchDocument.log_entry_id.in_([document['entry_id'] for document in documents]))
+        }
+        index_documents([document for document in documents if document['entry_id'] not in indexed])
+        db.session.commit()
+        invalidate_responses(LOG_ENTRIES)
+    except Exception:
+        db.session.rollback()
+        raise
+
+@log_function_call
+def rebuild_search_index(chunk_size: int = REBUILD_CHUNK) -> int:
+    """
+    Re-index every log entry, in transactions of `chunk_size` entries
+    Returns: number of entries indexed
+    """
+    run_write(_reset_index)
+    indexed = 0
+    after = None
+    while True:
+        query = db.session.query(LogEntry.id, LogEntry.input_text).order_by(LogEntry.id)
+        if after is not None:
+            query = query.filter(LogEntry.id > after)
+        entries = query.limit(chunk_size).all()
+        if not entries:
+            break
+        after = entries[-1].id
+        entry_ids = [entry.id for entry in entries]
+        step_text = _step_text(entry_ids)
+        db.session.rollback()  # end the read transaction before the writer inserts
+        run_write(_index_chunk, [
+            {"entry_id": entry.id, "input": entry.input_text, "steps": step_text.get(entry.id, "")}
+            for entry in entries
+        ])
+        indexed += len(entries)
+    logger.info(f"Indexed {indexed} log entries for search")
+    return indexed
@@ -0,0 +1,129 @@
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import Table, text
+from app.database.compression import (
+    CompressedText,
+    compress_text,
+    decompress_text,
+    train_dictionary
+)
+from app.database.writer import run_write
+from app.models.database import db, CompressionDictionary, load_compression_settings
+from app.utils.logger import log_function_call, logger
+
+DEFAULT_MIGRATION_CHUNK = 1000
+DEFAULT_SAMPLE_SIZE = 2000
+
+def compressed_columns() -> List[Tuple[Table, str]]:
+    """Every (table, column name) declared as CompressedText"""
+    return [
+        (table, column.name)
+        for table in db.metadata.sorted_tables
+        for column in table.columns
+        if isinstance(column.type, CompressedText)
+    ]
+
+@log_function_call
+def train_and_store_dictionary(sample_size: int = DEFAULT_SAMPLE_SIZE) -> Optional[int]:
+    """
+    Train a dictionary from the newest rows of every compressed column and
+    make it the one new values are written with
+    Returns: the new dictionary id, or None when there is nothing to sample
+    """
+    samples = []
+    for table, column in compressed_columns():
+        rows = db.session.execute(text(
+            f'SELECT "{column}" FROM "{table.name}" ORDER BY rowid DESC LIMIT :limit'
+        ), {"limit": sample_size})
+        samples.extend(decompress_text(value) for value, in rows)
+    db.session.rollback()
+    data = train_dictionary(sample for sample in samples if sample)
+    if not data:
+        return None
+
+    dictionary = run_write(_store_dictionary, data, len(samples))
+    load_compression_settings(current_app.config)
+    logger.info(f"Trained compression dictionary {dictionary} ({len(data)} bytes) from {len(samples)} samples")
+    return dictionary
+
+def _store_dictionary(data: bytes, sample_count: int) -> int:
+    try:
+        dictionary = CompressionDictionary(data=data, sample_count=sample_count)
+        db.session.add(dictionary)
+        db.session.commit()
+        return dictionary.id
+    except Exception:
+        db.session.rollback()
+        raise
+
+def _update_values(table_name: str, column: str, updates: List[Dict]) -> None:
+    try:
+        db.session.execute(
+            text(f'UPDATE "{table_name}" SET "{column}" = :value WHERE rowid = :row'),
+            updates
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+@log_function_call
+def compress_existing_rows(chunk_size: int = DEFAULT_MIGRATION_CHUNK, recompress: bool = False) -> Dict[str, int]:
+    """
+    Rewrite stored plain-text values of the compressed columns in their
+    compressed form, in transactions of at most `chunk_size` rows
+    With recompress, already compressed values are rewritten too (e.g. with
+    a newly trained dictionary)
+    Returns: {"table.column": rows rewritten}
+    """
+    rewritten = {}
+    for table, column in compressed_columns():
+        key = f"{table.name}.{column}"
+        rewritten[key] = 0
+        after = 0
+        while True:
+            rows = db.session.execute(text(
+                f'SELECT rowid, "{column}" FROM "{table.name}" WHERE rowid > :after ORDER BY rowid LIMIT :limit'
+            ), {"after": after, "limit": chunk_size}).all()
+            db.session.rollback()  # end the read transaction before the writer updates
+            if not rows:
+                break
+            after = rows[-1][0]
+            updates = []
+            for row, value in rows:
+                if value is None or (not isinstance(value, str) and not recompress):
+                    continue
+                stored = compress_text(decompress_text(value))
+                if stored != value:
+                    updates.append({"row": row, "value": stored})
+            if updates:
+                run_write(_update_values, table.name, column, updates)
+                rewritten[key] += len(updates)
+        logger.info(f"Compressed {rewritten[key]} values of {key}")
+    return rewritten
+
+@log_function_call
+def compression_report() -> Dict:
+    """
+    Stored size of every compressed column and of the database file
+    Returns: {"columns": {"table.column": {...}}, "database_bytes": int}
+    """
+    columns = {}
+    for table, column in compressed_columns():
+        rows, compressed, stored = db.session.execute(text(
+            f'SELECT count(*), sum(typeof("{column}") = \'blob\'), '
+            f'coalesce(sum(length(CAST("{column}" AS BLOB))), 0) FROM "{table.name}"'
+        )).one()
+        columns[f"{table.name}.{column}"] = {
+            "rows": rows,
+            "compressed_rows": compressed or 0,
+            "stored_bytes": stored
+        }
+    page_count = db.session.execute(text("PRAGMA page_count")).scalar()
+    page_size = db.session.execute(text("PRAGMA page_size")).scalar()
+    freelist = db.session.execute(text("PRAGMA freelist_count")).scalar()
+    return {
+        "columns": columns,
+        "database_bytes": page_count * page_size,
+        "free_bytes": freelist * page_size
+    }
@@ -0,0 +1,280 @@
+import atexit
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from flask import Flask, current_app
+from app.database.writer import WriteTimeoutError
+from app.models.database import find_entries_by_hash
+from app.services.batch_ingest import ChunkRows, write_rows
+from app.utils.logger import logger
+from app.utils.metrics import WRITE_QUEUE_DEPTH
+
+class QueueFullError(Exception):
+    """Raised when the write-behind queue cannot take more work"""
+    pass
+
+class IngestJob:
+    """Progress of documents accepted for asynchronous writing"""
+
+    def __init__(self, total: int, accepted: int, rejected: int):
+        self.id = str(uuid.uuid4())
+        self.status = "queued"
+        self.total = total
+        self.accepted = accepted
+        self.rejected = rejected
+        self.written = 0
+        self.failed = 0
+        self.unknown = 0
+        self.duplicates = 0
+        # {staged entry id: stored or queued entry id} for entries dropped at submit
+        self.duplicate_of = {}
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.completed_at = None
+        self.pending_items = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total_received": self.total,
+            "accepted": self.accepted,
+            "validation_failed": self.rejected,
+            "written": self.written,
+            "write_failed": self.failed,
+            "write_unknown": self.unknown,
+            "duplicates": self.duplicates,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue drained by a single background writer
+
+    Request threads submit staged rows and return immediately. The writer
+    waits up to `flush_interval` seconds to coalesce queued items into one
+    transaction of at most `max_batch_size` documents. If a coalesced
+    transaction fails, its items are retried one by one so a bad item only
+    fails its own job. A write that timed out may still commit, so it is
+    not retried; its entries are reported as write_unknown.
+
+    Entries with a content hash (IDEMPOTENCY_ENABLED) are tracked from
+    submit until their write finishes, so a duplicate submitted meanwhile
+    is answered with the id that is actually written.
+    """
+
+    def __init__(self, app: Flask, max_depth: int = 1000, flush_interval: float = 0.5,
+                 max_batch_size: int = 5000, max_jobs: int = 10000):
+        self.app = app
+        self.max_depth = max_depth
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self._in_flight: Dict[str, str] = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting work, drain everything queued and join the writer"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, rows: ChunkRows, total: int, accepted: int, rejected: int,
+               duplicates: int = 0) -> IngestJob:
+        """
+        Enqueue staged rows as a new job, all or nothing
+        `duplicates` counts documents the caller already folded into others.
+        Entries whose content hash is queued or already stored are dropped and
+        listed in job.duplicate_of; rows larger than max_batch_size are split
+        so they still coalesce
+        Raises QueueFullError when the queue is stopping or would exceed max_depth
+        """
+        job = IngestJob(total, accepted, rejected)
+        with self._lock:
+            if self._stopping.is_set():
+                raise QueueFullError("Write queue is shutting down")
+            job.duplicate_of = self._drop_duplicates(rows)
+            items = self._split(rows)
+            if self._queue.qsize() + len(items) > self.max_depth:
+                raise QueueFullError("Write queue is full")
+            job.duplicates = duplicates + len(job.duplicate_of)
+            job.pending_items = len(items)
+            if not items:
+                job.status = "completed"
+                job.completed_at = datetime.utcnow()
+            for row in rows.entries:
+                if row['content_hash']:
+                    self._in_flight[row['content_hash']] = row['id']
+            self._remember(job)
+            for item in items:
+                self._queue.put_nowait((job, item))
+            WRITE_QUEUE_DEPTH.set(self._queue.qsize())
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _remember(self, job: IngestJob) -> None:
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_jobs:
+            self.jobs.popitem(last=False)
+
+    def _drop_duplicates(self, rows: ChunkRows) -> Dict[str, str]:
+        """
+        Remove entries whose hash is in flight or stored; called with the lock
+        held, so a write cannot finish between the two lookups
+        Returns: {staged entry id: id of the entry that is or will be stored}
+        """
+        staged = {row['content_hash']: row['id'] for row in rows.entries if row['content_hash']}
+        if not staged:
+            return {}
+        known = {digest: self._in_flight[digest] for digest in staged if digest in self._in_flight}
+        known.update(find_entries_by_hash([digest for digest in staged if digest not in known]))
+        if not known:
+            return {}
+        dropped = {staged[digest]: entry_id for digest, entry_id in known.items()}
+        rows.entries = [row for row in rows.entries if row['id'] not in dropped]
+        rows.steps = [step for step in rows.steps if step['log_entry_id'] not in dropped]
+        return dropped
+
+    def _split(self, rows: ChunkRows) -> List[ChunkRows]:
+        if len(rows) <= self.max_batch_size:
+            return [rows] if rows else []
+        items = []
+        steps_by_entry = {}
+        for step in rows.steps:
+            steps_by_entry.setdefault(step['log_entry_id'], []).append(step)
+        documents = [('entry', row) for row in rows.entries] + [('error', row) for row in rows.errors]
+        for start in range(0, len(documents), self.max_batch_size):
+            item = ChunkRows()
+            for kind, row in documents[start:start + self.max_batch_size]:
+                if kind == 'error':
+                    item.errors.append(row)
+                    continue
+                item.entries.append(row)
+                for step in steps_by_entry.get(row['id'], []):
+                    item.steps.append(step)
+                    for digest in step['pseudo_code']:
+                        item.lines[digest] = rows.lines[digest]
+            items.append(item)
+        return items
+
+    def _next_batch(self) -> List:
+        """Block for the first item, then coalesce until full or the interval passes"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        size = len(first[1])
+        deadline = time.monotonic() + self.flush_interval
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self._stopping.is_set():
+                break
+            try:
+                item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[1])
+        return batch
+
+    def _run(self) -> None:
+        with self.app.app_context():
+            while True:
+                batch = self._next_batch()
+                WRITE_QUEUE_DEPTH.set(self._queue.qsize())
+                if batch:
+                    self._write(batch)
+                elif self._stopping.is_set() and self._queue.empty():
+                    return
+
+    def _write(self, batch: List) -> None:
+        for job, _ in batch:
+            if job.status == "queued":
+                job.status = "writing"
+
+        rows = ChunkRows()
+        for _, item in batch:
+            rows.extend(item)
+        try:
+            duplicates = write_rows(rows)
+            for job, item in batch:
+                self._finish_item(job, item, None, duplicates)
+        except WriteTimeoutError as e:
+            logger.error(f"Write-behind batch of {len(rows)} documents timed out and may still commit: {str(e)}")
+            for job, item in batch:
+                self._finish_item(job, item, str(e), unknown=True)
+        except Exception as e:
+            # The transaction rolled back, so each item can safely be written again
+            logger.error(f"Write-behind batch of {len(rows)} documents failed, retrying per job: {str(e)}")
+            for job, item in batch:
+                try:
+                    duplicates = write_rows(item)
+                    self._finish_item(job, item, None, duplicates)
+                except WriteTimeoutError as item_error:
+                    self._finish_item(job, item, str(item_error), unknown=True)
+                except Exception as item_error:
+                    self._finish_item(job, item, str(item_error))
+
+    def _finish_item(self, job: IngestJob, item: ChunkRows, error: Optional[str],
+                     duplicates: Optional[Dict[str, str]] = None, unknown: bool = False) -> None:
+        with self._lock:
+            for row in item.entries:
+                if row['content_hash'] and self._in_flight.get(row['content_hash']) == row['id']:
+                    del self._in_flight[row['content_hash']]
+            if error is None:
+                skipped = sum(1 for row in item.entries if row['id'] in duplicates) if duplicates else 0
+                job.written += len(item.entries) - skipped
+                job.duplicates += skipped
+            elif unknown:
+                job.unknown += len(item.entries)
+                job.error = error
+            else:
+                job.failed += len(item.entries)
+                job.error = error
+            job.pending_items -= 1
+            if job.pending_items == 0:
+                job.status = "failed" if job.failed else "unknown" if job.unknown else "completed"
+                job.completed_at = datetime.utcnow()
+
+def init_write_queue(app: Flask) -> Optional[WriteBehindQueue]:
+    """Start the write-behind queue when ASYNC_INGEST_ENABLED is set"""
+    if not app.config.get('ASYNC_INGEST_ENABLED'):
+        return None
+    write_queue = WriteBehindQueue(
+        app,
+        max_depth=app.config.get('ASYNC_QUEUE_MAX_DEPTH', 1000),
+        flush_interval=app.config.get('ASYNC_FLUSH_INTERVAL', 0.5),
+        max_batch_size=app.config.get('ASYNC_MAX_BATCH_SIZE', 5000)
+    )
+    write_queue.start()
+    atexit.register(write_queue.stop)
+    app.extensions['write_queue'] = write_queue
+    return write_queue
+
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """The current app's write-behind queue, or None in synchronous mode"""
+    return current_app.extensions.get('write_queue')
@@ -1,83 +1,116 @@
-from apispec import APISpec
-from apispec.ext.marshmallow import MarshmallowPlugin
-from apispec_webframeworks.flask import FlaskPlugin
-from app.schemas.validators import LogEntrySchema, OutputSchema, StepSchema
+import threading
 
-# Create APISpec
-spec = APISpec(
-    title="JSON Log Processor API",
-    version="1.0.0",
-    openapi_version="3.0.2",
-    plugins=[FlaskPlugin(), MarshmallowPlugin()],
-    info={
-        "description": "API for processing and validating JSON logs",
-        "contact": {"email": "support@example.com"}
-    },
-    servers=[
-        {
-            "url": "/",
-            "description": "Development server"
-        }
-    ],
-    tags=[
-        {"name": "logs", "description": "Log processing operations"},
-        {"name": "validation", "description": "Validation operations"},
-        {"name": "monitoring", "description": "Monitoring and statistics"}
-    ]
-)
+API_ENDPOINT_PREFIX = 'api.'  # blueprint whose routes are documented
+
+_spec = None
+_spec_lock = threading.Lock()
+
+def build_apispec(app=None):
+    """
+    Build the OpenAPI spec, with a path for every API route of `app`
+    (operations come from the YAML after `---` in each view's docstring)
+    apispec, its plugins (which pull in PyYAML) and the marshmallow schemas
+    are imported here rather than at module level so they cost nothing
+    until the spec is first requested
+    """
+    from apispec import APISpec
+    from apispec.ext.marshmallow import MarshmallowPlugin
+    from apispec_webframeworks.flask import FlaskPlugin
+    from app.schemas.validators import LogEntrySchema, OutputSchema, StepSchema
+
+    # Create APISpec
+    spec = APISpec(
+        title="JSON Log Processor API",
+        version="1.0.0",
+        openapi_version="3.0.2",
+        plugins=[FlaskPlugin(), MarshmallowPlugin()],
+        info={
+            "description": "API for processing and validating JSON logs",
+            "contact": {"email": "support@example.com"}
+        },
+        servers=[
+            {
+                "url": "/",
+                "description": "Development server"
+            }
+        ],
+        tags=[
+            {"name": "logs", "description": "Log processing operations"},
+            {"name": "validation", "description": "Validation operations"},
+            {"name": "monitoring", "description": "Monitoring and statistics"}
+        ]
+    )
 
-# Register schemas with unique names and only once
-if "LogEntrySchema" not in spec.components.schemas:
-    spec.components.schema("LogEntrySchema", schema=LogEntrySchema)
-if "OutputContentSchema" not in spec.components.schemas:
-    spec.components.schema("OutputContentSchema", schema=OutputSchema)
-if "StepContentSchema" not in spec.components.schemas:
-    spec.components.schema("StepContentSchema", schema=StepSchema)
+    # Register schemas with unique names and only once
+    if "LogEntrySchema" not in spec.components.schemas:
+        spec.components.schema("LogEntrySchema", schema=LogEntrySchema)
+    if "OutputContentSchema" not in spec.components.schemas:
+        spec.components.schema("OutputContentSchema", schema=OutputSchema)
+    if "StepContentSchema" not in spec.components.schemas:
+        spec.components.schema("StepContentSchema", schema=StepSchema)
 
-# Add basic security schemes
-spec.components.security_scheme("ApiKeyAuth", {
-    "type": "apiKey",
-    "in": "header",
-    "name": "X-API-Key"
-})
+    # Add basic security schemes
+    spec.components.security_scheme("ApiKeyAuth", {
+        "type": "apiKey",
+        "in": "header",
+        "name": "X-API-Key"
+    })
 
-# Define common responses
-spec.components.response("ErrorResponse", {
-    "description": "Error response",
-    "content": {
-        "application/json": {
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "error": {"type": "string"},
-                    "detail": {"type": "string"}
+    # Define common responses
+    spec.components.response("ErrorResponse", {
+        "description": "Error response",
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "error": {"type": "string"},
+                        "detail": {"type": "string"}
+                    }
                 }
             }
         }
-    }
-})
+    })
 
-# Define common parameters
-spec.components.parameter("limit", {
-    "in": "query",
-    "name": "limit",
-    "schema": {"type": "integer", "default": 100},
-    "description": "Maximum number of records to return"
-})
+    # Define common parameters
+    spec.components.parameter("limit", "query", {
+        "schema": {"type": "integer", "default": 100},
+        "description": "Maximum number of records to return"
+    })
 
-# Define request bodies
-spec.components.schema(
-    "BatchRequest",
-    {
-        "type": "array",
-        "items": {"$ref": "#/components/schemas/LogEntrySchema"}
-    }
-)
+    # Define request bodies
+    spec.components.schema(
+        "BatchRequest",
+        {
+            "type": "array",
+            "items": {"$ref": "#/components/schemas/LogEntrySchema"}
+        }
+    )
 
-def get_apispec():
-    """Get the APISpec object"""
+    if app is not None:
+        with app.test_request_context():
+            for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+                if rule.endpoint.startswith(API_ENDPOINT_PREFIX):
+                    spec.path(view=app.view_functions[rule.endpoint], app=app)
     return spec
 
+def get_apispec(app=None):
+    """Get the APISpec object (with `app`'s API paths), built once per app on first use"""
+    global _spec
+    if app is not None:
+        spec = app.extensions.get('apispec')
+        if spec is None:
+            with _spec_lock:
+                spec = app.extensions.get('apispec')
+                if spec is None:
+                    spec = app.extensions['apispec'] = build_apispec(app)
+        return spec
+    if _spec is None:
+        with _spec_lock:
+            if _spec is None:
+                _spec = build_apispec()
+    return _spec
+
 def get_swagger_config():
     """Get Swagger UI configuration"""
     return {
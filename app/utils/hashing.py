@@ -0,0 +1,25 @@
+import hashlib
+import json
+
+def line_hash(text: str) -> int:
+    """
+    64-bit content address for a line of text
+    Returned as a signed integer so SQLite can use it as an INTEGER PRIMARY KEY
+    """
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def content_hash(data) -> str:
+    """
+    128-bit hex digest of a JSON document in canonical form
+    (sorted keys, no insignificant whitespace), so equal documents hash equally
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+def idempotency_key_hash(key: str) -> str:
+    """
+    Digest of a client-supplied Idempotency-Key, in the same column as content
+    hashes; the prefix keeps the two namespaces apart
+    """
+    return hashlib.blake2b(f"idempotency-key:{key}".encode('utf-8'), digest_size=16).hexdigest()
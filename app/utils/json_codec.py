@@ -0,0 +1,125 @@
+import dataclasses
+import decimal
+import json
+import os
+import re
+import uuid
+from datetime import date
+from typing import IO, Any, Optional
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError  # orjson's decode error subclasses it
+CODECS = ('auto', 'orjson', 'stdlib')
+# orjson reads integers outside [-2**63, 2**64) as floats; any run of 19+
+# digits may be one, so such input is parsed with the stdlib instead
+_LONG_DIGITS = re.compile(r'\d{19}')
+_LONG_DIGITS_BYTES = re.compile(rb'\d{19}')
+
+class JSONCodecError(Exception):
+    """Raised for an unknown or unavailable codec name"""
+    pass
+
+_active = {"name": "stdlib"}
+
+def configure_json_codec(name: Optional[str] = None) -> str:
+    """
+    Select the codec: 'orjson', 'stdlib' or 'auto' (orjson when installed)
+    Defaults to the JSON_CODEC environment variable, then 'auto'
+    Returns: the name of the codec now in use
+    """
+    name = (name or os.environ.get('JSON_CODEC') or 'auto').lower()
+    if name not in CODECS:
+        raise JSONCodecError(f"Unknown JSON codec {name!r}; use one of {', '.join(CODECS)}")
+    if name == 'orjson' and orjson is None:
+        raise JSONCodecError("JSON_CODEC is 'orjson' but orjson is not installed")
+    _active["name"] = 'orjson' if name in ('auto', 'orjson') and orjson is not None else 'stdlib'
+    return _active["name"]
+
+def codec_name() -> str:
+    return _active["name"]
+
+def default(o: Any) -> Any:
+    """Types beyond plain JSON, serialized the way Flask's default provider does"""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def _orjson_options(sort_keys: bool, indent: bool) -> int:
+    # Datetimes go through default() so they render exactly as before
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    if indent:
+        options |= orjson.OPT_INDENT_2
+    return options
+
+def loads(data) -> Any:
+    """
+    Parse JSON text or UTF-8 bytes
+    Input orjson rejects but the stdlib accepts (NaN, Infinity) is retried
+    with the stdlib, which also produces the error message. Input with
+    integers orjson would turn into floats goes straight to the stdlib.
+    """
+    long_digits = _LONG_DIGITS if isinstance(data, str) else _LONG_DIGITS_BYTES
+    if _active["name"] == 'orjson' and not long_digits.search(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+def load(fp: IO) -> Any:
+    return loads(fp.read())
+
+def dumps_bytes(obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 bytes (no escaping of non-ASCII characters)"""
+    if _active["name"] == 'orjson':
+        try:
+            return orjson.dumps(obj, default=default, option=_orjson_options(sort_keys, indent))
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                      indent=2 if indent else None,
+                      separators=None if indent else (',', ':')).encode('utf-8')
+
+def dumps(obj: Any, sort_keys: bool = False, indent: bool = False) -> str:
+    return dumps_bytes(obj, sort_keys, indent).decode('utf-8')
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by the configured codec, so jsonify,
+    request.json and app.json all share it. Keeps Flask's sort_keys and
+    debug indentation behaviour; non-ASCII text is sent as UTF-8 rather
+    than \\u escapes.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Explicit json.dumps options (cls, separators, ...) keep the stdlib
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+configure_json_codec()
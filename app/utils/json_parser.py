@@ -2,6 +2,7 @@ import json
 from typing import Dict, Any, List, Tuple
 from datetime import datetime
 import logging
+from . import json_codec
 from ..models.pydantic import LogEntry, OutputContent, PseudoCodeStep
 
 logger = logging.getLogger(__name__)
@@ -62,8 +63,8 @@ def process_json_file(file_path: str) -> List[Dict[str, Any]]:
     Returns list of validated entries
     """
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = json_codec.load(f)
             
         # Handle both single entry and array of entries
         entries = data if isinstance(data, list) else [data]
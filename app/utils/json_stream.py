@@ -0,0 +1,196 @@
+import codecs
+import gzip
+import io
+import json
+import re
+import zipfile
+from typing import IO, Iterator, Optional, Tuple
+from app.utils import json_codec
+
+READ_BUFFER_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def buffered(stream: IO[bytes], buffer_size: int = READ_BUFFER_SIZE) -> IO[bytes]:
+    """Wrap raw streams so readline() does not fall back to byte-at-a-time reads"""
+    if isinstance(stream, io.RawIOBase):
+        return io.BufferedReader(stream, buffer_size=buffer_size)
+    return stream
+
+def iter_ndjson(stream: IO[bytes], max_line_bytes: Optional[int] = None) -> Iterator[Tuple[int, object, Optional[str]]]:
+    """
+    Incrementally parse a newline-delimited JSON byte stream
+    Yields: (line_number, document, error) for every non-blank line;
+    document is None and error holds a message when a line cannot be parsed
+    """
+    stream = buffered(stream)
+    line_number = 0
+
+    while True:
+        line = stream.readline(max_line_bytes + 1) if max_line_bytes else stream.readline()
+        if not line:
+            break
+        line_number += 1
+
+        if max_line_bytes and len(line) > max_line_bytes:
+            # Skip the rest of the oversized line without holding it in memory
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes)
+            yield line_number, None, f"Line exceeds {max_line_bytes} bytes"
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, json_codec.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON format: {str(e)}"
+
+# A syntax error this close to the end of what has been read may be a token
+# (literal, number, escape) cut by the read boundary; anything earlier is final
+TRUNCATED_TOKEN_CHARS = 16
+
+def _may_need_more_input(error: json.JSONDecodeError, buffer_length: int) -> bool:
+    """Whether a decode error could go away once more input is read"""
+    # An unterminated string always runs to the end of the buffer
+    return error.msg.startswith('Unterminated string') or buffer_length - error.pos <= TRUNCATED_TOKEN_CHARS
+
+def iter_json_array(stream: IO[bytes], read_size: int = READ_BUFFER_SIZE) -> Iterator[Tuple[int, object, Optional[str]]]:
+    """
+    Incrementally parse a JSON document whose top level may be an array
+    Array elements are decoded one at a time; any other top-level value is
+    yielded as a single document
+    Yields: (index, document, error); a syntax error ends the iteration
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    pos = 0
+    offset = 0  # characters already dropped from the front of the buffer
+    eof = False
+
+    def fill(size=read_size):
+        nonlocal buffer, pos, offset, eof
+        offset += pos
+        chunk = stream.read(size)
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + text_decoder.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            match = _WHITESPACE.match(buffer, pos)
+            pos = match.end()
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    try:
+        skip_whitespace()
+        if pos >= len(buffer):
+            yield 0, None, "Invalid JSON format: empty document"
+            return
+
+        if buffer[pos] != '[':
+            # Not an array: the document itself is the single entry
+            while not eof:
+                fill()
+            yield 0, json.loads(buffer), None
+            return
+
+        pos += 1
+        index = 0
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        while True:
+            skip_whitespace()
+            # Decode the next element, reading more input while it is incomplete;
+            # reads grow geometrically so a huge element is not re-parsed per block
+            size = read_size
+            while True:
+                try:
+                    document, end = decoder.raw_decode(buffer, pos)
+                    if end < len(buffer) or eof:
+                        break
+                except json.JSONDecodeError as e:
+                    if eof or not _may_need_more_input(e, len(buffer)):
+                        raise
+                fill(size)
+                size *= 2
+            pos = end
+            yield index, document, None
+            index += 1
+
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            if buffer[pos] == ']':
+                return
+            if buffer[pos] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+    except json.JSONDecodeError as e:
+        yield -1, None, f"Invalid JSON format: {e.msg} (char {offset + e.pos})"
+    except ValueError as e:
+        yield -1, None, f"Invalid JSON format: {str(e)}"
+
+UPLOAD_FORMATS = ('.json.gz', '.ndjson.gz', '.json', '.ndjson', '.zip')
+
+def upload_format(filename: str) -> Optional[str]:
+    """Return the supported suffix of an uploaded file name, or None"""
+    name = filename.lower()
+    for suffix in UPLOAD_FORMATS:
+        if name.endswith(suffix):
+            return suffix
+    return None
+
+def starts_with_array(stream: IO[bytes]) -> bool:
+    """Peek whether a seekable JSON stream holds a top-level array, then rewind"""
+    try:
+        while True:
+            chunk = stream.read(1024)
+            if not chunk:
+                return False
+            stripped = chunk.lstrip(b' \t\r\n\xef\xbb\xbf')
+            if stripped:
+                return stripped[:1] == b'['
+    finally:
+        stream.seek(0)
+
+def iter_file_documents(stream: IO[bytes], filename: str,
+                        max_line_bytes: Optional[int] = None) -> Iterator[Tuple[str, int, object, Optional[str]]]:
+    """
+    Incrementally yield the documents of an uploaded file
+    Handles .json and .ndjson, their .gz variants and .zip bundles of them;
+    archives are decompressed as they are read
+    Yields: (source_name, position, document, error)
+    """
+    fmt = upload_format(filename)
+    try:
+        if fmt == '.zip':
+            with zipfile.ZipFile(stream) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or upload_format(member.filename) in (None, '.zip'):
+                        continue
+                    with archive.open(member) as member_stream:
+                        yield from iter_file_documents(member_stream, member.filename, max_line_bytes)
+            return
+
+        if fmt.endswith('.gz'):
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+        if fmt.startswith('.ndjson'):
+            documents = iter_ndjson(stream, max_line_bytes)
+        else:
+            documents = iter_json_array(stream)
+
+        for position, document, error in documents:
+            yield filename, position, document, error
+    except (OSError, EOFError, zipfile.BadZipFile) as e:
+        yield filename, -1, None, f"Invalid archive: {str(e)}"
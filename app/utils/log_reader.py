@@ -0,0 +1,105 @@
+import gzip
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+READ_BLOCK_SIZE = 64 * 1024
+
+LINE_PATTERN = re.compile(
+    r'^(?P<timestamp>.*?) - (?P<name>.*?) - \[(?P<function>.*?)\] - (?P<level>[A-Z]+) - (?P<message>.*)$'
+)
+
+def parse_log_line(line: str) -> Dict:
+    """Split a formatted log line into its fields; unparsed lines keep only the message"""
+    match = LINE_PATTERN.match(line)
+    if match:
+        return match.groupdict()
+    return {"timestamp": None, "name": None, "function": None, "level": None, "message": line}
+
+def list_log_files(log_file) -> List[Dict]:
+    """The active log file followed by its archives, newest first"""
+    base = Path(log_file)
+    files = []
+    if base.exists():
+        files.append(base)
+    files.extend(sorted(base.parent.glob(f"{base.name}.*.gz"), key=os.path.getmtime, reverse=True))
+    return [{"name": path.name, "size": path.stat().st_size} for path in files]
+
+def _matches(entry: Dict, level: Optional[str], function: Optional[str]) -> bool:
+    if level and entry['level'] != level:
+        return False
+    if function and entry['function'] != function:
+        return False
+    return True
+
+def _iter_lines_backwards(path, end: int, block_size: int):
+    """Yield (start_offset, line_bytes) walking backwards from byte offset end"""
+    with open(path, 'rb') as f:
+        position = end
+        carry = b''
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size) + carry
+            lines = block.split(b'\n')
+            carry = lines.pop(0)  # may continue in the previous block
+            offset = position + len(carry) + 1
+            starts = []
+            for line in lines:
+                starts.append((offset, line))
+                offset += len(line) + 1
+            for start, line in reversed(starts):
+                if line:
+                    yield start, line
+        if carry:
+            yield 0, carry
+
+def read_page(path, before: Optional[int] = None, limit: int = 200, level: Optional[str] = None,
+              function: Optional[str] = None, block_size: int = READ_BLOCK_SIZE) -> Dict:
+    """
+    Read up to `limit` matching lines ending before byte offset `before`, newest first
+    Plain files are read backwards block by block from the offset, so the
+    cost depends on the page, not on the file size. Gzipped archives cannot
+    seek backwards; they are streamed once keeping only the last `limit`
+    matches, and `before` counts lines instead of bytes.
+    Returns: {"entries": [...], "before": cursor for the next (older) page or None}
+    """
+    level = level.upper() if level else None
+    level_marker = f" - {level} - ".encode() if level else None
+    if str(path).endswith('.gz'):
+        return _read_archive_page(path, before, limit, level, function)
+
+    end = os.path.getsize(path) if before is None else min(before, os.path.getsize(path))
+    entries = []
+    next_before = None
+    for start, raw in _iter_lines_backwards(path, end, block_size):
+        if level_marker and level_marker not in raw:
+            continue
+        entry = parse_log_line(raw.decode('utf-8', errors='replace'))
+        if not _matches(entry, level, function):
+            continue
+        if len(entries) == limit:
+            next_before = start + len(raw) + 1
+            break
+        entries.append(entry)
+    return {"entries": entries, "before": next_before}
+
+def _read_archive_page(path, before: Optional[int], limit: int, level: Optional[str],
+                       function: Optional[str]) -> Dict:
+    window = deque(maxlen=limit + 1)
+    with gzip.open(path, 'rt', encoding='utf-8', errors='replace') as f:
+        for number, line in enumerate(f):
+            if before is not None and number >= before:
+                break
+            entry = parse_log_line(line.rstrip('\n'))
+            if line.strip() and _matches(entry, level, function):
+                window.append((number, entry))
+    matches = list(window)
+    next_before = None
+    if len(matches) > limit:
+        next_before = matches[0][0] + 1
+        matches = matches[1:]
+    return {"entries": [entry for _, entry in reversed(matches)], "before": next_before}
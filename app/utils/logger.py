@@ -1,41 +1,264 @@
+import atexit
 import logging
 import functools
+import gzip
+import os
+import queue
+import random
+import shutil
 import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from app.utils.metrics import FUNCTION_DURATION, FUNCTION_ERRORS
 from pathlib import Path
 from datetime import datetime
 
-# Create logs directory if it doesn't exist
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
+LOG_FORMAT = '%(asctime)s - %(name)s - [%(funcName)s] - %(levelname)s - %(message)s'
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - [%(funcName)s] - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / f"app_{datetime.now().strftime('%Y%m%d')}.log"),
+class CompressingRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rotate at midnight or when the file reaches max_bytes, whichever comes first
+    Rotated files are gzipped as <name>.<YYYY-MM-DD>[.N].gz and only the newest
+    backup_count archives are kept
+    """
+
+    def __init__(self, filename, max_bytes: int = 0, backup_count: int = 0, **kwargs):
+        super().__init__(filename, when='midnight', backupCount=0, delay=True, **kwargs)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.namer = self._archive_name
+        self.rotator = self._compress
+
+    def shouldRollover(self, record) -> bool:
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return True
+        return bool(super().shouldRollover(record))
+
+    def _archive_name(self, default_name: str) -> str:
+        name = f"{default_name}.gz"
+        counter = 1
+        while os.path.exists(name):
+            name = f"{default_name}.{counter}.gz"
+            counter += 1
+        return name
+
+    def _compress(self, source: str, dest: str) -> None:
+        if not os.path.exists(source):
+            return
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+        self._prune()
+
+    def _prune(self) -> None:
+        if not self.backup_count:
+            return
+        archives = sorted(list_log_archives(self.baseFilename), key=os.path.getmtime)
+        for path in archives[:-self.backup_count]:
+            os.remove(path)
+
+def list_log_archives(base_filename) -> list:
+    """Rotated archives of a log file, as paths"""
+    base = Path(base_filename)
+    return [str(path) for path in base.parent.glob(f"{base.name}.*.gz")]
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records below WARNING for configured loggers
+    Rates are looked up by logger name, falling back to the nearest dotted
+    parent; warnings and errors always pass
+    """
+
+    def __init__(self, rates: dict = None):
+        super().__init__()
+        self.configure(rates or {})
+
+    def configure(self, rates: dict) -> None:
+        self.rates = {name: float(rate) for name, rate in rates.items()}
+        self._resolved = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._resolved[name] = rate
+        return rate
+
+    def sampled(self, name: str) -> bool:
+        rate = self.rate_for(name)
+        return rate >= 1.0 or random.random() < rate
+
+    def filter(self, record) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, 'sampled', False):
+            return True
+        return self.sampled(record.name)
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same-process queue: only merge the args so later mutation of them
+        # cannot change the message; formatting happens on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def parse_sample_rates(spec: str) -> dict:
+    """Parse 'logger=rate,logger=rate' (the LOG_SAMPLE_RATES format)"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+def build_handlers(log_file) -> list:
+    """The file and console handlers that actually write log lines"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        CompressingRotatingFileHandler(
+            log_file,
+            max_bytes=int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+            backup_count=int(os.environ.get("LOG_BACKUP_COUNT", 30))
+        ),
         logging.StreamHandler()
     ]
-)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+LOG_FILE = Path(os.environ.get("LOG_DIR", "logs")) / "app.log"
+
+sampling_filter = SamplingFilter(parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", "")))
+queue_listener = None
+_configured = False
+
+def configure_logging(log_file=LOG_FILE) -> None:
+    """
+    Attach the file and console handlers to the root logger (once per process)
+    Request threads only enqueue records; a listener thread formats and
+    writes them (LOG_ASYNC=0 writes synchronously instead). Nothing is
+    configured at import, so importing the app opens no files or threads.
+    """
+    global queue_listener, _configured
+    if _configured:
+        return
+    _configured = True
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    handlers = build_handlers(log_file)
+    if os.environ.get("LOG_ASYNC", "1") != "0":
+        queue_handler = DroppingQueueHandler(queue.Queue(int(os.environ.get("LOG_QUEUE_SIZE", 10000))))
+        queue_listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        queue_listener.start()
+        atexit.register(queue_listener.stop)
+        handlers = [queue_handler]
+    for handler in handlers:
+        handler.addFilter(sampling_filter)
+    logging.basicConfig(level=logging.INFO, handlers=handlers)
+
+class ProcessQueueHandler(DroppingQueueHandler):
+    """
+    Sends records to the parent process of a multi-process server, whose
+    listener owns the log files (so only one process ever rotates them)
+    """
+
+    def prepare(self, record):
+        # Fully format so the record pickles; sampling was decided here
+        record = QueueHandler.prepare(self, record)
+        record.sampled = True
+        return record
+
+def configure_worker_logging(log_queue) -> None:
+    """
+    In a forked worker: replace the handlers inherited from the parent with
+    one that forwards every record to it (see listen_for_workers)
+    """
+    global queue_listener, _configured
+    handler = ProcessQueueHandler(log_queue)
+    handler.addFilter(sampling_filter)
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    queue_listener = None
+    _configured = True
+
+def listen_for_workers(log_queue) -> QueueListener:
+    """
+    In the parent of a multi-process server: write the records workers put
+    on log_queue through this process's handlers (call configure_logging first)
+    Returns: the started listener; stop it after the workers have exited
+    """
+    listener = QueueListener(log_queue, *logging.getLogger().handlers)
+    listener.start()
+    return listener
 
 logger = logging.getLogger("json_processor")
+call_logger = logger.getChild("calls")  # per-call traces from log_function_call
+validation_logger = logger.getChild("validation")  # per-document validation results
+
+# Marks records whose sampling decision was already made by the caller
+SAMPLED = {"sampled": True}
+
+def configure_log_sampling(rates: dict) -> None:
+    """Set per-logger sampling rates, e.g. {'json_processor.calls': 0.01}"""
+    sampling_filter.configure(rates)
 
 def log_function_call(func):
-    """Decorator to log function calls with timing"""
+    """
+    Decorator to log function calls with timing
+    Traces go to json_processor.calls; when INFO is disabled or the call is
+    sampled out no trace lines are built and only failures are logged.
+    Every call feeds the function_duration_seconds / function_errors_total metrics
+    """
+    name = func.__name__
+    duration = FUNCTION_DURATION.labels(name)
+    errors = FUNCTION_ERRORS.labels(name)
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        logger.info(f"Starting {func.__name__}")
+        if not (call_logger.isEnabledFor(logging.INFO) and sampling_filter.sampled(call_logger.name)):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                errors.inc()
+                call_logger.error(f"Error in {name}: {str(e)}")
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start)
+        
+        start_time = time.perf_counter()
+        call_logger.info(f"Starting {name}", extra=SAMPLED)
         
         try:
             result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
-            logger.info(f"Completed {func.__name__} in {execution_time:.2f} seconds")
+            execution_time = time.perf_counter() - start_time
+            duration.observe(execution_time)
+            call_logger.info(f"Completed {name} in {execution_time:.2f} seconds", extra=SAMPLED)
             return result
         except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"Error in {func.__name__}: {str(e)}")
-            logger.error(f"Failed after {execution_time:.2f} seconds")
+            execution_time = time.perf_counter() - start_time
+            duration.observe(execution_time)
+            errors.inc()
+            call_logger.error(f"Error in {name}: {str(e)}")
+            call_logger.error(f"Failed after {execution_time:.2f} seconds")
             raise
     
     return wrapper
@@ -54,9 +277,10 @@ def log_error(error_type: str, message: str, extra_data: dict = None):
 def log_validation_result(is_valid: bool, data_id: str, errors: list = None):
     """Utility function to log validation results"""
     if is_valid:
-        logger.info(f"Validation successful for data_id: {data_id}")
+        if validation_logger.isEnabledFor(logging.INFO) and sampling_filter.sampled(validation_logger.name):
+            validation_logger.info(f"Validation successful for data_id: {data_id}", extra=SAMPLED)
     else:
-        logger.warning(
+        validation_logger.warning(
             f"Validation failed for data_id: {data_id}",
             extra={"validation_errors": errors}
         )
@@ -0,0 +1,403 @@
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEAD_PROCESSES = 'dead'  # pid of the snapshot that exited processes are folded into
+
+class MetricError(Exception):
+    """Raised for conflicting metric definitions or bad label sets"""
+    pass
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        self._values = {}
+
+    def labels(self, *values, **kwargs):
+        """Child for one label combination (cached, so hot paths can keep it)"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise MetricError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child(values))
+        return child
+
+    def _child(self, key):
+        raise NotImplementedError
+
+    def _default(self):
+        return 0.0
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), self._copy(value)] for key, value in self._values.items()]
+
+    def _copy(self, value):
+        return value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+class _CounterChild:
+    __slots__ = ('_metric', '_key')
+
+    def __init__(self, metric, key):
+        self._metric, self._key = metric, key
+
+    def inc(self, amount: float = 1.0) -> None:
+        metric = self._metric
+        with metric._lock:
+            metric._values[self._key] = metric._values.get(self._key, 0.0) + amount
+
+class Counter(_Metric):
+    """Monotonic count"""
+    type_name = 'counter'
+
+    def _child(self, key):
+        return _CounterChild(self, key)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        with self._metric._lock:
+            self._metric._values[self._key] = float(value)
+
+class Gauge(Counter):
+    """Value that can go up and down; summed across processes"""
+    type_name = 'gauge'
+
+    def _child(self, key):
+        return _GaugeChild(self, key)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+class _HistogramChild:
+    __slots__ = ('_metric', '_key')
+
+    def __init__(self, metric, key):
+        self._metric, self._key = metric, key
+
+    def observe(self, value: float) -> None:
+        metric = self._metric
+        index = bisect_left(metric.buckets, value)
+        with metric._lock:
+            state = metric._values.get(self._key)
+            if state is None:
+                state = metric._values[self._key] = [[0] * (len(metric.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; buckets are upper bounds, +Inf is implicit"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _child(self, key):
+        return _HistogramChild(self, key)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _copy(self, value):
+        return [list(value[0]), value[1], value[2]]
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters, gauges and histograms
+
+    In a multi-process server every process calls enable_multiprocess() with
+    a shared directory: each process periodically writes its own snapshot
+    there and collect() merges all of them, so /metrics answers for the
+    whole server whichever worker serves it.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.multiprocess_dir = None
+        self.flush_interval = 5.0
+        self._flusher = None
+        self._stop = threading.Event()
+        self._pid = os.getpid()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise MetricError(f"{metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def snapshot(self) -> Dict:
+        """This process's values as plain data"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "type": metric.type_name,
+                "help": metric.help,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, 'buckets', ())),
+                "samples": metric.snapshot()
+            }
+            for metric in metrics
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.reset()
+
+    def enable_multiprocess(self, directory: str, flush_interval: float = 5.0) -> None:
+        """Share values through per-process snapshot files in directory"""
+        os.makedirs(directory, exist_ok=True)
+        self.multiprocess_dir = directory
+        self.flush_interval = flush_interval
+        self._start_flusher()
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.multiprocess_dir, f"metrics_{pid}.json")
+
+    def flush(self) -> None:
+        """Write this process's snapshot atomically"""
+        if not self.multiprocess_dir:
+            return
+        path = self._snapshot_path(os.getpid())
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({"pid": os.getpid(), "metrics": self.snapshot()}, f)
+        os.replace(temporary, path)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _after_fork(self) -> None:
+        # The child starts from zero; the parent's values stay in the parent's file
+        self._pid = os.getpid()
+        for metric in list(self._metrics.values()):
+            metric._lock = threading.Lock()
+            metric._values.clear()
+        self._lock = threading.Lock()
+        self._flusher = None
+        if self.multiprocess_dir:
+            self._start_flusher()
+
+    def collect(self, per_process: bool = False) -> Dict:
+        """
+        Merged snapshot: this process, plus every process file when
+        multi-process (one series per process with per_process)
+        """
+        if not self.multiprocess_dir:
+            if per_process:
+                return merge_snapshots([{"pid": os.getpid(), "metrics": self.snapshot()}], per_process=True)
+            return self.snapshot()
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "metrics_*.json")):
+            # metrics_dead.json holds the folded totals of exited processes
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots, per_process)
+
+    def render(self, per_process: bool = False) -> str:
+        """Prometheus text exposition format"""
+        return render_text(self.collect(per_process))
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def compact_snapshots(directory: str, pids: Iterable[int]) -> None:
+    """
+    Fold the snapshot files of exited processes into metrics_dead.json, the
+    way Prometheus' multiprocess mode does: their counters and histograms
+    keep counting towards the totals, their gauges are dropped, and the
+    directory does not grow with every respawn. Only the process that
+    reaped them (the server master) may call this.
+    """
+    paths = [os.path.join(directory, f"metrics_{pid}.json") for pid in pids]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        return
+    dead_path = os.path.join(directory, f"metrics_{DEAD_PROCESSES}.json")
+    snapshots = []
+    for path in [dead_path] + paths:
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        snapshots.append(dict(snapshot, pid=DEAD_PROCESSES))
+    temporary = f"{dead_path}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump({"pid": DEAD_PROCESSES, "metrics": merge_snapshots(snapshots)}, f)
+    os.replace(temporary, dead_path)
+    for path in paths:
+        os.remove(path)
+
+def merge_snapshots(snapshots: List[Dict], per_process: bool = False) -> Dict:
+    """
+    Sum counters and histograms across processes; gauges are summed over
+    live processes only. With per_process every sample keeps its own
+    series, labelled with the pid of the process that recorded it
+    ('dead' for the folded totals of exited processes)
+    """
+    merged = {}
+    for snapshot in snapshots:
+        pid = snapshot.get("pid", 0)
+        alive = pid != DEAD_PROCESSES and _pid_alive(pid)
+        for name, metric in snapshot["metrics"].items():
+            labelnames = metric["labelnames"] + ["pid"] if per_process else metric["labelnames"]
+            target = merged.setdefault(name, {**metric, "labelnames": labelnames, "samples": {}})
+            if metric["type"] == "gauge" and not alive:
+                continue
+            for labels, value in metric["samples"]:
+                key = tuple(labels) + (str(pid),) if per_process else tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = [
+                        [a + b for a, b in zip(current[0], value[0])],
+                        current[1] + value[1],
+                        current[2] + value[2]
+                    ]
+                else:
+                    target["samples"][key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def render_text(metrics: Dict) -> str:
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in sorted(metric["samples"]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric["buckets"]) + [math.inf], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(names, labels, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Application metrics
+FUNCTION_DURATION = REGISTRY.histogram(
+    "function_duration_seconds", "Duration of calls wrapped by log_function_call", ("function",))
+FUNCTION_ERRORS = REGISTRY.counter(
+    "function_errors_total", "Exceptions raised by calls wrapped by log_function_call", ("function",))
+DOCUMENTS_VALIDATED = REGISTRY.counter(
+    "documents_validated_total", "Documents validated, by outcome", ("result",))
+DOCUMENTS_REJECTED = REGISTRY.counter(
+    "documents_rejected_total", "Validation errors, by offending field", ("field",))
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "db_write_seconds", "Latency of one write transaction")
+DB_WRITE_ROWS = REGISTRY.histogram(
+    "db_write_documents", "Documents (entries and errors) per write transaction", buckets=SIZE_BUCKETS)
+BATCH_SIZE = REGISTRY.histogram(
+    "batch_size_documents", "Documents per ingest request", ("source",), buckets=SIZE_BUCKETS)
+WRITE_QUEUE_DEPTH = REGISTRY.gauge(
+    "write_queue_depth", "Items waiting in the write-behind queue")
+VALIDATION_ERRORS_DROPPED = REGISTRY.counter(
+    "validation_errors_dropped_total", "Buffered validation errors discarded after failed writes")
+
+_VALID = DOCUMENTS_VALIDATED.labels("valid")
+_INVALID = DOCUMENTS_VALIDATED.labels("invalid")
+
+def record_validation(is_valid: bool, errors: Optional[List[Dict]] = None) -> None:
+    """Count one validation outcome and the fields it was rejected for"""
+    if is_valid:
+        _VALID.inc()
+        return
+    _INVALID.inc()
+    for error in errors or ():
+        DOCUMENTS_REJECTED.labels(error.get("field", "unknown")).inc()
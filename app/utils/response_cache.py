@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Iterable, Optional, Tuple
+from flask import Flask, current_app, has_app_context, make_response, request
+
+# Invalidation tags: what a cached response was computed from
+LOG_ENTRIES = 'log_entries'
+VALIDATION_ERRORS = 'validation_errors'
+
+class ResponseCache:
+    """
+    In-memory LRU of rendered GET responses with a TTL and tag invalidation
+
+    Every tag has a generation number. A cached response remembers the
+    generations of its tags when it was stored and is stale as soon as any
+    of them moves on, so invalidating after a write is one increment and
+    never touches the stored entries. The TTL bounds staleness for writes
+    this process cannot see (other worker processes).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _versions(self, tags: Iterable[str]) -> Tuple:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def versions(self, tags: Iterable[str]) -> Tuple:
+        """Current generations of tags; take them before computing a response"""
+        with self._lock:
+            return self._versions(tags)
+
+    def get(self, key: str, tags: Tuple[str, ...]) -> Optional[Tuple[bytes, str, str]]:
+        """Returns: (body, mimetype, etag) while fresh, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                versions, expires, value = entry
+                if versions == self._versions(tags) and (expires is None or expires > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, versions: Tuple, value: Tuple[bytes, str, str],
+            ttl: Optional[float] = None) -> None:
+        """
+        Store a response computed under `versions` (from versions()), so a
+        write that lands while it was being computed leaves it stale
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (versions, expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+def init_response_cache(app: Flask) -> Optional[ResponseCache]:
+    """Create the response cache when RESPONSE_CACHE_ENABLED is set"""
+    if not app.config.get('RESPONSE_CACHE_ENABLED', True):
+        return None
+    cache = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024),
+        ttl=app.config.get('RESPONSE_CACHE_TTL', 60.0)
+    )
+    app.extensions['response_cache'] = cache
+    return cache
+
+def invalidate_responses(*tags: str) -> None:
+    """Mark cached responses built from these tables as stale (call after commit)"""
+    if has_app_context():
+        cache = current_app.extensions.get('response_cache')
+        if cache is not None:
+            cache.invalidate(*tags)
+
+def strong_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def _conditional(body: bytes, mimetype: str, etag: str):
+    response = current_app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate; 304s are nearly free
+    return response.make_conditional(request)
+
+def cached_response(*tags: str, ttl: Optional[float] = None):
+    """
+    Serve a GET view from the response cache, with a strong ETag
+    Requests whose If-None-Match matches get an empty 304. Only 200
+    responses are cached; the key is the full path including the query
+    string. `ttl` overrides RESPONSE_CACHE_TTL (0 = until invalidated).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None or request.method != 'GET':
+                return view(*args, **kwargs)
+            key = request.full_path
+            cached = cache.get(key, tags)
+            if cached is not None:
+                return _conditional(*cached)
+
+            versions = cache.versions(tags)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data()
+            value = (body, response.mimetype, strong_etag(body))
+            cache.put(key, versions, value, ttl)
+            return _conditional(*value)
+        return wrapper
+    return decorator
@@ -0,0 +1,152 @@
+import math
+import struct
+from typing import Dict, Iterable, Optional
+
+_HEADER = struct.Struct('<BdQQddd')
+_VERSION = 1
+
+class SketchError(Exception):
+    """Raised for incompatible merges or malformed serialized sketches"""
+    pass
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch)
+
+    Positive values are counted in logarithmic bins of ratio
+    gamma = (1 + a) / (1 - a), so every quantile is returned within a relative
+    error `a` of an actual value. Sketches with the same accuracy merge by
+    adding bin counts, which makes per-bucket rollups combinable exactly.
+    Values at or below `min_value` (including zero) share one bin.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048,
+                 min_value: float = 1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise SketchError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Record `count` occurrences of value"""
+        if value > self.min_value:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'DDSketch') -> None:
+        """Fold another sketch with the same accuracy into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise SketchError("Cannot merge sketches with different accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1); None for an empty sketch"""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def _collapse(self) -> None:
+        """Fold the lowest bins together to respect max_bins (keeps upper quantiles exact)"""
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins + 1
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            self.bins[target] += self.bins.pop(index)
+
+    def to_bytes(self) -> bytes:
+        """Compact encoding: fixed header, then delta/varint encoded bins"""
+        out = bytearray(_HEADER.pack(_VERSION, self.relative_accuracy, self.count, self.zero_count,
+                                     self.min, self.max, self.sum))
+        _write_varint(out, len(self.bins))
+        previous = 0
+        for index in sorted(self.bins):
+            delta = index - previous
+            _write_varint(out, (delta << 1) ^ (delta >> 63))  # zigzag for negative indexes
+            _write_varint(out, self.bins[index])
+            previous = index
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'DDSketch':
+        try:
+            version, accuracy, count, zero_count, low, high, total = _HEADER.unpack_from(data)
+            if version != _VERSION:
+                raise SketchError(f"Unsupported sketch version {version}")
+            sketch = cls(accuracy)
+            sketch.count, sketch.zero_count = count, zero_count
+            sketch.min, sketch.max, sketch.sum = low, high, total
+            pos = _HEADER.size
+            size, pos = _read_varint(data, pos)
+            index = 0
+            for _ in range(size):
+                zigzag, pos = _read_varint(data, pos)
+                index += (zigzag >> 1) ^ -(zigzag & 1)
+                sketch.bins[index], pos = _read_varint(data, pos)
+            return sketch
+        except (struct.error, IndexError) as e:
+            raise SketchError(f"Malformed sketch: {str(e)}")
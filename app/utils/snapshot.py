@@ -0,0 +1,48 @@
+import base64
+import json
+import zlib
+from typing import Any, Optional
+from flask import current_app, has_app_context
+
+DEFAULT_SNAPSHOT_MAX_BYTES = 16 * 1024
+SNAPSHOT_MARKER = '_snapshot'
+
+def snapshot_budget(max_bytes: Optional[int] = None) -> Optional[int]:
+    """Resolve the per-row snapshot budget from the argument or ERROR_SNAPSHOT_MAX_BYTES"""
+    if max_bytes is None and has_app_context():
+        max_bytes = current_app.config.get('ERROR_SNAPSHOT_MAX_BYTES', DEFAULT_SNAPSHOT_MAX_BYTES)
+    return max_bytes
+
+def bound_snapshot(data: Any, max_bytes: Optional[int] = None) -> Any:
+    """
+    Fit a payload snapshot into `max_bytes` of serialized JSON
+    Small payloads are stored as-is; larger ones are zlib-compressed (base64
+    inside a marker object) and, if that is still too large, replaced by a
+    truncated text preview. A budget of None keeps everything.
+    Returns: the value to store in `data_snapshot`
+    """
+    max_bytes = snapshot_budget(max_bytes)
+    if data is None or max_bytes is None:
+        return data
+    encoded = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return data
+    packed = base64.b64encode(zlib.compress(encoded, 6)).decode('ascii')
+    if len(packed) + 64 <= max_bytes:
+        return {SNAPSHOT_MARKER: "zlib", "size": len(encoded), "data": packed}
+    text = encoded[:max_bytes].decode('utf-8', errors='ignore')
+    truncated = {SNAPSHOT_MARKER: "truncated", "size": len(encoded), "preview": text}
+    while text:
+        # Escaping can inflate the preview, so trim until the stored form fits
+        overflow = len(json.dumps(truncated, ensure_ascii=False).encode('utf-8')) - max_bytes
+        if overflow <= 0:
+            break
+        text = text[:max(len(text) - overflow, 0)]
+        truncated["preview"] = text
+    return truncated
+
+def expand_snapshot(value: Any) -> Any:
+    """Undo bound_snapshot compression; truncated snapshots are returned unchanged"""
+    if isinstance(value, dict) and value.get(SNAPSHOT_MARKER) == "zlib":
+        return json.loads(zlib.decompress(base64.b64decode(value["data"])))
+    return value
@@ -0,0 +1,46 @@
+"""
+Compare per-entry commits with the chunked bulk insert path
+
+Usage: python -m benchmarks.bench_batch_ingest [--count N] [--chunk-size N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.common import make_app, quiet_logging, synthetic_documents
+from app.services.log_processor import process_batch_logs, process_single_log
+
+def run_per_entry(documents):
+    for doc in documents:
+        process_single_log(doc)
+
+def run_batch(documents, chunk_size):
+    process_batch_logs(documents, chunk_size=chunk_size)
+
+def timed(label, db_path, func, count):
+    app = make_app(db_path)
+    with app.app_context():
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    print(f"{label:<24} {count:>7} docs  {elapsed:8.2f}s  {count / elapsed:10.0f} rows/sec")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--invalid-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    quiet_logging()
+    documents = synthetic_documents(args.count, args.invalid_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = timed("per-entry commit", Path(tmp) / "before.db",
+                       lambda: run_per_entry(documents), args.count)
+        after = timed(f"bulk (chunk={args.chunk_size})", Path(tmp) / "after.db",
+                      lambda: run_batch(documents, args.chunk_size), args.count)
+    print(f"speedup: {before / after:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Producer throughput: ad hoc requests.post per document vs the generated client
+
+Sends the same documents three ways against a server started on a
+temporary database:
+- requests.post per document (a new connection each time, like test_request.py)
+- Client.validate_log per document (one pooled keep-alive session)
+- LogBatcher.submit per document (client-side batches to /api/batch/process)
+
+Usage: python -m benchmarks.bench_client [--documents N] [--max-batch N] [--port P]
+"""
+import argparse
+import importlib.util
+import tempfile
+import time
+from pathlib import Path
+import requests
+from benchmarks.bench_http_load import ROOT, start_server
+from benchmarks.common import varied_documents
+
+def load_client():
+    spec = importlib.util.spec_from_file_location("json_logs_client", ROOT / "clients" / "json_logs_client.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--max-batch', type=int, default=100)
+    parser.add_argument('--port', type=int, default=8767)
+    args = parser.parse_args()
+
+    module = load_client()
+    documents = varied_documents(args.documents, invalid_rate=0, seed=7)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(args.port, Path(tmp))
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            def ad_hoc():
+                for document in documents:
+                    requests.post(f"{base_url}/api/validate", json=document).raise_for_status()
+
+            def pooled():
+                with module.Client(base_url) as client:
+                    for document in documents:
+                        client.validate_log(document)
+
+            def batched():
+                with module.Client(base_url) as client:
+                    with module.LogBatcher(client, max_batch=args.max_batch) as batcher:
+                        futures = [batcher.submit(document) for document in documents]
+                    for future in futures:
+                        future.result()
+
+            rows = [(name, timed(func)) for name, func in
+                    (("requests.post", ad_hoc), ("Client", pooled), ("LogBatcher", batched))]
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    print(f"{args.documents} documents, batches of {args.max_batch}\n")
+    print(f"{'producer':<14} {'seconds':>9} {'docs/s':>10} {'speedup':>8}")
+    for name, seconds in rows:
+        print(f"{name:<14} {seconds:>9.2f} {args.documents / seconds:>10.1f} {rows[0][1] / seconds:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Concurrent HTTP load against /api/validate, /api/batch/process and /upload
+
+Worker threads, each with its own keep-alive requests.Session, send a
+weighted mix of requests (--mix) for --duration seconds. With --rps the
+load is open-loop: request i is due at start + i/rps and its latency is
+measured from that due time, so a stalled server shows up as queueing
+delay instead of silently lowering the offered load. Without --rps each
+worker sends as fast as responses come back.
+
+Per endpoint it reports throughput, documents/sec, p50/p95/p99/max latency
+and the error rate (transport failures and unexpected status codes; 422
+for deliberately invalid documents is expected). --start-server runs the
+app on a temporary database for the duration of the test.
+
+Usage: python -m benchmarks.bench_http_load [--url URL | --start-server] [--concurrency N]
+           [--rps R] [--duration S] [--warmup S] [--mix validate=8,batch=1,upload=1]
+           [--batch-size N] [--upload-size N] [--invalid-rate R] [--json PATH]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+import requests
+from benchmarks.common import varied_documents
+from app.utils import json_codec
+from app.utils.sketch import DDSketch
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# endpoint: (method, path, statuses that count as success)
+ENDPOINTS = {
+    "validate": ("POST", "/api/validate", {200, 202, 422}),
+    "batch": ("POST", "/api/batch/process", {200, 202}),
+    "upload": ("POST", "/upload", {200}),
+}
+PAYLOAD_POOL = 64  # distinct pre-serialized bodies per endpoint
+
+def parse_mix(spec: str) -> dict:
+    """Parse 'validate=8,batch=1,upload=1' into endpoint weights"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r}; use {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("The mix needs at least one endpoint with a positive weight")
+    return mix
+
+def build_payloads(mix: dict, batch_size: int, upload_size: int, invalid_rate: float) -> dict:
+    """Returns: {endpoint: [(request kwargs, documents per request)]}, serialized up front"""
+    payloads = {}
+    headers = {"Content-Type": "application/json"}
+    for seed, name in enumerate(mix):
+        if name == "validate":
+            documents = varied_documents(PAYLOAD_POOL, invalid_rate=invalid_rate, seed=seed)
+            payloads[name] = [({"data": json_codec.dumps_bytes(doc), "headers": headers}, 1) for doc in documents]
+        elif name == "batch":
+            documents = varied_documents(PAYLOAD_POOL * batch_size, invalid_rate=invalid_rate, seed=seed)
+            payloads[name] = [
+                ({"data": json_codec.dumps_bytes(documents[i:i + batch_size]), "headers": headers}, batch_size)
+                for i in range(0, len(documents), batch_size)
+            ]
+        else:
+            pool = max(1, PAYLOAD_POOL // 8)
+            documents = varied_documents(pool * upload_size, invalid_rate=invalid_rate, seed=seed)
+            payloads[name] = []
+            for i in range(0, len(documents), upload_size):
+                body = b"\n".join(json_codec.dumps_bytes(doc) for doc in documents[i:i + upload_size])
+                payloads[name].append(({"files": {"file": ("load.ndjson", body, "application/x-ndjson")}}, upload_size))
+    return payloads
+
+class EndpointStats:
+    """Latency sketch and outcome counts for one endpoint in one worker"""
+
+    def __init__(self):
+        self.latency = DDSketch()
+        self.statuses = {}
+        self.errors = 0
+        self.documents = 0
+
+    def merge(self, other: 'EndpointStats') -> None:
+        self.latency.merge(other.latency)
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.errors += other.errors
+        self.documents += other.documents
+
+class LoadRun:
+    """Shared schedule for the worker threads"""
+
+    def __init__(self, base_url: str, mix: dict, payloads: dict, duration: float, warmup: float,
+                 rps: float = None, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.payloads = payloads
+        self.rps = rps
+        self.timeout = timeout
+        self.start = time.perf_counter() + 0.1
+        self.measure_from = self.start + warmup
+        self.deadline = self.measure_from + duration
+        self._sequence = itertools.count()
+
+    def _next_due(self):
+        """Due time of the next request, or None once the run is over"""
+        if self.rps:
+            due = self.start + next(self._sequence) / self.rps
+        else:
+            due = time.perf_counter()
+        return due if due < self.deadline else None
+
+    def worker(self, seed: int, results: list) -> None:
+        rng = random.Random(seed)
+        session = requests.Session()
+        stats = {name: EndpointStats() for name in self.names}
+        while True:
+            due = self._next_due()
+            if due is None:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            name = rng.choices(self.names, self.weights)[0]
+            method, path, expected = ENDPOINTS[name]
+            kwargs, documents = rng.choice(self.payloads[name])
+            sent = time.perf_counter()
+            try:
+                response = session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+                status = response.status_code
+            except requests.RequestException:
+                status = None
+            finished = time.perf_counter()
+            if due < self.measure_from:
+                continue
+            endpoint = stats[name]
+            endpoint.latency.add(finished - (due if self.rps else sent))
+            endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+            if status not in expected:
+                endpoint.errors += 1
+            else:
+                endpoint.documents += documents
+        session.close()
+        results.append(stats)
+
+    def run(self, concurrency: int) -> dict:
+        results = []
+        threads = [
+            threading.Thread(target=self.worker, args=(seed, results), name=f"load-{seed}")
+            for seed in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        totals = {name: EndpointStats() for name in self.names}
+        for stats in results:
+            for name, endpoint in stats.items():
+                totals[name].merge(endpoint)
+        return totals
+
+def summarize(totals: dict, duration: float) -> dict:
+    """Returns: {endpoint: {requests, errors, error_rate, rps, docs_per_sec, p50_ms, ...}}"""
+    summary = {}
+    for name, stats in totals.items():
+        count = stats.latency.count
+        quantile = lambda q: round(stats.latency.quantile(q) * 1e3, 2) if count else None
+        summary[name] = {
+            "requests": count,
+            "errors": stats.errors,
+            "error_rate": round(stats.errors / count, 4) if count else 0.0,
+            "rps": round(count / duration, 1),
+            "docs_per_sec": round(stats.documents / duration, 1),
+            "p50_ms": quantile(0.5),
+            "p95_ms": quantile(0.95),
+            "p99_ms": quantile(0.99),
+            "max_ms": round(stats.latency.max * 1e3, 2) if count else None,
+            "statuses": {str(status): n for status, n in sorted(stats.statuses.items(), key=str)}
+        }
+    return summary
+
+def start_server(port: int, workdir: Path, extra_env: dict = None) -> subprocess.Popen:
+    """Run the app with `flask run` on a throwaway database; returns once /api/health answers"""
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        DATABASE_URL=f"sqlite:///{workdir / 'load.db'}",
+        LOG_DIR=str(workdir / "logs"),
+        **(extra_env or {})
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app.main", "run", "--host", "127.0.0.1",
+         "--port", str(port), "--no-reload", "--no-debugger", "--with-threads"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_for_health(f"http://127.0.0.1:{port}", server)
+    return server
+
+def wait_for_health(base_url: str, server: subprocess.Popen = None, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}")
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+
+def print_summary(summary: dict) -> None:
+    print(f"{'endpoint':<10} {'requests':>9} {'req/s':>8} {'docs/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for name, row in summary.items():
+        if not row["requests"]:
+            print(f"{name:<10} {0:>9}")
+            continue
+        print(f"{name:<10} {row['requests']:>9} {row['rps']:>8.1f} {row['docs_per_sec']:>9.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} "
+              f"{row['error_rate']:>7.1%}")
+        print(f"{'':<10} statuses {row['statuses']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default="http://localhost:8000", help="Server to load (ignored with --start-server)")
+    parser.add_argument('--start-server', action='store_true', help="Start the app on a temporary database")
+    parser.add_argument('--port', type=int, default=8765, help="Port for --start-server")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rps', type=float, default=None, help="Target requests/sec across all workers (open loop)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=1.0, help="Seconds of load before measuring")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix("validate=8,batch=1,upload=1"))
+    parser.add_argument('--batch-size', type=int, default=50, help="Documents per /api/batch/process request")
+    parser.add_argument('--upload-size', type=int, default=200, help="Documents per /upload file")
+    parser.add_argument('--invalid-rate', type=float, default=0.05)
+    parser.add_argument('--json', type=Path, default=None, help="Also write the results here")
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.mix, args.batch_size, args.upload_size, args.invalid_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(args.port, Path(tmp)) if args.start_server else None
+        base_url = f"http://127.0.0.1:{args.port}" if server else args.url
+        try:
+            if server is None:
+                wait_for_health(base_url, timeout=5)
+            run = LoadRun(base_url, args.mix, payloads, args.duration, args.warmup, args.rps)
+            summary = summarize(run.run(args.concurrency), args.duration)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(10)
+
+    offered = f"{args.rps:.0f} req/s offered" if args.rps else "closed loop"
+    print(f"{base_url}  concurrency {args.concurrency}, {offered}, {args.duration:.0f}s measured\n")
+    print_summary(summary)
+    if args.json:
+        args.json.write_text(json.dumps({"args": {k: v for k, v in vars(args).items() if k != 'json'},
+                                         "results": summary}, indent=2, default=str))
+
+if __name__ == '__main__':
+    main()
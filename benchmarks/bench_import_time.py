@@ -0,0 +1,91 @@
+"""
+Cold-start cost: importing app.main, building the app, first spec request
+
+Each run is a fresh interpreter (python -X importtime) started in an empty
+temporary directory, so nothing is cached in-process and any file the
+import writes would show up. Reports the median over runs, the packages
+with the largest self import time, and exits non-zero when the median
+import exceeds --budget-ms (for CI).
+
+Usage: python -m benchmarks.bench_import_time [--runs N] [--budget-ms MS] [--factory] [--top N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+timings = {"import_ms": (time.perf_counter() - start) * 1e3}
+if sys.argv[1] == "factory":
+    start = time.perf_counter()
+    application = app.main.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[2], "DEBUG": False})
+    timings["create_app_ms"] = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    application.test_client().get("/swagger.json")
+    timings["first_spec_ms"] = (time.perf_counter() - start) * 1e3
+print(json.dumps(timings))
+"""
+
+def parse_importtime(stderr: str) -> Counter:
+    """Self time in microseconds per top-level package"""
+    totals = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return totals
+
+def run_once(factory: bool) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=str(ROOT), LOG_DIR=str(Path(tmp) / "logs"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, "factory" if factory else "import",
+             str(Path(tmp) / "bench.db")],
+            cwd=tmp, env=env, capture_output=True, text=True, check=True
+        )
+        created = sorted(os.listdir(tmp))
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr), created
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None, help="Fail when the median import exceeds this")
+    parser.add_argument('--factory', action='store_true', help="Also time create_app() and the first /swagger.json")
+    parser.add_argument('--top', type=int, default=10, help="Packages shown by self import time")
+    args = parser.parse_args()
+
+    samples = []
+    packages = Counter()
+    for _ in range(args.runs):
+        timings, totals, created = run_once(args.factory)
+        if created and not args.factory:
+            print(f"warning: importing app.main created {created}")
+        samples.append(timings)
+        packages.update(totals)
+
+    for key in samples[0]:
+        values = [sample[key] for sample in samples]
+        print(f"{key:<16} median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"\n{'package':<24} {'self ms':>8}")
+    for name, micros in packages.most_common(args.top):
+        print(f"{name:<24} {micros / args.runs / 1e3:8.1f}")
+
+    median = statistics.median(sample["import_ms"] for sample in samples)
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"\nFAIL: median import {median:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Parse and serialize cost of the JSON codecs on source.json-shaped payloads
+
+For each payload size (number of documents in a batch array) and codec,
+times loads() of the request body, dumps_bytes() of the payload, and a
+full jsonify() through CodecJSONProvider (sorted keys, compact, as in
+production with DEBUG off).
+
+Usage: python -m benchmarks.bench_json_codec [--sizes 1 100 1000] [--repeat N]
+"""
+import argparse
+import time
+from flask import Flask, jsonify
+from benchmarks.common import quiet_logging, synthetic_documents
+from app.utils import json_codec
+from app.utils.json_codec import CodecJSONProvider, configure_json_codec
+
+def per_call_us(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    quiet_logging()
+    codecs = ['stdlib'] + (['orjson'] if json_codec.orjson is not None else [])
+    app = Flask(__name__)
+    app.json = CodecJSONProvider(app)
+
+    print(f"{'documents':>9} {'codec':<8} {'bytes':>10} {'loads us':>10} {'dumps us':>10} {'jsonify us':>11}")
+    for size in args.sizes:
+        payload = synthetic_documents(size)
+        repeat = max(5, args.repeat // max(1, size // 100))
+        baseline = None
+        for codec in codecs:
+            configure_json_codec(codec)
+            body = json_codec.dumps_bytes(payload)
+            loads = per_call_us(lambda: json_codec.loads(body), repeat)
+            dumps = per_call_us(lambda: json_codec.dumps_bytes(payload), repeat)
+            with app.app_context():
+                response = per_call_us(lambda: jsonify(payload).get_data(), repeat)
+            speedup = ""
+            if baseline is None:
+                baseline = (loads, dumps, response)
+            else:
+                speedup = "  ({:.1f}x / {:.1f}x / {:.1f}x)".format(
+                    baseline[0] / loads, baseline[1] / dumps, baseline[2] / response)
+            print(f"{size:>9} {codec:<8} {len(body):>10} {loads:>10.1f} {dumps:>10.1f} {response:>11.1f}{speedup}")
+    configure_json_codec()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Page latency of GET /api/logs queries against a generated dataset
+
+Generates --rows log_entries rows (no steps) spread over --models models,
+then times keyset pages at increasing depth, filtered pages, and the
+equivalent OFFSET query for comparison. The database is kept between runs
+so large datasets only have to be generated once.
+
+Usage: python -m benchmarks.bench_log_query [--rows N] [--db PATH]
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import text
+from benchmarks.common import make_app, quiet_logging
+from app.models.database import db, LogEntry
+from app.services.log_query import list_logs
+
+GENERATE_CHUNK = 50000
+
+def generate(rows: int, models: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    now = datetime.utcnow()
+    existing = LogEntry.query.count()
+    for offset in range(existing, rows, GENERATE_CHUNK):
+        batch = []
+        for i in range(offset, min(rows, offset + GENERATE_CHUNK)):
+            batch.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "model": f"model-{i % models}",
+                "input_text": f"generated input {i}",
+                "response_time": round(rng.uniform(0.1, 30.0), 3),
+                "timestamp": start + timedelta(seconds=i),
+                "content_hash": None,
+                "created_at": now,
+                "updated_at": now
+            })
+        db.session.execute(LogEntry.__table__.insert(), batch)
+        db.session.commit()
+        print(f"  generated {min(rows, offset + GENERATE_CHUNK)}/{rows}", flush=True)
+
+def time_ms(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def cursor_at_depth(depth: int, limit: int, **filters):
+    """Walk pages to reach the cursor `depth` rows in"""
+    cursor = None
+    for _ in range(depth // limit):
+        cursor = list_logs(limit=limit, cursor=cursor, **filters)['next_cursor']
+    return cursor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--models', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--db', default='bench_log_query.db')
+    args = parser.parse_args()
+
+    quiet_logging()
+    app = make_app(Path(args.db).resolve(), SQLITE_STORAGE_PROFILE='wal')
+    with app.app_context():
+        generate(args.rows, args.models)
+        total = LogEntry.query.count()
+        print(f"rows: {total}, page size: {args.limit}")
+
+        middle = datetime(2024, 1, 1) + timedelta(seconds=total // 2)
+        cases = [
+            ("first page", {}),
+            ("model filter", {"model": "model-3"}),
+            ("model + timestamp range", {"model": "model-3", "since": middle, "until": middle + timedelta(days=1)}),
+            ("response time range", {"min_response_time": 10.0, "max_response_time": 11.0}),
+        ]
+        for label, filters in cases:
+            print(f"{label:<28} {time_ms(lambda: list_logs(limit=args.limit, **filters)):8.2f} ms")
+
+        for depth in (1000, 10000, 100000):
+            if depth >= total:
+                break
+            cursor = cursor_at_depth(depth, 1000)
+            keyset = time_ms(lambda: list_logs(limit=args.limit, cursor=cursor))
+            offset = time_ms(lambda: db.session.execute(text(
+                "SELECT id, model, input_text, response_time, timestamp, created_at FROM log_entries "
+                "ORDER BY timestamp DESC, id DESC LIMIT :limit OFFSET :offset"
+            ), {"limit": args.limit, "offset": depth}).all())
+            print(f"depth {depth:<8} keyset {keyset:8.2f} ms   OFFSET {offset:8.2f} ms")
+
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM log_entries WHERE model = 'model-3' "
+            "AND (timestamp, id) < ('2024-06-01 00:00:00.000000', 'z') ORDER BY timestamp DESC, id DESC LIMIT 100"
+        )).all()
+        print("plan (model + cursor):", "; ".join(row[-1] for row in plan))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Per-call overhead of log_function_call under different logging pipelines
+
+Scenarios: undecorated call; INFO disabled (short-circuit); synchronous file
+handler (the previous setup); queue handler with a background writer; and
+queue handler with 1% sampling of call traces. Log output goes to a
+temporary file.
+
+Usage: python -m benchmarks.bench_logging [--calls N]
+"""
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+from pathlib import Path
+from app.utils.logger import (
+    LOG_FORMAT,
+    DroppingQueueHandler,
+    call_logger,
+    configure_log_sampling,
+    log_function_call,
+    sampling_filter
+)
+
+def work(x):
+    return x + 1
+
+traced = log_function_call(work)
+
+def per_call_ns(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+def install(handlers):
+    root = logging.getLogger()
+    previous = root.handlers[:]
+    root.handlers = handlers
+    return previous
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_handler = logging.FileHandler(Path(tmp) / "bench.log")
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logging.getLogger("json_processor").setLevel(logging.INFO)
+        rows = [("undecorated", per_call_ns(work, args.calls))]
+
+        call_logger.setLevel(logging.WARNING)
+        rows.append(("INFO disabled", per_call_ns(traced, args.calls)))
+        call_logger.setLevel(logging.NOTSET)
+
+        previous = install([file_handler])
+        rows.append(("sync file handler", per_call_ns(traced, args.calls)))
+
+        queue_handler = DroppingQueueHandler(queue.Queue(maxsize=args.calls * 2 + 10))
+        queue_handler.addFilter(sampling_filter)
+        listener = QueueListener(queue_handler.queue, file_handler)
+        install([queue_handler])
+        listener.start()
+        rows.append(("queue handler", per_call_ns(traced, args.calls)))
+
+        configure_log_sampling({call_logger.name: 0.01})
+        rows.append(("queue handler, 1% sampled", per_call_ns(traced, args.calls)))
+        configure_log_sampling({})
+
+        drain_start = time.perf_counter()
+        listener.stop()
+        drain = time.perf_counter() - drain_start
+        install(previous)
+        file_handler.close()
+
+    baseline = rows[0][1]
+    for label, ns in rows:
+        print(f"{label:<28} {ns / 1000:8.2f} us/call  (+{(ns - baseline) / 1000:.2f} us)")
+    print(f"background writer drained the queue in {drain:.2f}s after the timed loops")
+
+if __name__ == '__main__':
+    main()
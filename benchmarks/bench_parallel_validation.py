@@ -0,0 +1,62 @@
+"""
+Measure process-pool validation against serial validation
+
+For each batch size the serial time is compared with pools of 1/2/4/8
+workers (pool start-up excluded; the pool is warmed first). The crossover is
+the smallest batch size at which the best pool beats serial validation;
+VALIDATION_PARALLEL_THRESHOLD should be set at or above it.
+
+Usage: python -m benchmarks.bench_parallel_validation [--sizes 500,2000,...] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import time
+from benchmarks.common import quiet_logging, synthetic_documents
+from app.services.parallel_validation import shutdown_pool, validate_documents, validate_in_pool
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='500,2000,10000,50000')
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    quiet_logging()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    documents = synthetic_documents(max(sizes))
+    print(f"CPUs available: {os.cpu_count()}")
+
+    header = f"{'batch':>8} {'serial':>10}" + "".join(f" {f'{w} workers':>18}" for w in worker_counts)
+    print(header)
+    crossover = None
+    for size in sizes:
+        batch = documents[:size]
+        serial = best_of(lambda: validate_documents(batch, workers=1), args.repeat)
+        line = f"{size:>8} {serial:>9.3f}s"
+        for workers in worker_counts:
+            chunk_size = max(1, min(args.chunk_size, -(-size // workers)))
+            validate_in_pool(batch[:workers], workers, 1)  # warm the pool
+            pooled = best_of(lambda: validate_in_pool(batch, workers, chunk_size), args.repeat)
+            line += f" {pooled:>9.3f}s {serial / pooled:>5.2f}x"
+            if crossover is None and pooled < serial:
+                crossover = size
+        print(line)
+    shutdown_pool()
+
+    if crossover is None:
+        print("Pooling did not beat serial validation at any measured batch size")
+    else:
+        print(f"Crossover: pooling pays off from ~{crossover} documents")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare inline pseudo-code storage with the content-addressed line store
+
+The inline layout keeps every step's pseudo-code as a JSON array of text,
+the deduplicated layout stores hashes and keeps each distinct line once.
+
+Usage: python -m benchmarks.bench_step_storage [--count N] [--unique-line-rate R]
+"""
+import argparse
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from sqlalchemy import text
+from benchmarks.common import make_app, quiet_logging, synthetic_documents
+from app.models.database import db, LogEntry, Step
+from app.schemas.validators import validate_json_data
+from app.services.batch_ingest import BatchIngestor, log_entry_row
+
+def write_inline(results, chunk_size):
+    for start in range(0, len(results), chunk_size):
+        entries, steps = [], []
+        for result in results[start:start + chunk_size]:
+            row = log_entry_row(result)
+            entries.append(row)
+            steps.extend({
+                "id": str(uuid.uuid4()),
+                "log_entry_id": row['id'],
+                "step_number": step['step'],
+                "description": step['description'],
+                "pseudo_code": step['pseudoCode']
+            } for step in result['output']['steps'])
+        db.session.execute(LogEntry.__table__.insert(), entries)
+        db.session.execute(Step.__table__.insert(), steps)
+        db.session.commit()
+
+def write_deduplicated(documents, results, chunk_size):
+    ingestor = BatchIngestor(chunk_size)
+    for position, (doc, result) in enumerate(zip(documents, results)):
+        ingestor.add_validated(doc, position, True, result, None)
+    ingestor.close()
+
+def database_size():
+    db.session.execute(text("VACUUM"))
+    page_count = db.session.execute(text("PRAGMA page_count")).scalar()
+    page_size = db.session.execute(text("PRAGMA page_size")).scalar()
+    return page_count * page_size
+
+def measure(label, db_path, func, count):
+    app = make_app(db_path)
+    with app.app_context():
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        size = database_size()
+    print(f"{label:<14} {count:>7} entries  {elapsed:7.2f}s  {count / elapsed:9.0f} entries/sec  "
+          f"{size / 1024 / 1024:8.2f} MB")
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--unique-line-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    quiet_logging()
+    documents = synthetic_documents(args.count, unique_line_rate=args.unique_line_rate)
+    results = [validate_json_data(doc)[1] for doc in documents]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inline = measure("inline", Path(tmp) / "inline.db",
+                         lambda: write_inline(results, args.chunk_size), args.count)
+        dedup = measure("deduplicated", Path(tmp) / "dedup.db",
+                        lambda: write_deduplicated(documents, results, args.chunk_size), args.count)
+    print(f"size ratio: {dedup / inline:.2f}")
+
+if __name__ == '__main__':
+    main()
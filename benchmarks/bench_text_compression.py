@@ -0,0 +1,114 @@
+"""
+Database size, insert throughput and read latency with and without text compression
+
+Each mode ingests the same synthetic documents into a fresh database:
+plain text (compression off), zlib, and zlib with a dictionary trained on
+a sample of the documents. Reads are timed for single entries with their
+steps (GET /api/logs/<id>) and for list pages (GET /api/logs).
+
+Usage: python -m benchmarks.bench_text_compression [--count N] [--input-bytes N]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy import text
+from benchmarks.common import make_app, quiet_logging, synthetic_documents
+from app.database.compression import train_dictionary
+from app.models.database import db, CompressionDictionary, LogEntry, load_compression_settings
+from app.schemas.validators import validate_json_data
+from app.services.batch_ingest import BatchIngestor
+from app.services.log_query import get_log, list_logs
+
+MODES = (
+    ("plain", {"TEXT_COMPRESSION_ENABLED": False}),
+    ("zlib", {"TEXT_COMPRESSION_DICTIONARY": False}),
+    ("zlib+dictionary", {})
+)
+
+def database_size():
+    db.session.execute(text("VACUUM"))
+    page_count = db.session.execute(text("PRAGMA page_count")).scalar()
+    page_size = db.session.execute(text("PRAGMA page_size")).scalar()
+    return page_count * page_size
+
+def with_long_inputs(documents, input_bytes, seed=0):
+    rng = random.Random(seed)
+    words = ["itinerary", "flight", "hotel", "booking", "passenger", "confirm", "departure",
+             "arrival", "luggage", "seat", "fare", "transfer", "schedule", "payment"]
+    for doc in documents:
+        filler = []
+        while sum(len(word) + 1 for word in filler) < input_bytes:
+            filler.append(rng.choice(words))
+        doc['input'] = f"{doc['input']} {' '.join(filler)}"
+    return documents
+
+def run(label, db_path, config, documents, results, chunk_size, reads):
+    app = make_app(db_path, **config)
+    with app.app_context():
+        if label == "zlib+dictionary":
+            samples = [doc['input'] for doc in documents[:500]]
+            samples += [step['description'] for doc in documents[:500] for step in doc['output']['steps']]
+            db.session.add(CompressionDictionary(data=train_dictionary(samples), sample_count=len(samples)))
+            db.session.commit()
+            load_compression_settings(app.config)
+
+        start = time.perf_counter()
+        ingestor = BatchIngestor(chunk_size, keep_results=False)
+        for position, (doc, result) in enumerate(zip(documents, results)):
+            ingestor.add_validated(doc, position, True, result, None)
+        ingestor.close()
+        insert_seconds = time.perf_counter() - start
+        size = database_size()
+
+        ids = [row.id for row in db.session.query(LogEntry.id)]
+        rng = random.Random(1)
+        sample = [rng.choice(ids) for _ in range(reads)]
+        start = time.perf_counter()
+        for entry_id in sample:
+            get_log(entry_id)
+        get_seconds = (time.perf_counter() - start) / reads
+
+        start = time.perf_counter()
+        cursor = None
+        pages = 0
+        while pages < 20:
+            page = list_logs(limit=100, cursor=cursor)
+            pages += 1
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        page_seconds = (time.perf_counter() - start) / pages
+        db.session.remove()
+        db.engine.dispose()
+
+    print(f"{label:<16} {size / 1024 / 1024:8.2f} MB  {len(documents) / insert_seconds:9.0f} entries/sec  "
+          f"get {get_seconds * 1000:6.2f} ms  page(100) {page_seconds * 1000:6.2f} ms")
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--input-bytes', type=int, default=2000, help="Approximate prompt length")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--unique-line-rate', type=float, default=0.1)
+    parser.add_argument('--reads', type=int, default=500)
+    args = parser.parse_args()
+
+    quiet_logging()
+    documents = with_long_inputs(
+        synthetic_documents(args.count, unique_line_rate=args.unique_line_rate), args.input_bytes
+    )
+    results = [validate_json_data(doc)[1] for doc in documents]
+
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, config in MODES:
+            sizes[label] = run(label, Path(tmp) / f"{label}.db", config, documents, results,
+                               args.chunk_size, args.reads)
+    for label, size in sizes.items():
+        print(f"{label:<16} size ratio {size / sizes['plain']:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare marshmallow LogEntrySchema loads with the compiled loader
+
+Usage: python -m benchmarks.bench_validator [--count N] [--repeat N]
+"""
+import argparse
+import timeit
+from benchmarks.common import quiet_logging, synthetic_documents
+from app.schemas.compiled import compile_schema
+from app.schemas.validators import LogEntrySchema, configure_validator, validate_json_data
+
+def per_doc_us(func, documents, repeat):
+    best = min(timeit.repeat(lambda: [func(doc) for doc in documents], number=1, repeat=repeat))
+    return best / len(documents) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    quiet_logging()
+    documents = synthetic_documents(args.count)
+    compiled = compile_schema(LogEntrySchema)
+
+    rows = [
+        ("LogEntrySchema().load", per_doc_us(lambda doc: LogEntrySchema().load(doc), documents, args.repeat)),
+        ("shared schema .load", per_doc_us(LogEntrySchema().load, documents, args.repeat)),
+        ("compiled loader", per_doc_us(compiled, documents, args.repeat)),
+    ]
+    for backend in ("marshmallow", "compiled"):
+        configure_validator(backend)
+        rows.append((f"validate_json_data [{backend}]",
+                     per_doc_us(validate_json_data, documents, args.repeat)))
+
+    baseline = rows[0][1]
+    for label, us in rows:
+        print(f"{label:<34} {us:9.1f} us/doc  {baseline / us:6.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Throughput of the prefork server (app.server) with 1 and N worker processes
+
+Starts `python -m app.server --workers N` on a fresh temporary database for
+each worker count and drives it with the bench_http_load generator (same
+mix, concurrency and duration every time), then compares the totals.
+Workers only help up to the number of cores on the machine; the load
+generator runs on the same machine and competes with them.
+
+Usage: python -m benchmarks.bench_workers [--workers 1,4] [--concurrency N] [--duration S]
+           [--mix validate=8,batch=1,upload=1] [--rps R]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from benchmarks.bench_http_load import LoadRun, build_payloads, parse_mix, summarize, wait_for_health
+from app.utils.sketch import DDSketch
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def run_server(workers: int, port: int, workdir: Path) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        DATABASE_URL=f"sqlite:///{workdir / 'bench.db'}",
+        LOG_DIR=str(workdir / "logs")
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--bind", f"127.0.0.1:{port}", "--workers", str(workers)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_for_health(f"http://127.0.0.1:{port}", server, timeout=60)
+    return server
+
+def totals(summary: dict, totals_by_endpoint: dict) -> dict:
+    """All endpoints together: requests/sec, documents/sec, error rate and merged latency"""
+    latency = DDSketch()
+    for stats in totals_by_endpoint.values():
+        latency.merge(stats.latency)
+    requests = sum(row["requests"] for row in summary.values())
+    errors = sum(row["errors"] for row in summary.values())
+    return {
+        "rps": sum(row["rps"] for row in summary.values()),
+        "docs_per_sec": sum(row["docs_per_sec"] for row in summary.values()),
+        "p50_ms": latency.quantile(0.5) * 1e3 if latency.count else 0.0,
+        "p99_ms": latency.quantile(0.99) * 1e3 if latency.count else 0.0,
+        "error_rate": errors / requests if requests else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default=f"1,{os.cpu_count() or 1}", help="Comma-separated worker counts")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rps', type=float, default=None)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix("validate=8,batch=1,upload=1"))
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--upload-size', type=int, default=200)
+    args = parser.parse_args()
+
+    counts = sorted({max(1, int(value)) for value in args.workers.split(',') if value.strip()})
+    payloads = build_payloads(args.mix, args.batch_size, args.upload_size, invalid_rate=0.05)
+    rows = []
+    for workers in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            server = run_server(workers, args.port, Path(tmp))
+            try:
+                run = LoadRun(f"http://127.0.0.1:{args.port}", args.mix, payloads, args.duration, args.warmup, args.rps)
+                by_endpoint = run.run(args.concurrency)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(60)
+        rows.append((workers, totals(summarize(by_endpoint, args.duration), by_endpoint)))
+        print(f"{workers} worker(s) done", file=sys.stderr)
+
+    print(f"cpus {os.cpu_count()}, concurrency {args.concurrency}, {args.duration:.0f}s per run\n")
+    print(f"{'workers':>7} {'req/s':>9} {'docs/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'speedup':>8}")
+    base = rows[0][1]["docs_per_sec"] or 1
+    for workers, row in rows:
+        print(f"{workers:>7} {row['rps']:>9.1f} {row['docs_per_sec']:>10.1f} {row['p50_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['error_rate']:>7.1%} {row['docs_per_sec'] / base:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Shared helpers for the benchmark scripts"""
+import copy
+import json
+import logging
+import random
+from pathlib import Path
+from flask import Flask
+from app.models.database import init_db
+
+SOURCE_PATH = Path(__file__).resolve().parent.parent / "source.json"
+
+def load_source() -> dict:
+    with open(SOURCE_PATH) as f:
+        return json.load(f)
+
+def synthetic_documents(count: int, invalid_rate: float = 0.0, seed: int = 0,
+                        unique_line_rate: float = 0.0) -> list:
+    """
+    Generate log documents shaped like source.json
+    invalid_rate: fraction of documents that fail validation
+    unique_line_rate: fraction of pseudo-code lines made unique to their document
+    """
+    rng = random.Random(seed)
+    source = load_source()
+    documents = []
+    for i in range(count):
+        doc = copy.deepcopy(source)
+        doc['input'] = f"{source['input']} #{i}"
+        doc['response_time_seconds'] = round(rng.uniform(0.5, 30.0), 3)
+        if rng.random() < invalid_rate:
+            doc['response_time_seconds'] = -1
+        if unique_line_rate:
+            for step in doc['output']['steps']:
+                step['pseudoCode'] = [
+                    f"{line}  # variant {i}" if rng.random() < unique_line_rate else line
+                    for line in step['pseudoCode']
+                ]
+        documents.append(doc)
+    return documents
+
+INVALID_MUTATIONS = (
+    ('response_time_seconds', lambda doc: doc.update(response_time_seconds=-1)),
+    ('model', lambda doc: doc.pop('model')),
+    ('timestamp', lambda doc: doc.update(timestamp='not a timestamp')),
+    ('pseudoCode', lambda doc: doc['output']['steps'][0].update(pseudoCode='not a list')),
+)
+
+def varied_documents(count: int, steps=(1, 10), code_lines=(1, 15), line_chars=(20, 100),
+                     invalid_rate: float = 0.0, seed: int = 0) -> list:
+    """
+    Generate log documents seeded from source.json with varying shape
+    steps / code_lines / line_chars: (min, max) steps per document, pseudo-code
+    lines per step and characters per line. Lines are drawn from source.json
+    and stretched to length, so some recur across documents as in real logs.
+    invalid_rate: fraction of documents with one invalid field (cycling through
+    INVALID_MUTATIONS)
+    """
+    rng = random.Random(seed)
+    source = load_source()
+    source_lines = [line for step in source['output']['steps'] for line in step['pseudoCode']]
+    descriptions = [step['description'] for step in source['output']['steps']]
+    documents = []
+    for i in range(count):
+        doc_steps = []
+        for number in range(1, rng.randint(*steps) + 1):
+            lines = []
+            for _ in range(rng.randint(*code_lines)):
+                line = rng.choice(source_lines)
+                width = rng.randint(*line_chars)
+                lines.append((line + f"  # {rng.randrange(50)}" * (width // 8))[:width])
+            doc_steps.append({"step": number, "description": rng.choice(descriptions), "pseudoCode": lines})
+        doc = {
+            "model": source['model'],
+            "input": f"{source['input']} #{i}",
+            "output": {"steps": doc_steps},
+            "response_time_seconds": round(rng.uniform(0.5, 30.0), 3),
+            "timestamp": source['timestamp']
+        }
+        if rng.random() < invalid_rate:
+            INVALID_MUTATIONS[i % len(INVALID_MUTATIONS)][1](doc)
+        documents.append(doc)
+    return documents
+
+def make_app(db_path, **config) -> Flask:
+    """Minimal app bound to the given SQLite file"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        **config
+    )
+    init_db(app)
+    return app
+
+def quiet_logging():
+    """Keep per-call INFO lines out of the timings"""
+    logging.getLogger("json_processor").setLevel(logging.WARNING)
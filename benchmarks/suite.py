@@ -0,0 +1,186 @@
+"""
+Benchmark suite for the validation and ingest hot paths, with baseline comparison
+
+Times validate_json_structure, validate_json_data, process_json_file,
+process_single_log and process_batch_logs in-process against a temporary
+SQLite database, for documents of three shapes generated from source.json
+(see SHAPES). Results are written as JSON; when a baseline file exists
+every case is compared with it and the run exits non-zero if any is
+slower by more than --threshold. Baselines are machine-specific: record
+one with --save-baseline on the machine that runs the comparison.
+
+Usage: python -m benchmarks.suite [--quick] [--only NAME] [--output PATH]
+                                  [--baseline PATH] [--save-baseline] [--threshold 0.25]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks.common import make_app, quiet_logging, varied_documents
+from app.services.log_processor import process_batch_logs, process_single_log
+from app.schemas.validators import validate_json_data
+from app.utils import json_codec
+from app.utils.json_parser import process_json_file, validate_json_structure
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+SCHEMA_VERSION = 1
+
+# name: varied_documents arguments
+SHAPES = {
+    "small": {"steps": (1, 3), "code_lines": (1, 4), "line_chars": (10, 40)},
+    "typical": {"steps": (3, 8), "code_lines": (2, 12), "line_chars": (20, 80)},
+    "large": {"steps": (20, 40), "code_lines": (10, 30), "line_chars": (40, 160)},
+}
+INVALID_RATE = 0.1
+MIN_SAMPLE_SECONDS = 0.05
+
+def measure(func, repeat: int, operations: int) -> dict:
+    """
+    Time `repeat` samples after a warm-up call; each sample loops func
+    enough times to last MIN_SAMPLE_SECONDS so timer and scheduler noise
+    stay small next to it
+    Returns: per-operation timings in microseconds
+    """
+    start = time.perf_counter()
+    func()
+    loops = max(1, math.ceil(MIN_SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / (loops * operations) * 1e6)
+    median = statistics.median(samples)
+    return {
+        "median_us": round(median, 2),
+        "min_us": round(min(samples), 2),
+        "stdev_us": round(statistics.stdev(samples), 2) if len(samples) > 1 else 0.0,
+        "ops_per_sec": round(1e6 / median, 1),
+        "operations": operations * loops,
+        "repeat": repeat
+    }
+
+def shape_cases(shape: str, documents: list, ingest_documents: list, workdir: Path):
+    """Yields (case name, function, operations) for one document shape"""
+    count = len(documents)
+    yield f"validate_json_structure/{shape}", lambda: [validate_json_structure(doc) for doc in documents], count
+    yield f"validate_json_data/{shape}", lambda: [validate_json_data(doc) for doc in documents], count
+
+    path = workdir / f"{shape}.json"
+    path.write_bytes(json_codec.dumps_bytes(documents))
+    yield f"process_json_file/{shape}", lambda: process_json_file(str(path)), count
+
+    # Ingest cases each get a fresh database
+    count = len(ingest_documents)
+    yield f"process_single_log/{shape}", lambda: [process_single_log(doc) for doc in ingest_documents], count
+    yield f"process_batch_logs/{shape}", lambda: process_batch_logs(ingest_documents), count
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "sqlite": sqlite3.sqlite_version,
+        "json_codec": json_codec.codec_name(),
+        "commit": commit,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec='seconds')
+    }
+
+def run_suite(quick: bool = False, only: str = None) -> dict:
+    """Returns: {"schema": int, "environment": {...}, "results": {case: timings}}"""
+    count, ingest_count, repeat = (50, 20, 3) if quick else (400, 100, 7)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for seed, (shape, params) in enumerate(SHAPES.items()):
+            scale = 10 if shape == "large" else 1
+            documents = varied_documents(max(5, count // scale), invalid_rate=INVALID_RATE, seed=seed, **params)
+            ingest_documents = documents[:max(5, ingest_count // scale)]
+            for name, func, operations in shape_cases(shape, documents, ingest_documents, workdir):
+                if only and only not in name:
+                    continue
+                app = make_app(workdir / f"{name.replace('/', '-')}.db")
+                with app.app_context():
+                    results[name] = measure(func, repeat, operations)
+    return {"schema": SCHEMA_VERSION, "environment": environment(), "results": results}
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Per-case ratio of current to baseline best time (>1 is slower); the
+    minimum is the least noisy statistic for in-process microbenchmarks
+    Returns: [(case, baseline_us, current_us, ratio, regressed)] for cases in both
+    """
+    rows = []
+    for name, timings in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = timings["min_us"] / previous["min_us"] if previous["min_us"] else float('inf')
+        rows.append((name, previous["min_us"], timings["min_us"], ratio, ratio > 1 + threshold))
+    return rows
+
+def write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(json_codec.dumps_bytes(data, sort_keys=True, indent=True) + b"\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help="Fewer documents and repeats (smoke run)")
+    parser.add_argument('--only', default=None, help="Run only cases whose name contains this")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    quiet_logging()
+    logging.disable(logging.ERROR)  # the invalid documents would log every rejection
+    current = run_suite(args.quick, args.only)
+    write_json(args.output, current)
+
+    print(f"{'case':<36} {'median us':>11} {'min us':>11} {'ops/sec':>11}")
+    for name, timings in current["results"].items():
+        print(f"{name:<36} {timings['median_us']:>11.1f} {timings['min_us']:>11.1f} {timings['ops_per_sec']:>11.1f}")
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, current)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("environment", {}).get("machine") != current["environment"]["machine"] \
+            or baseline.get("environment", {}).get("cpus") != current["environment"]["cpus"]:
+        print("warning: baseline was recorded on a different machine; ratios are only indicative")
+    rows = compare(current, baseline, args.threshold)
+    print(f"\n{'case':<36} {'base min us':>11} {'min us':>11} {'ratio':>7}")
+    for name, before, after, ratio, regressed in rows:
+        print(f"{name:<36} {before:>11.1f} {after:>11.1f} {ratio:>7.2f}{'  REGRESSION' if regressed else ''}")
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,668 @@
+"""
+Client for the JSON Log Processor API 1.0.0
+
+Generated from /swagger.json by app/client/generator.py; regenerate with
+`flask client generate` instead of editing.
+
+    client = Client("http://localhost:8000")
+    with LogBatcher(client) as batcher:
+        for document in documents:
+            batcher.submit(document)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypedDict, Union
+from urllib.parse import quote
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+    import json
+
+# Retried with backoff for idempotent methods
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# The only statuses retried for POST: the request was turned away before anything
+# was stored (the API answers 503 with Retry-After when its write queue is full)
+REJECTED_STATUSES = frozenset({429, 503})
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class ApiError(Exception):
+    """Non-2xx response; `body` is the decoded JSON error (or the raw text)"""
+
+    def __init__(self, status: int, body: Any, method: str, url: str):
+        self.status = status
+        self.body = body
+        self.method = method
+        self.url = url
+        detail = body.get('error', body) if isinstance(body, dict) else body
+        super().__init__(f"{method} {url} returned {status}: {detail}")
+
+class RetryPolicy(Retry):
+    """
+    Retry that never repeats a POST the server may have acted on
+    GETs are retried after connection and read errors and RETRY_STATUSES;
+    POSTs only after connection errors (nothing was sent) and
+    REJECTED_STATUSES, not after read timeouts, 502 or 504
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if not self._is_method_retryable(method):
+            return bool(self.total) and status_code in REJECTED_STATUSES
+        return super().is_retry(method, status_code, has_retry_after)
+
+class BaseClient:
+    """
+    Synchronous client over one pooled keep-alive requests.Session
+    Connections are reused across calls and threads (up to pool_size open
+    at once). Failed calls are retried up to `retries` times with
+    exponential backoff, honouring Retry-After, as far as RetryPolicy
+    allows. Bodies given as iterators cannot be replayed; pass bytes when
+    a streamed upload should be retried.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", *, timeout: float = 30.0,
+                 retries: int = 3, backoff: float = 0.2, pool_size: int = 10,
+                 headers: Optional[Dict[str, str]] = None, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = session or requests.Session()
+        retry = RetryPolicy(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True, raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def _call(self, method: str, path: str, *, path_params: Optional[Dict[str, Any]] = None,
+              query: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, Any]] = None,
+              body: Any = None, content_type: Optional[str] = None) -> Any:
+        if path_params:
+            path = path.format(**{name: quote(str(value), safe='') for name, value in path_params.items()})
+        url = self.base_url + path
+        params = {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in (query or {}).items() if value is not None
+        }
+        request_headers = {name: str(value) for name, value in (headers or {}).items() if value is not None}
+        data = None
+        if content_type == 'application/json':
+            data = _dumps(body)
+        elif content_type is not None:
+            data = body
+        if content_type is not None:
+            request_headers['Content-Type'] = content_type
+
+        response = self.session.request(method, url, params=params or None, data=data,
+                                        headers=request_headers or None, timeout=self.timeout)
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            result = _loads(response.content)
+        else:
+            result = response.text
+        if response.status_code >= 400:
+            raise ApiError(response.status_code, result, method, url)
+        return result
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class BaseAsyncClient:
+    """
+    asyncio client: each call runs the synchronous client in a thread pool
+    sized to its connection pool, so coroutines share the same keep-alive
+    connections and retry policy
+    """
+    client_class = BaseClient
+
+    def __init__(self, base_url: str = "http://localhost:8000", *,
+                 executor: Optional[ThreadPoolExecutor] = None, **client_options):
+        self.client = self.client_class(base_url, **client_options)
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(self.client.pool_size, thread_name_prefix="api-client")
+
+    async def _run(self, call, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(call, *args, **kwargs))
+
+    async def close(self) -> None:
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+def _batch_key(idempotency: bool) -> Optional[str]:
+    return uuid.uuid4().hex if idempotency else None
+
+class LogBatcher:
+    """
+    Buffers single log submissions and sends them as /api/batch/process calls
+    A batch goes out when it holds max_batch documents or its oldest
+    document has waited max_delay seconds, from `senders` background
+    threads. submit() returns a Future that resolves to the summary of the
+    batch that carried the document (or its exception); it blocks while
+    max_pending documents are unsent. Use as a context manager, or call
+    close(), to send what is left.
+    """
+
+    def __init__(self, client: BaseClient, max_batch: int = 100, max_delay: float = 0.05,
+                 max_pending: int = 10000, senders: int = 2, idempotency: bool = True):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_batch)
+        self.idempotency = idempotency
+        self._buffer: List[Tuple[Any, Future]] = []
+        self._oldest = 0.0
+        self._pending = 0  # buffered plus in flight
+        self._flushing = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"log-batcher-{i}", daemon=True)
+            for i in range(max(1, senders))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, document: Dict[str, Any]) -> Future:
+        future = Future()
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._pending < self.max_pending)
+            if self._closed:
+                raise RuntimeError("LogBatcher is closed")
+            self._buffer.append((document, future))
+            self._pending += 1
+            if len(self._buffer) == 1:
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            elif len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+        return future
+
+    def _take(self) -> Optional[List[Tuple[Any, Future]]]:
+        """Wait for the next batch to be due; None once closed and drained"""
+        with self._cond:
+            while True:
+                if self._buffer:
+                    if len(self._buffer) >= self.max_batch or self._closed or self._flushing:
+                        break
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+            batch = self._buffer[:self.max_batch]
+            del self._buffer[:self.max_batch]
+            if self._buffer:
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                result = self.client.process_batch([document for document, _ in batch],
+                                                   idempotency_key=_batch_key(self.idempotency))
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(result)
+            with self._cond:
+                self._pending -= len(batch)
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send everything submitted so far; returns whether it finished within timeout"""
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._pending == 0, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class AsyncLogBatcher:
+    """
+    LogBatcher for asyncio producers: `await submit(doc)` returns an
+    asyncio.Future resolving to the batch summary, waiting first while
+    max_pending documents are unsent. At most `senders` batches are in flight.
+    """
+
+    def __init__(self, client: BaseAsyncClient, max_batch: int = 100, max_delay: float = 0.05,
+                 max_pending: int = 10000, senders: int = 2, idempotency: bool = True):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.idempotency = idempotency
+        self._slots = asyncio.Semaphore(max(max_pending, max_batch))
+        self._senders = asyncio.Semaphore(max(1, senders))
+        self._buffer: List[Tuple[Any, asyncio.Future]] = []
+        self._oldest = 0.0
+        self._wakeup = asyncio.Event()
+        self._sending = set()
+        self._task = None
+        self._flushing = 0
+        self._closed = False
+
+    async def submit(self, document: Dict[str, Any]) -> asyncio.Future:
+        if self._closed:
+            raise RuntimeError("AsyncLogBatcher is closed")
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._buffer.append((document, future))
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        if len(self._buffer) == 1:
+            self._oldest = loop.time()
+            self._wakeup.set()
+        elif len(self._buffer) >= self.max_batch:
+            self._wakeup.set()
+        return future
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._buffer or not self._closed:
+            if not self._buffer:
+                await self._wait(None)
+                continue
+            remaining = self._oldest + self.max_delay - loop.time()
+            if len(self._buffer) < self.max_batch and not self._closed and not self._flushing and remaining > 0:
+                await self._wait(remaining)
+                continue
+            batch = self._buffer[:self.max_batch]
+            del self._buffer[:self.max_batch]
+            if self._buffer:
+                self._oldest = loop.time()
+            await self._senders.acquire()
+            task = loop.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            result = await self.client.process_batch([document for document, _ in batch],
+                                                     idempotency_key=_batch_key(self.idempotency))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._senders.release()
+            for _ in batch:
+                self._slots.release()
+
+    async def flush(self) -> None:
+        """Send everything submitted so far"""
+        self._flushing += 1
+        try:
+            while self._buffer or self._sending:
+                self._wakeup.set()
+                if self._sending:
+                    await asyncio.wait(set(self._sending))
+                else:
+                    await asyncio.sleep(0)
+        finally:
+            self._flushing -= 1
+
+    async def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        if self._sending:
+            await asyncio.wait(set(self._sending))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+# Schemas
+
+class Step(TypedDict):
+    step: int
+    description: str
+    pseudoCode: List[str]
+
+class Output(TypedDict):
+    steps: List[Step]
+
+class LogEntrySchema(TypedDict):
+    model: str
+    input: str
+    output: Output
+    response_time_seconds: float
+    timestamp: str
+
+class OutputContentSchema(TypedDict):
+    steps: List[Step]
+
+class StepContentSchema(TypedDict):
+    step: int
+    description: str
+    pseudoCode: List[str]
+
+class ProcessBatchResponse(TypedDict, total=False):
+    total_received: int
+    successfully_processed: int
+    validation_failed: int
+    processing_failed: int
+    duplicates: int
+    duplicate_ids: List[str]
+
+class HealthCheckResponse(TypedDict, total=False):
+    status: str
+    total_logs_processed: int
+    total_validation_errors: int
+
+class IngestStreamResponse(TypedDict, total=False):
+    total_received: int
+    accepted: int
+    rejected: int
+    rejected_lines: List[int]
+    rejected_lines_truncated: bool
+
+class GetJobResponse(TypedDict, total=False):
+    id: str
+    status: str
+    accepted: int
+    written: int
+    write_failed: int
+    write_unknown: int
+
+class ListLogEntriesResponse(TypedDict, total=False):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    limit: int
+
+class SearchLogEntriesResponse(TypedDict, total=False):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    limit: int
+
+class GetStatsResponse(TypedDict, total=False):
+    total_logs_processed: int
+    total_validation_errors: int
+    last_processed: str
+    models: Dict[str, Any]
+    status: str
+
+class GetLatencyResponse(TypedDict, total=False):
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    models: Dict[str, Any]
+
+class ValidateLogResponse(TypedDict, total=False):
+    valid: bool
+    id: str
+    message: str
+    duplicate: bool
+
+BatchRequest = List[LogEntrySchema]
+
+class Client(BaseClient):
+    """Typed client, one method per API operation"""
+
+    def process_batch(self, body: BatchRequest, *, idempotency_key: Optional[str] = None) -> ProcessBatchResponse:
+        """Process multiple JSON log entries
+
+        POST /api/batch/process
+
+        idempotency_key: Applied per entry position; retries return the original entry ids (when idempotency is enabled)
+        """
+        return self._call('POST', '/api/batch/process', headers={'Idempotency-Key': idempotency_key}, body=body, content_type='application/json')
+
+    def get_errors(self, *, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Retrieve recent validation errors
+
+        GET /api/errors
+
+        limit: Maximum number of records to return
+        """
+        return self._call('GET', '/api/errors', query={'limit': limit})
+
+    def get_error(self, error_id: str) -> Any:
+        """Retrieve a validation error with its decompressed payload snapshot
+
+        GET /api/errors/{error_id}
+        """
+        return self._call('GET', '/api/errors/{error_id}', path_params={'error_id': error_id})
+
+    def health_check(self) -> HealthCheckResponse:
+        """Check API health status
+
+        GET /api/health
+        """
+        return self._call('GET', '/api/health')
+
+    def ingest_stream(self, body: Union[bytes, str, Iterable[bytes]]) -> IngestStreamResponse:
+        """Stream NDJSON log entries
+
+        POST /api/ingest/stream
+        """
+        return self._call('POST', '/api/ingest/stream', body=body, content_type='application/x-ndjson')
+
+    def get_job(self, job_id: str) -> GetJobResponse:
+        """Retrieve asynchronous job progress
+
+        GET /api/jobs/{job_id}
+        """
+        return self._call('GET', '/api/jobs/{job_id}', path_params={'job_id': job_id})
+
+    def list_log_entries(self, *, model: Optional[str] = None, since: Optional[Union[str, datetime]] = None, until: Optional[Union[str, datetime]] = None, min_response_time: Optional[float] = None, max_response_time: Optional[float] = None, cursor: Optional[str] = None, limit: Optional[int] = None) -> ListLogEntriesResponse:
+        """List log entries, newest first
+
+        GET /api/logs
+
+        since: Inclusive lower bound on timestamp
+        until: Exclusive upper bound on timestamp
+        limit: Maximum number of records to return
+        """
+        return self._call('GET', '/api/logs', query={'model': model, 'since': since, 'until': until, 'min_response_time': min_response_time, 'max_response_time': max_response_time, 'cursor': cursor, 'limit': limit})
+
+    def get_log_entry(self, entry_id: str) -> Any:
+        """Retrieve a log entry with its steps
+
+        GET /api/logs/{entry_id}
+        """
+        return self._call('GET', '/api/logs/{entry_id}', path_params={'entry_id': entry_id})
+
+    def search_log_entries(self, *, q: str, model: Optional[str] = None, cursor: Optional[str] = None, limit: Optional[int] = None) -> SearchLogEntriesResponse:
+        """Search prompts, step descriptions and pseudo-code
+
+        GET /api/search
+        """
+        return self._call('GET', '/api/search', query={'q': q, 'model': model, 'cursor': cursor, 'limit': limit})
+
+    def get_stats(self) -> GetStatsResponse:
+        """Retrieve processing statistics
+
+        GET /api/stats
+        """
+        return self._call('GET', '/api/stats')
+
+    def get_latency(self, *, model: Optional[str] = None, from_: Optional[Union[str, datetime]] = None, to: Optional[Union[str, datetime]] = None) -> GetLatencyResponse:
+        """Retrieve p50/p95/p99 response times
+
+        GET /api/stats/latency
+        """
+        return self._call('GET', '/api/stats/latency', query={'model': model, 'from': from_, 'to': to})
+
+    def validate_log(self, body: LogEntrySchema, *, idempotency_key: Optional[str] = None) -> ValidateLogResponse:
+        """Validate a single JSON log entry
+
+        POST /api/validate
+
+        idempotency_key: Retries with the same key return the original entry id (when idempotency is enabled)
+        """
+        return self._call('POST', '/api/validate', headers={'Idempotency-Key': idempotency_key}, body=body, content_type='application/json')
+
+class AsyncClient(BaseAsyncClient):
+    """asyncio variant of Client"""
+    client_class = Client
+
+    async def process_batch(self, body: BatchRequest, *, idempotency_key: Optional[str] = None) -> ProcessBatchResponse:
+        """Process multiple JSON log entries
+
+        POST /api/batch/process
+
+        idempotency_key: Applied per entry position; retries return the original entry ids (when idempotency is enabled)
+        """
+        return await self._run(self.client.process_batch, body, idempotency_key=idempotency_key)
+
+    async def get_errors(self, *, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Retrieve recent validation errors
+
+        GET /api/errors
+
+        limit: Maximum number of records to return
+        """
+        return await self._run(self.client.get_errors, limit=limit)
+
+    async def get_error(self, error_id: str) -> Any:
+        """Retrieve a validation error with its decompressed payload snapshot
+
+        GET /api/errors/{error_id}
+        """
+        return await self._run(self.client.get_error, error_id)
+
+    async def health_check(self) -> HealthCheckResponse:
+        """Check API health status
+
+        GET /api/health
+        """
+        return await self._run(self.client.health_check)
+
+    async def ingest_stream(self, body: Union[bytes, str, Iterable[bytes]]) -> IngestStreamResponse:
+        """Stream NDJSON log entries
+
+        POST /api/ingest/stream
+        """
+        return await self._run(self.client.ingest_stream, body)
+
+    async def get_job(self, job_id: str) -> GetJobResponse:
+        """Retrieve asynchronous job progress
+
+        GET /api/jobs/{job_id}
+        """
+        return await self._run(self.client.get_job, job_id)
+
+    async def list_log_entries(self, *, model: Optional[str] = None, since: Optional[Union[str, datetime]] = None, until: Optional[Union[str, datetime]] = None, min_response_time: Optional[float] = None, max_response_time: Optional[float] = None, cursor: Optional[str] = None, limit: Optional[int] = None) -> ListLogEntriesResponse:
+        """List log entries, newest first
+
+        GET /api/logs
+
+        since: Inclusive lower bound on timestamp
+        until: Exclusive upper bound on timestamp
+        limit: Maximum number of records to return
+        """
+        return await self._run(self.client.list_log_entries, model=model, since=since, until=until, min_response_time=min_response_time, max_response_time=max_response_time, cursor=cursor, limit=limit)
+
+    async def get_log_entry(self, entry_id: str) -> Any:
+        """Retrieve a log entry with its steps
+
+        GET /api/logs/{entry_id}
+        """
+        return await self._run(self.client.get_log_entry, entry_id)
+
+    async def search_log_entries(self, *, q: str, model: Optional[str] = None, cursor: Optional[str] = None, limit: Optional[int] = None) -> SearchLogEntriesResponse:
+        """Search prompts, step descriptions and pseudo-code
+
+        GET /api/search
+        """
+        return await self._run(self.client.search_log_entries, q=q, model=model, cursor=cursor, limit=limit)
+
+    async def get_stats(self) -> GetStatsResponse:
+        """Retrieve processing statistics
+
+        GET /api/stats
+        """
+        return await self._run(self.client.get_stats)
+
+    async def get_latency(self, *, model: Optional[str] = None, from_: Optional[Union[str, datetime]] = None, to: Optional[Union[str, datetime]] = None) -> GetLatencyResponse:
+        """Retrieve p50/p95/p99 response times
+
+        GET /api/stats/latency
+        """
+        return await self._run(self.client.get_latency, model=model, from_=from_, to=to)
+
+    async def validate_log(self, body: LogEntrySchema, *, idempotency_key: Optional[str] = None) -> ValidateLogResponse:
+        """Validate a single JSON log entry
+
+        POST /api/validate
+
+        idempotency_key: Retries with the same key return the original entry id (when idempotency is enabled)
+        """
+        return await self._run(self.client.validate_log, body, idempotency_key=idempotency_key)
@@ -0,0 +1,25 @@
+import pytest
+from flask import Flask
+from app.models.database import db, init_db
+from app.routes.api import api
+
+@pytest.fixture
+def app(tmp_path):
+    """Flask app bound to a throwaway SQLite database"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        TESTING=True,
+        INGEST_CHUNK_SIZE=2
+    )
+    init_db(app)
+    app.register_blueprint(api, url_prefix='/api')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
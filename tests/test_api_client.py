@@ -0,0 +1,125 @@
+import asyncio
+import importlib.util
+import json
+import threading
+import warnings
+from pathlib import Path
+import pytest
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+from app.client.generator import generate_client
+from app.swagger_config import build_apispec
+
+ROOT = Path(__file__).resolve().parent.parent
+CLIENT_PATH = ROOT / "clients" / "json_logs_client.py"
+
+with open(ROOT / "source.json") as f:
+    TEST_DATA = json.load(f)
+
+def load_client():
+    spec = importlib.util.spec_from_file_location("json_logs_client", CLIENT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def serve():
+    """Serve a Flask app over real HTTP in a background thread; yields its base URL"""
+    servers = []
+    def start(app):
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def test_committed_client_matches_the_spec(app):
+    """Test clients/json_logs_client.py is what the generator makes from the current spec"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        spec = build_apispec(app).to_dict()
+
+    assert CLIENT_PATH.read_text() == generate_client(spec)
+    assert {"validate_log", "process_batch", "get_job"} <= {
+        operation["operationId"] for item in spec["paths"].values() for operation in item.values()
+    }
+
+def test_batcher_sends_single_documents_as_batches(app, serve):
+    """Test submitted documents reach /api/batch/process in max_batch sized calls"""
+    module = load_client()
+    client = module.Client(serve(app))
+    calls = []
+    process_batch = client.process_batch
+    client.process_batch = lambda body, **kwargs: calls.append((len(body), kwargs)) or process_batch(body, **kwargs)
+
+    with module.LogBatcher(client, max_batch=10, max_delay=5) as batcher:
+        futures = [batcher.submit(TEST_DATA) for _ in range(25)]
+        assert batcher.flush(timeout=10)
+
+    assert sorted(size for size, _ in calls) == [5, 10, 10]
+    assert len({kwargs["idempotency_key"] for _, kwargs in calls}) == 3
+    assert sum(future.result()["successfully_processed"] for future in futures[::10]) == 25
+    assert client.health_check()["total_logs_processed"] == 25
+    with pytest.raises(module.ApiError) as error:
+        client.validate_log({"model": "x"})
+    assert error.value.status == 422
+
+def test_async_batcher(app, serve):
+    """Test the asyncio client and batcher deliver every document"""
+    module = load_client()
+    base_url = serve(app)
+
+    async def produce():
+        async with module.AsyncClient(base_url) as client:
+            async with module.AsyncLogBatcher(client, max_batch=8, max_delay=0.01) as batcher:
+                futures = [await batcher.submit(TEST_DATA) for _ in range(20)]
+            results = await asyncio.gather(*futures)
+            return results, await client.get_stats()
+
+    results, stats = asyncio.run(produce())
+    assert len(results) == 20 and all(result["total_received"] in (4, 8) for result in results)
+    assert stats["total_logs_processed"] == 20
+
+def test_retries_are_bounded_and_honour_retry_after(serve):
+    """Test 503s are retried up to `retries` times before surfacing as ApiError"""
+    module = load_client()
+    flaky = Flask(__name__)
+    attempts = []
+    @flaky.route('/api/health')
+    def health():
+        attempts.append(1)
+        if len(attempts) <= 2:
+            return jsonify({"error": "busy"}), 503, {"Retry-After": "0"}
+        return jsonify({"status": "healthy"})
+    base_url = serve(flaky)
+
+    assert module.Client(base_url, retries=2, backoff=0).health_check() == {"status": "healthy"}
+    assert len(attempts) == 3
+
+    attempts.clear()
+    with pytest.raises(module.ApiError) as error:
+        module.Client(base_url, retries=1, backoff=0).health_check()
+    assert error.value.status == 503 and error.value.body == {"error": "busy"}
+    assert len(attempts) == 2
+
+def test_posts_are_only_retried_when_the_server_turned_them_away(serve):
+    """Test a POST is retried after 503 but not after a 502 it may have been processed behind"""
+    module = load_client()
+    flaky = Flask(__name__)
+    statuses = []
+    @flaky.route('/api/validate', methods=['POST'])
+    def validate():
+        status = statuses.pop(0)
+        return jsonify({"valid": status == 200}), status
+    client = module.Client(serve(flaky), retries=3, backoff=0)
+
+    statuses[:] = [503, 200]
+    assert client.validate_log(TEST_DATA) == {"valid": True}
+    assert statuses == []
+
+    statuses[:] = [502, 200]
+    with pytest.raises(module.ApiError) as error:
+        client.validate_log(TEST_DATA)
+    assert error.value.status == 502 and statuses == [200]
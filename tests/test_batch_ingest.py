@@ -0,0 +1,146 @@
+import json
+import copy
+from pathlib import Path
+from unittest import mock
+import pytest
+from sqlalchemy import event
+from app.models.database import (
+    db, LogEntry, PseudoCodeCollisionError, PseudoCodeLine, Step, ValidationError, store_pseudo_code
+)
+from app.services.batch_ingest import BatchIngestor
+from app.services.log_processor import process_batch_logs, process_single_log
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def make_invalid():
+    data = copy.deepcopy(TEST_DATA)
+    data['response_time_seconds'] = -1
+    return data
+
+def test_process_single_log_persists_entry(app):
+    """Test a valid entry is written and its id returned"""
+    success, result = process_single_log(TEST_DATA)
+    assert success, result
+    assert db.session.get(LogEntry, result['id']) is not None
+
+def test_batch_writes_entries_and_errors(app):
+    """Test accepted and rejected entries are written across chunks"""
+    batch = [TEST_DATA, make_invalid(), TEST_DATA, TEST_DATA, make_invalid()]
+    summary = process_batch_logs(batch)
+
+    assert summary['total_received'] == 5
+    assert summary['successfully_processed'] == 3
+    assert summary['processing_failed'] == 2
+    assert LogEntry.query.count() == 3
+    assert ValidationError.query.count() == 2
+    assert "Response time must be positive" in summary['failed_entries'][0]['errors'][0]['message']
+
+def test_failed_chunk_is_isolated(app, monkeypatch):
+    """Test a chunk that fails to commit does not affect other chunks"""
+    import app.services.batch_ingest as batch_ingest
+    real_write_rows = batch_ingest.write_rows
+    calls = []
+
+    def flaky_write_rows(rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError("disk I/O error")
+        return real_write_rows(rows)
+
+    monkeypatch.setattr(batch_ingest, 'write_rows', flaky_write_rows)
+    ingestor = BatchIngestor(chunk_size=2)
+    for position in range(6):
+        ingestor.add(TEST_DATA, position)
+    summary = ingestor.close()
+
+    assert summary['accepted'] == 4
+    assert summary['rejected'] == 2
+    assert summary['chunks_failed'] == 1
+    assert ingestor.rejected_positions == [2, 3]
+    assert LogEntry.query.count() == 4
+    assert ValidationError.query.filter_by(error_type="ProcessingError").count() == 2
+
+def test_failed_chunk_keeps_its_validation_errors(app, monkeypatch):
+    """Test rejected documents of a chunk that fails to commit still get their error rows"""
+    import app.services.batch_ingest as batch_ingest
+    real_write_rows = batch_ingest.write_rows
+    calls = []
+
+    def failing_first_write(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("disk I/O error")
+        return real_write_rows(rows)
+
+    monkeypatch.setattr(batch_ingest, 'write_rows', failing_first_write)
+    summary = process_batch_logs([TEST_DATA, make_invalid()])
+
+    assert summary['processing_failed'] == 2
+    assert ValidationError.query.filter_by(error_type="ProcessingError").count() == 1
+    assert ValidationError.query.filter_by(error_type="ValidationError").count() == 1
+
+def test_steps_share_pseudo_code_lines(app):
+    """Test steps are stored with each entry and identical lines are stored once"""
+    process_batch_logs([TEST_DATA, TEST_DATA, TEST_DATA])
+
+    steps_per_entry = len(TEST_DATA['output']['steps'])
+    distinct_lines = {line for step in TEST_DATA['output']['steps'] for line in step['pseudoCode']}
+    assert Step.query.count() == 3 * steps_per_entry
+    assert PseudoCodeLine.query.count() == len(distinct_lines)
+
+    entry = LogEntry.query.first()
+    stored = sorted(entry.steps, key=lambda step: step.step_number)
+    assert [step.pseudo_code for step in stored] == [
+        step['pseudoCode'] for step in TEST_DATA['output']['steps']
+    ]
+
+def test_step_lines_resolve_in_one_lookup(app):
+    """Test steps resolve their lines together and legacy steps holding text still read back"""
+    process_batch_logs([TEST_DATA])
+    entry = LogEntry.query.first()
+    db.session.add(Step(log_entry_id=entry.id, step_number=99, description="legacy",
+                        pseudo_code_hashes=["print('stored as text')"]))
+    db.session.commit()
+
+    steps = Step.query.filter_by(log_entry_id=entry.id).order_by(Step.step_number).all()
+    lookups = []
+    def count(conn, cursor, statement, *args):
+        if 'pseudo_code_lines' in statement:
+            lookups.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        pseudo_code = [step.pseudo_code for step in steps]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(lookups) == 1
+    assert pseudo_code == [step['pseudoCode'] for step in TEST_DATA['output']['steps']] + [["print('stored as text')"]]
+
+def test_step_accepts_pseudo_code_text(app):
+    """Test Step(pseudo_code=[...]) and add_step still take text and store it content-addressed"""
+    process_batch_logs([TEST_DATA])
+    entry = LogEntry.query.first()
+    db.session.add(Step(log_entry_id=entry.id, step_number=98, description="direct", pseudo_code=["x = 1", "import json"]))
+    entry.add_step(99, "helper", ["x = 1"])
+    db.session.commit()
+    db.session.expunge_all()
+
+    steps = Step.query.filter(Step.step_number >= 98).order_by(Step.step_number).all()
+    assert [step.pseudo_code for step in steps] == [["x = 1", "import json"], ["x = 1"]]
+    assert all(isinstance(h, int) for step in steps for h in step.pseudo_code_hashes)
+    assert PseudoCodeLine.query.filter(PseudoCodeLine.text == "x = 1").count() == 1
+
+def test_hash_collisions_are_refused(app):
+    """Test a line whose hash is taken by a different text is an error, not silently aliased"""
+    with mock.patch('app.models.database.line_hash', return_value=7):
+        with pytest.raises(PseudoCodeCollisionError):
+            store_pseudo_code(["x = 1", "y = 2"])
+        assert store_pseudo_code(["x = 1"]) == [7]
+        db.session.commit()
+        assert store_pseudo_code(["x = 1"]) == [7]
+        with pytest.raises(PseudoCodeCollisionError):
+            store_pseudo_code(["y = 2"])
+    db.session.rollback()
+    assert db.session.get(PseudoCodeLine, 7).text == "x = 1"
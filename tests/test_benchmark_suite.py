@@ -0,0 +1,30 @@
+from benchmarks.common import INVALID_MUTATIONS, varied_documents
+from benchmarks.suite import compare
+from app.schemas.validators import validate_json_data
+
+def test_varied_documents_are_reproducible_and_shaped():
+    """Test the generator is seeded and respects the step / line bounds"""
+    documents = varied_documents(20, steps=(2, 4), code_lines=(1, 3), line_chars=(10, 30), seed=7)
+
+    assert documents == varied_documents(20, steps=(2, 4), code_lines=(1, 3), line_chars=(10, 30), seed=7)
+    for doc in documents:
+        assert 2 <= len(doc['output']['steps']) <= 4
+        for step in doc['output']['steps']:
+            assert 1 <= len(step['pseudoCode']) <= 3
+            assert all(len(line) <= 30 for line in step['pseudoCode'])
+    assert all(validate_json_data(doc)[0] for doc in documents)
+
+def test_invalid_rate_breaks_documents():
+    """Test every document drawn as invalid fails validation"""
+    documents = varied_documents(len(INVALID_MUTATIONS) * 3, invalid_rate=1.0)
+
+    assert not any(validate_json_data(doc)[0] for doc in documents)
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    """Test regressions are judged on best times and unknown cases are skipped"""
+    baseline = {"results": {"a": {"min_us": 10.0}, "b": {"min_us": 10.0}}}
+    current = {"results": {"a": {"min_us": 12.0}, "b": {"min_us": 14.0}, "new": {"min_us": 1.0}}}
+
+    rows = compare(current, baseline, threshold=0.25)
+
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [("a", False), ("b", True)]
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from flask import Flask
+from sqlalchemy import inspect
+from app.models.database import create_schema, db, init_db, schema_exists
+from app.swagger_config import get_apispec
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_importing_main_has_no_side_effects(tmp_path):
+    """Test importing app.main creates no app, files, threads or log handlers"""
+    probe = (
+        "import json, logging, sys, threading\n"
+        "import app.main\n"
+        "print(json.dumps({'app_created': app.main._app is not None,\n"
+        "                  'threads': threading.active_count(),\n"
+        "                  'root_handlers': len(logging.getLogger().handlers),\n"
+        "                  'spec_imported': 'apispec' in sys.modules}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(ROOT), LOG_DIR=str(tmp_path / "logs"))
+    result = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout) == {
+        "app_created": False, "threads": 1, "root_handlers": 0, "spec_imported": False
+    }
+    assert os.listdir(tmp_path) == []
+
+def test_schema_creation_is_a_separate_step(tmp_path):
+    """Test SCHEMA_AUTO_CREATE off leaves the database alone until create_schema runs"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'lazy.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SCHEMA_AUTO_CREATE=False
+    )
+    init_db(app)
+    with app.app_context():
+        assert not schema_exists()
+        assert inspect(db.engine).get_table_names() == []
+
+        create_schema()
+        assert schema_exists()
+        assert 'log_entries' in inspect(db.engine).get_table_names()
+        db.session.remove()
+        db.engine.dispose()
+
+def test_spec_is_built_once():
+    """Test the OpenAPI spec is memoized after the first call"""
+    spec = get_apispec()
+
+    assert get_apispec() is spec
+    assert "LogEntrySchema" in spec.to_dict()["components"]["schemas"]
@@ -0,0 +1,99 @@
+import copy
+import json
+import math
+import random
+from pathlib import Path
+import pytest
+from marshmallow import ValidationError
+from app.schemas.compiled import compile_schema
+from app.schemas.validators import (
+    LogEntrySchema,
+    OutputSchema,
+    StepSchema,
+    configure_validator,
+    validate_json_data
+)
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+ODD_VALUES = [
+    None, True, False, 0, 1, -1, 7, 2 ** 64, 1.5, -0.0, 0.1, math.nan, math.inf, -math.inf,
+    "", " ", "  x ", "12", "1.5", "nan", "2024-12-07T11:58:11", "2024-12-07", "2024-12-07T11:58:11Z",
+    "2024-12-07 11:58:11.1+05:30", "3024-01-01T00:00:00", "not a date", b"bytes", b"\xff",
+    [], [1], ["a", "b"], [None], {}, {"step": 1}, (1, 2),
+]
+
+def run(loader, data):
+    """Normalise a load into a comparable outcome"""
+    try:
+        return "ok", loader(data)
+    except ValidationError as e:
+        return "invalid", e.messages
+    except Exception as e:
+        return "raised", (type(e).__name__, str(e))
+
+def paths(value, prefix=()):
+    """Every container path in a document"""
+    yield prefix
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from paths(child, prefix + (key,))
+    elif isinstance(value, list):
+        for idx, child in enumerate(value):
+            yield from paths(child, prefix + (idx,))
+
+def mutate(doc, rng):
+    doc = copy.deepcopy(doc)
+    for _ in range(rng.randint(1, 3)):
+        candidates = [p for p in paths(doc) if p]
+        if not candidates:
+            break
+        path = rng.choice(candidates)
+        parent = doc
+        for key in path[:-1]:
+            parent = parent[key]
+        action = rng.random()
+        if action < 0.2 and isinstance(parent, dict):
+            del parent[path[-1]]
+        elif action < 0.3 and isinstance(parent, list):
+            parent.append(copy.deepcopy(rng.choice(parent)) if parent else None)
+        else:
+            parent[path[-1]] = copy.deepcopy(rng.choice(ODD_VALUES))
+    return doc
+
+def documents(count, seed=1234):
+    rng = random.Random(seed)
+    yield TEST_DATA
+    for _ in range(count):
+        yield mutate(TEST_DATA, rng)
+
+@pytest.mark.parametrize("schema_cls", [LogEntrySchema, OutputSchema, StepSchema])
+def test_compiled_matches_marshmallow_on_odd_values(schema_cls):
+    """Test top-level odd values give identical outcomes"""
+    compiled = compile_schema(schema_cls)
+    for value in ODD_VALUES + [TEST_DATA, TEST_DATA['output'], TEST_DATA['output']['steps'][0]]:
+        assert run(compiled, value) == run(schema_cls().load, value), value
+
+def test_compiled_matches_marshmallow_on_mutations():
+    """Differential test over randomly mutated log entries"""
+    compiled = compile_schema(LogEntrySchema)
+    reference = LogEntrySchema()
+    outcomes = set()
+    for doc in documents(3000):
+        expected = run(reference.load, doc)
+        assert run(compiled, doc) == expected, doc
+        outcomes.add(expected[0])
+    assert outcomes == {"ok", "invalid", "raised"}
+
+@pytest.mark.parametrize("backend", ["marshmallow", "compiled"])
+def test_validate_json_data_backends_agree(backend):
+    """Test validate_json_data output does not depend on the backend"""
+    try:
+        configure_validator("marshmallow")
+        expected = [validate_json_data(doc) for doc in documents(300, seed=99)]
+        configure_validator(backend)
+        assert [validate_json_data(doc) for doc in documents(300, seed=99)] == expected
+    finally:
+        configure_validator()
@@ -0,0 +1,128 @@
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+from app.commands import register_commands
+from app.database.writer import WriteTimeoutError
+from app.models.database import db, ValidationError, VALIDATION_ERRORS_COUNTER, read_counters
+from app.services.error_store import ErrorBuffer, prune_validation_errors
+from app.services.log_processor import get_error, get_recent_errors, process_batch_logs
+from app.utils.metrics import VALIDATION_ERRORS_DROPPED
+from app.utils.snapshot import bound_snapshot, expand_snapshot
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def invalid_document(padding=0):
+    return dict(TEST_DATA, response_time_seconds=-1, padding="x" * padding)
+
+def error_count():
+    return read_counters().get(VALIDATION_ERRORS_COUNTER, (0, None))[0]
+
+def test_bound_snapshot_compresses_then_truncates():
+    """Test small payloads pass through, repetitive ones compress and the rest are truncated"""
+    small = {"a": 1}
+    assert bound_snapshot(small, 1024) is small
+
+    repetitive = {"text": "abc" * 10000}
+    packed = bound_snapshot(repetitive, 1024)
+    assert packed["_snapshot"] == "zlib"
+    assert len(json.dumps(packed)) <= 1024
+    assert expand_snapshot(packed) == repetitive
+
+    noisy = {"values": [str(i * 7919 % 100003) for i in range(5000)]}
+    truncated = bound_snapshot(noisy, 1024)
+    assert truncated["_snapshot"] == "truncated"
+    assert len(json.dumps(truncated).encode()) <= 1024
+    assert expand_snapshot(truncated) is truncated
+
+def test_batch_errors_store_bounded_snapshots(app):
+    """Test rejected documents keep at most ERROR_SNAPSHOT_MAX_BYTES of payload"""
+    app.config['ERROR_SNAPSHOT_MAX_BYTES'] = 2048
+    process_batch_logs([invalid_document(padding=100000)])
+
+    stored = ValidationError.query.one().data_snapshot
+    assert len(json.dumps(stored)) <= 2048
+    recent = get_recent_errors(1)[0]
+    assert recent["data"] == stored and recent["data"]["_snapshot"] == "zlib"
+    assert get_error(recent["id"])["data"]["data"]["padding"] == "x" * 100000
+
+def test_error_detail_endpoint_expands_one_snapshot(app, client):
+    """Test /api/errors stays bounded and /api/errors/<id> returns the full payload"""
+    app.config['ERROR_SNAPSHOT_MAX_BYTES'] = 2048
+    process_batch_logs([invalid_document(padding=100000)])
+
+    listed = client.get('/api/errors').get_json()[0]
+    assert len(json.dumps(listed["data"])) <= 2048
+    detail = client.get(f"/api/errors/{listed['id']}")
+    assert detail.status_code == 200 and detail.get_json()["data"]["data"]["padding"] == "x" * 100000
+    assert client.get('/api/errors/missing').status_code == 404
+
+def test_error_buffer_writes_in_batches(app):
+    """Test buffered errors are written together and only once flushed"""
+    error_buffer = ErrorBuffer(app, batch_size=100, flush_interval=60)
+    app.extensions['error_buffer'] = error_buffer
+    try:
+        for i in range(5):
+            ValidationError.log_error("ValidationError", f"bad {i}", {"i": i})
+        assert ValidationError.query.count() == 0
+
+        assert error_buffer.flush() == 5
+        assert ValidationError.query.count() == 5
+        assert error_count() == 5
+    finally:
+        del app.extensions['error_buffer']
+
+def test_failed_flushes_keep_errors_up_to_the_cap(app):
+    """Test rows from a failed write are retried, only the oldest beyond max_rows are dropped, and a timed-out write is not repeated"""
+    error_buffer = ErrorBuffer(app, batch_size=2, flush_interval=60, max_rows=3)
+    app.extensions['error_buffer'] = error_buffer
+    dropped = lambda: sum(value for _, value in VALIDATION_ERRORS_DROPPED.snapshot())
+    insert_rows = ValidationError.insert_rows
+    def commit_then_time_out(rows):
+        insert_rows(rows)
+        raise WriteTimeoutError("slow")
+    before = dropped()
+    try:
+        with mock.patch.object(ValidationError, 'insert_rows', side_effect=RuntimeError("locked")):
+            for i in range(2):
+                ValidationError.log_error("ValidationError", f"bad {i}")
+            assert error_buffer.flush() == 0
+            for i in range(2, 4):
+                ValidationError.log_error("ValidationError", f"bad {i}")
+            assert error_buffer.flush() == 0
+        assert dropped() - before == 1
+
+        with mock.patch.object(ValidationError, 'insert_rows', side_effect=commit_then_time_out):
+            assert error_buffer.flush() == 0
+        assert error_buffer.flush() == 0
+        assert sorted(row.error_message for row in ValidationError.query) == ["bad 1", "bad 2", "bad 3"]
+        assert error_count() == 3
+    finally:
+        del app.extensions['error_buffer']
+
+def test_prune_by_age_and_count(app):
+    """Test retention deletes old rows, then the oldest beyond the cap, in chunks"""
+    process_batch_logs([invalid_document() for _ in range(10)])
+    old = datetime.utcnow() - timedelta(days=40)
+    ids = [row.id for row in ValidationError.query.order_by(ValidationError.id).limit(3)]
+    db.session.execute(
+        ValidationError.__table__.update().where(ValidationError.id.in_(ids)).values(created_at=old)
+    )
+    db.session.commit()
+
+    assert prune_validation_errors(max_age_days=30, chunk_size=2) == 3
+    assert prune_validation_errors(max_rows=4, chunk_size=2) == 3
+    assert ValidationError.query.count() == error_count() == 4
+
+def test_prune_command(app):
+    """Test the CLI prunes with explicit limits"""
+    register_commands(app)
+    process_batch_logs([invalid_document() for _ in range(3)])
+
+    result = app.test_cli_runner().invoke(args=['errors', 'prune', '--max-rows', '1'])
+
+    assert result.exit_code == 0, result.output
+    assert "Deleted 2 validation errors" in result.output
+    assert ValidationError.query.count() == 1
@@ -0,0 +1,36 @@
+import argparse
+import pytest
+from benchmarks.bench_http_load import EndpointStats, build_payloads, parse_mix, summarize
+
+def test_parse_mix_weights_and_rejects_unknown_endpoints():
+    """Test the mix spec parses weights and refuses unknown or empty mixes"""
+    assert parse_mix("validate=8, batch=1,upload") == {"validate": 8.0, "batch": 1.0, "upload": 1.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("health=1")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("validate=0")
+
+def test_payloads_are_serialized_per_endpoint():
+    """Test batch bodies carry batch_size documents and uploads are NDJSON files"""
+    payloads = build_payloads({"batch": 1, "upload": 1}, batch_size=5, upload_size=3, invalid_rate=0)
+
+    kwargs, documents = payloads["batch"][0]
+    assert documents == 5 and kwargs["data"].startswith(b"[")
+    kwargs, documents = payloads["upload"][0]
+    filename, body, _ = kwargs["files"]["file"]
+    assert filename.endswith(".ndjson") and len(body.splitlines()) == documents == 3
+
+def test_summary_counts_errors_and_percentiles():
+    """Test unexpected statuses count as errors and latencies are reported in ms"""
+    stats = EndpointStats()
+    for latency, status in [(0.010, 200), (0.020, 200), (0.030, 500), (0.040, None)]:
+        stats.latency.add(latency)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+    stats.errors = 2
+
+    row = summarize({"validate": stats}, duration=2.0)["validate"]
+
+    assert row["requests"] == 4 and row["rps"] == 2.0
+    assert row["error_rate"] == 0.5
+    assert row["p50_ms"] == pytest.approx(20, rel=0.05)
+    assert row["max_ms"] == 40.0
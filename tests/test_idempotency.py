@@ -0,0 +1,79 @@
+import json
+import copy
+import sqlite3
+from pathlib import Path
+from flask import Flask
+from sqlalchemy import inspect
+from app.models.database import db, init_db, LogEntry, Step
+from app.services.log_processor import process_batch_logs, process_single_log
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def variant(i):
+    doc = copy.deepcopy(TEST_DATA)
+    doc['input'] = f"{doc['input']} #{i}"
+    return doc
+
+def test_repeated_entry_returns_original_id(app):
+    """Test a retried document is not written twice"""
+    app.config['IDEMPOTENCY_ENABLED'] = True
+    _, first = process_single_log(TEST_DATA)
+    # Key order does not change the canonical hash
+    success, second = process_single_log(dict(reversed(list(TEST_DATA.items()))))
+
+    assert success and second['duplicate']
+    assert second['id'] == first['id']
+    assert LogEntry.query.count() == 1
+    assert Step.query.count() == len(TEST_DATA['output']['steps'])
+
+def test_idempotency_key_header(client, app):
+    """Test the Idempotency-Key header identifies a retry with changed content"""
+    app.config['IDEMPOTENCY_ENABLED'] = True
+    headers = {'Idempotency-Key': 'retry-1'}
+    first = client.post('/api/validate', json=variant(1), headers=headers).get_json()
+    second = client.post('/api/validate', json=variant(2), headers=headers).get_json()
+
+    assert second['id'] == first['id']
+    assert LogEntry.query.count() == 1
+
+def test_batch_duplicates_are_checked_in_bulk(app):
+    """Test duplicates within a batch and against stored rows"""
+    app.config['IDEMPOTENCY_ENABLED'] = True
+    process_single_log(variant(0))
+    summary = process_batch_logs([variant(0), variant(1), variant(1), variant(2)])
+
+    assert summary['successfully_processed'] == 4
+    assert summary['duplicates'] == 2
+    ids = [entry['id'] for entry in summary['processed_entries']]
+    assert ids[1] == ids[2]
+    assert summary['duplicate_ids'] == [ids[0], ids[1]]
+    assert LogEntry.query.count() == 3
+
+def test_disabled_by_default(app):
+    """Test entries are written every time without IDEMPOTENCY_ENABLED"""
+    process_single_log(TEST_DATA)
+    process_single_log(TEST_DATA)
+    assert LogEntry.query.count() == 2
+
+def test_existing_database_is_upgraded(tmp_path):
+    """Test init_db adds the content hash column and index to an old table"""
+    path = tmp_path / 'old.db'
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE log_entries (id VARCHAR(36) PRIMARY KEY, model VARCHAR(100) NOT NULL, "
+        "input_text TEXT NOT NULL, response_time FLOAT NOT NULL, timestamp DATETIME NOT NULL, "
+        "created_at DATETIME, updated_at DATETIME)"
+    )
+    connection.close()
+
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    init_db(app)
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert 'content_hash' in {column['name'] for column in inspector.get_columns('log_entries')}
+        unique = {index['name']: index['unique'] for index in inspector.get_indexes('log_entries')}
+        assert unique['ix_log_entries_content_hash']
+        db.engine.dispose()
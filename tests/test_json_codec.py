@@ -0,0 +1,69 @@
+import json
+import math
+import uuid
+from datetime import datetime
+from pathlib import Path
+import pytest
+from flask import Flask, jsonify
+from app.utils import json_codec
+from app.utils.json_codec import CodecJSONProvider, JSONCodecError, configure_json_codec
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+@pytest.fixture(params=['stdlib', 'orjson'])
+def codec(request):
+    if request.param == 'orjson' and json_codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    previous = json_codec.codec_name()
+    configure_json_codec(request.param)
+    yield request.param
+    configure_json_codec(previous)
+
+def test_round_trip_matches_stdlib(codec):
+    """Test both codecs parse and produce the same documents"""
+    raw = json.dumps(TEST_DATA).encode('utf-8')
+    assert json_codec.loads(raw) == json.loads(raw)
+    assert json.loads(json_codec.dumps(TEST_DATA, sort_keys=True)) == TEST_DATA
+
+def test_stdlib_only_input_still_parses(codec):
+    """Test NaN falls back to the stdlib parser and huge integers to the stdlib encoder"""
+    assert math.isnan(json_codec.loads('{"n": NaN}')['n'])
+    assert json_codec.dumps({"n": 2 ** 70}) == '{"n":1180591620717411303424}'
+    with pytest.raises(json.JSONDecodeError):
+        json_codec.loads('{"broken": ')
+
+def test_integers_beyond_64_bits_stay_integers(codec):
+    """Test integers orjson would read as floats parse exactly, from text and bytes"""
+    document = {"big": 2 ** 64, "negative": -2 ** 63 - 1, "fits": 2 ** 64 - 1, "id": "1" * 30}
+    raw = json.dumps(document)
+    assert json_codec.loads(raw) == document
+    assert json_codec.loads(raw.encode('utf-8')) == document
+    assert isinstance(json_codec.loads(b'[18446744073709551616]')[0], int)
+
+def test_provider_matches_flask_defaults(codec):
+    """Test jsonify output keeps Flask's sorting, indentation and type handling"""
+    app = Flask(__name__)
+    app.json = CodecJSONProvider(app)
+    payload = {"b": 1, "a": datetime(2024, 1, 2, 3, 4, 5), "id": uuid.UUID(int=1), "text": "café"}
+    with app.test_request_context():
+        compact = jsonify(payload).get_data()
+        app.debug = True
+        indented = jsonify(payload).get_data()
+    expected = {"a": "Tue, 02 Jan 2024 03:04:05 GMT", "b": 1, "id": str(uuid.UUID(int=1)), "text": "café"}
+    assert compact == json.dumps(expected, separators=(',', ':'), ensure_ascii=False).encode() + b"\n"
+    assert indented == json.dumps(expected, indent=2, ensure_ascii=False).encode() + b"\n"
+
+def test_request_json_uses_provider(codec):
+    """Test request bodies are parsed through the provider"""
+    app = Flask(__name__)
+    app.json = CodecJSONProvider(app)
+    with app.test_request_context(json=TEST_DATA):
+        from flask import request
+        assert request.json == TEST_DATA
+
+def test_unknown_codec():
+    """Test a codec name typo fails loudly"""
+    with pytest.raises(JSONCodecError):
+        configure_json_codec('simdjson')
@@ -0,0 +1,68 @@
+import json
+import copy
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.commands import register_commands
+from app.services.log_processor import process_batch_logs, process_single_log
+from app.utils.sketch import DDSketch
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+def test_sketch_quantiles_within_relative_error():
+    """Test merged and round-tripped sketches stay within 1% of exact quantiles"""
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+    left, right = DDSketch(0.01), DDSketch(0.01)
+    left.extend(values[:7000])
+    right.extend(values[7000:])
+    left.merge(right)
+    sketch = DDSketch.from_bytes(left.to_bytes())
+
+    assert sketch.count == len(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact + 1e-12
+    assert len(sketch.to_bytes()) < 4096
+
+def make_entry(model, timestamp, response_time):
+    doc = copy.deepcopy(TEST_DATA)
+    doc['model'] = model
+    doc['timestamp'] = timestamp.isoformat()
+    doc['response_time_seconds'] = response_time
+    return doc
+
+def test_latency_endpoint_merges_hourly_sketches(client, app):
+    """Test percentiles per model and time range from incrementally updated sketches"""
+    base = datetime(2024, 12, 1, 10, 30)
+    process_batch_logs([make_entry('fast', base, float(i)) for i in range(1, 101)])
+    process_single_log(make_entry('fast', base + timedelta(hours=1), 500.0))
+    process_single_log(make_entry('slow', base, 40.0))
+
+    fast = client.get('/api/stats/latency', query_string={'model': 'fast'}).get_json()
+    assert fast['count'] == 101
+    assert fast['max'] == 500.0
+    assert abs(fast['p50'] - 51) <= 0.51
+
+    first_hour = client.get('/api/stats/latency', query_string={
+        'from': base.isoformat(), 'to': (base + timedelta(minutes=30)).isoformat()
+    }).get_json()
+    assert first_hour['count'] == 101
+    assert set(first_hour['models']) == {'fast', 'slow'}
+    assert first_hour['models']['fast']['max'] == 100.0
+
+    # Bounds inside an hour are rounded down to it; `to` is exclusive
+    for to, count in ((base + timedelta(minutes=15), 0), (base + timedelta(hours=1, minutes=15), 101)):
+        stats = client.get('/api/stats/latency', query_string={'from': base.isoformat(), 'to': to.isoformat()})
+        assert stats.get_json()['count'] == count
+
+    register_commands(app)
+    result = app.test_cli_runner().invoke(args=['stats', 'rebuild-latency'])
+    assert 'Rebuilt 3 latency sketches' in result.output
+    assert client.get('/api/stats/latency').get_json()['count'] == 102
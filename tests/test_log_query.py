@@ -0,0 +1,78 @@
+import json
+import copy
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.services.log_processor import process_batch_logs
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+BASE = datetime(2024, 12, 1, 12, 0, 0)
+
+def seed(count):
+    batch = []
+    for i in range(count):
+        doc = copy.deepcopy(TEST_DATA)
+        doc['model'] = 'model-a' if i % 2 == 0 else 'model-b'
+        # Pairs of entries share a timestamp so the id tie-break is exercised
+        doc['timestamp'] = (BASE + timedelta(minutes=i // 2)).isoformat()
+        doc['response_time_seconds'] = float(i + 1)
+        batch.append(doc)
+    process_batch_logs(batch)
+
+def walk(client, query):
+    seen = []
+    cursor = None
+    while True:
+        params = dict(query, **({'cursor': cursor} if cursor else {}))
+        page = client.get('/api/logs', query_string=params).get_json()
+        seen.extend(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return seen
+
+def test_cursor_walk_visits_every_entry_once(client):
+    """Test keyset pages are newest first with no gaps or repeats"""
+    seed(11)
+    items = walk(client, {'limit': 3})
+
+    assert len(items) == 11
+    assert len({item['id'] for item in items}) == 11
+    keys = [(item['timestamp'], item['id']) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+def test_filters(client):
+    """Test model, timestamp and response time filters combine"""
+    seed(10)
+    items = walk(client, {
+        'model': 'model-a',
+        'since': (BASE + timedelta(minutes=1)).isoformat(),
+        'until': (BASE + timedelta(minutes=4)).isoformat(),
+        'min_response_time': 4,
+        'limit': 1
+    })
+
+    assert [item['response_time_seconds'] for item in items] == [7.0, 5.0]
+    assert all(item['model'] == 'model-a' for item in items)
+
+def test_bad_parameters_and_single_entry(client):
+    """Test malformed input is a 400 and entries can be fetched by id"""
+    seed(1)
+    assert client.get('/api/logs?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/logs?since=yesterday').status_code == 400
+
+    entry_id = client.get('/api/logs').get_json()['items'][0]['id']
+    entry = client.get(f'/api/logs/{entry_id}').get_json()
+    assert entry['output']['steps'][0]['pseudoCode'] == TEST_DATA['output']['steps'][0]['pseudoCode']
+    assert client.get('/api/logs/missing').status_code == 404
+
+def test_malformed_numbers_are_rejected(client):
+    """Test non-numeric filters and limits are a 400 rather than silently ignored"""
+    seed(1)
+    for url in ('/api/logs?min_response_time=abc', '/api/logs?max_response_time=nan',
+                '/api/logs?limit=1.5', '/api/errors?limit=x'):
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert 'must be' in response.get_json()['error']
+    assert client.get('/api/logs?min_response_time=0&limit=5').status_code == 200
@@ -0,0 +1,70 @@
+import gzip
+import logging
+from app.utils.log_reader import list_log_files, read_page
+from app.utils.logger import LOG_FORMAT, CompressingRotatingFileHandler
+
+def write_log(path, count):
+    lines = []
+    for i in range(count):
+        level = 'ERROR' if i % 5 == 0 else 'INFO'
+        function = 'ingest' if i % 2 == 0 else 'query'
+        lines.append(f"2026-10-18 10:00:{i % 60:02d},000 - json_processor - [{function}] - {level} - message {i}\n")
+    path.write_text(''.join(lines))
+
+def walk(path, **kwargs):
+    messages = []
+    before = None
+    while True:
+        page = read_page(path, before=before, **kwargs)
+        messages.extend(entry['message'] for entry in page['entries'])
+        before = page['before']
+        if before is None:
+            return messages
+
+def test_backward_pages_cover_file_once(tmp_path):
+    """Test pages walk from the end to the start without gaps across block boundaries"""
+    path = tmp_path / 'app.log'
+    write_log(path, 97)
+
+    messages = walk(path, limit=10, block_size=128)
+    assert messages == [f"message {i}" for i in reversed(range(97))]
+
+def test_level_and_function_filters(tmp_path):
+    """Test filters apply while paging"""
+    path = tmp_path / 'app.log'
+    write_log(path, 40)
+
+    messages = walk(path, limit=3, level='error', function='ingest', block_size=64)
+    assert messages == ["message 30", "message 20", "message 10", "message 0"]
+
+def test_archive_pages(tmp_path):
+    """Test gzipped archives page with line cursors"""
+    plain = tmp_path / 'app.log'
+    write_log(plain, 23)
+    archive = tmp_path / 'app.log.2026-10-17.gz'
+    with gzip.open(archive, 'wb') as f:
+        f.write(plain.read_bytes())
+
+    assert walk(archive, limit=4) == walk(plain, limit=4)
+
+def test_size_rotation_compresses_and_prunes(tmp_path):
+    """Test the handler rolls over by size, gzips archives and keeps backup_count"""
+    path = tmp_path / 'app.log'
+    handler = CompressingRotatingFileHandler(path, max_bytes=400, backup_count=2)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    test_logger = logging.getLogger('test_rotation')
+    test_logger.propagate = False
+    test_logger.addHandler(handler)
+    try:
+        for i in range(40):
+            test_logger.warning(f"rotation message {i}")
+    finally:
+        test_logger.removeHandler(handler)
+        handler.close()
+
+    files = list_log_files(path)
+    assert files[0]['name'] == 'app.log'
+    assert len(files) == 3
+    assert all(entry['name'].endswith('.gz') for entry in files[1:])
+    assert path.stat().st_size < 400
+    assert read_page(path, limit=1)['entries'][0]['message'] == "rotation message 39"
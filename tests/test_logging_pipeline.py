@@ -0,0 +1,51 @@
+import logging
+import queue
+import pytest
+from app.utils.logger import (
+    DroppingQueueHandler,
+    SamplingFilter,
+    call_logger,
+    log_function_call,
+    parse_sample_rates
+)
+
+def make_record(name, level):
+    return logging.LogRecord(name, level, __file__, 1, "message", None, None)
+
+def test_sampling_rates_follow_logger_hierarchy():
+    """Test rates resolve through dotted parents and never drop warnings"""
+    sampler = SamplingFilter(parse_sample_rates("json_processor.calls=0, json_processor=0.5"))
+
+    assert sampler.rate_for("json_processor.calls.deep") == 0.0
+    assert sampler.rate_for("json_processor.validation") == 0.5
+    assert sampler.rate_for("werkzeug") == 1.0
+    assert not sampler.filter(make_record("json_processor.calls", logging.INFO))
+    assert sampler.filter(make_record("json_processor.calls", logging.WARNING))
+
+def test_decorator_short_circuits_when_disabled(caplog):
+    """Test no trace lines are produced when INFO is off, but failures still are"""
+    @log_function_call
+    def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 42
+
+    call_logger.setLevel(logging.WARNING)
+    try:
+        with caplog.at_level(logging.INFO):
+            assert work() == 42
+            with pytest.raises(ValueError):
+                work(fail=True)
+    finally:
+        call_logger.setLevel(logging.NOTSET)
+
+    messages = [record.getMessage() for record in caplog.records if record.name == call_logger.name]
+    assert messages == ["Error in work: boom"]
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test the queue handler counts dropped records when full"""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record("json_processor", logging.INFO))
+    handler.handle(make_record("json_processor", logging.INFO))
+
+    assert handler.dropped == 1
@@ -0,0 +1,113 @@
+import json
+import os
+from pathlib import Path
+from app.services.log_processor import process_batch_logs
+from app.utils.metrics import REGISTRY, MetricsRegistry, compact_snapshots, merge_snapshots, render_text
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def sample(snapshot, name, labels=()):
+    for key, value in snapshot[name]["samples"]:
+        if tuple(key) == tuple(labels):
+            return value
+    return None
+
+def test_render_counter_and_histogram():
+    """Test the Prometheus text format for labelled counters and cumulative buckets"""
+    registry = MetricsRegistry()
+    hits = registry.counter("hits_total", "Hits", ("path",))
+    hits.labels("/a").inc()
+    hits.labels(path="/a").inc(2)
+    sizes = registry.histogram("size", "Sizes", buckets=(1, 10))
+    for value in (0.5, 5, 50):
+        sizes.observe(value)
+
+    text = render_text(registry.snapshot())
+
+    assert '# TYPE hits_total counter' in text
+    assert 'hits_total{path="/a"} 3' in text
+    assert 'size_bucket{le="1"} 1' in text
+    assert 'size_bucket{le="10"} 2' in text
+    assert 'size_bucket{le="+Inf"} 3' in text
+    assert 'size_count 3' in text
+    assert 'size_sum 55.5' in text
+
+def test_merge_snapshots_across_processes():
+    """Test counters and histograms sum over pids while dead processes' gauges are dropped"""
+    first, second = MetricsRegistry(), MetricsRegistry()
+    for registry, amount in ((first, 1), (second, 4)):
+        registry.counter("docs_total", "Docs").inc(amount)
+        registry.histogram("latency", "Latency", buckets=(1,)).observe(amount)
+        registry.gauge("depth", "Depth").set(amount)
+    dead_pid = 2 ** 22 + 1  # above the default pid_max
+
+    merged = merge_snapshots([
+        {"pid": os.getpid(), "metrics": first.snapshot()},
+        {"pid": dead_pid, "metrics": second.snapshot()}
+    ])
+
+    assert sample(merged, "docs_total") == 5
+    assert sample(merged, "latency") == [[1, 1], 5, 2]
+    assert sample(merged, "depth") == 1
+
+def test_merge_snapshots_per_process_keeps_a_series_per_pid():
+    """Test per_process labels every sample with its pid instead of summing"""
+    first, second = MetricsRegistry(), MetricsRegistry()
+    first.counter("docs_total", "Docs", ("result",)).labels("valid").inc(1)
+    second.counter("docs_total", "Docs", ("result",)).labels("valid").inc(4)
+
+    merged = merge_snapshots([
+        {"pid": 11, "metrics": first.snapshot()},
+        {"pid": 12, "metrics": second.snapshot()}
+    ], per_process=True)
+
+    assert merged["docs_total"]["labelnames"] == ["result", "pid"]
+    assert sample(merged, "docs_total", ("valid", "11")) == 1
+    assert sample(merged, "docs_total", ("valid", "12")) == 4
+    assert 'docs_total{result="valid",pid="12"} 4' in render_text(merged)
+
+def test_multiprocess_collect_reads_sibling_files(tmp_path):
+    """Test collect() includes snapshots written by other workers"""
+    registry = MetricsRegistry()
+    registry.counter("docs_total", "Docs").inc(2)
+    registry.multiprocess_dir = str(tmp_path)
+    sibling = MetricsRegistry()
+    sibling.counter("docs_total", "Docs").inc(3)
+    (tmp_path / "metrics_1.json").write_text(json.dumps({"pid": 1, "metrics": sibling.snapshot()}))
+
+    assert sample(registry.collect(), "docs_total") == 5
+
+def test_ingest_updates_app_metrics(app):
+    """Test validation outcomes, write transactions and batch sizes are recorded"""
+    REGISTRY.reset()
+    invalid = dict(TEST_DATA, response_time_seconds=-1)
+    process_batch_logs([TEST_DATA, TEST_DATA, invalid])
+
+    snapshot = REGISTRY.snapshot()
+    assert sample(snapshot, "documents_validated_total", ["valid"]) == 2
+    assert sample(snapshot, "documents_validated_total", ["invalid"]) == 1
+    assert sample(snapshot, "documents_rejected_total", ["_schema"]) == 1
+    assert sample(snapshot, "db_write_documents")[1] == 3
+    assert sample(snapshot, "batch_size_documents", ["batch"])[2] == 1
+
+def test_exited_workers_are_folded_into_one_snapshot(tmp_path):
+    """Test reaped workers' files are merged into metrics_dead.json, keeping counters and dropping gauges"""
+    registry = MetricsRegistry()
+    registry.counter("docs_total", "Docs").inc(2)
+    registry.multiprocess_dir = str(tmp_path)
+    dead_pids = (2 ** 22 + 1, 2 ** 22 + 2)  # above the default pid_max
+    for pid, amount in zip(dead_pids, (3, 4)):
+        worker = MetricsRegistry()
+        worker.counter("docs_total", "Docs").inc(amount)
+        worker.gauge("depth", "Depth").set(amount)
+        (tmp_path / f"metrics_{pid}.json").write_text(json.dumps({"pid": pid, "metrics": worker.snapshot()}))
+
+    compact_snapshots(str(tmp_path), [dead_pids[0]])
+    compact_snapshots(str(tmp_path), [dead_pids[1], 12345])
+
+    assert [path.name for path in tmp_path.iterdir()] == ["metrics_dead.json"]
+    assert sample(registry.collect(), "docs_total") == 9
+    assert registry.collect()["depth"]["samples"] == []
+    assert sample(registry.collect(per_process=True), "docs_total", ("dead",)) == 7
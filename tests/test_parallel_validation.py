@@ -0,0 +1,51 @@
+import json
+import copy
+from pathlib import Path
+from app.services import parallel_validation
+from app.services.parallel_validation import START_METHOD, shutdown_pool, validate_documents
+from app.services.log_processor import process_batch_logs
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def make_batch(count):
+    batch = []
+    for i in range(count):
+        doc = copy.deepcopy(TEST_DATA)
+        doc['input'] = f"{doc['input']} #{i}"
+        if i % 3 == 0:
+            doc['response_time_seconds'] = -1
+        batch.append(doc)
+    return batch
+
+def test_pool_matches_serial_order():
+    """Test pooled validation returns the serial results in input order"""
+    batch = make_batch(25)
+    try:
+        pooled = validate_documents(batch, workers=2, threshold=0, chunk_size=4)
+    finally:
+        shutdown_pool()
+
+    assert pooled == validate_documents(batch, workers=1)
+
+def test_batch_above_threshold_uses_pool(app, monkeypatch):
+    """Test process_batch_logs writes pooled results from the calling process"""
+    app.config.update(VALIDATION_WORKERS=2, VALIDATION_PARALLEL_THRESHOLD=4, VALIDATION_CHUNK_SIZE=2)
+    pooled = []
+    validate_in_pool = parallel_validation.validate_in_pool
+    def spy(*args, **kwargs):
+        results = validate_in_pool(*args, **kwargs)
+        pooled.append(len(results))
+        return results
+    monkeypatch.setattr(parallel_validation, 'validate_in_pool', spy)
+    try:
+        summary = process_batch_logs(make_batch(6))
+    finally:
+        shutdown_pool()
+
+    assert pooled == [6]  # the pool ran (a failure would have fallen back to serial)
+    assert START_METHOD != 'fork'
+    assert summary['successfully_processed'] == 4
+    assert summary['processing_failed'] == 2
+    assert "Response time must be positive" in summary['failed_entries'][0]['errors'][0]['message']
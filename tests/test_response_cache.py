@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+from unittest import mock
+from app.models.database import ValidationError
+from app.services.log_processor import process_single_log
+from app.utils.response_cache import ResponseCache, init_response_cache
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def test_etag_and_not_modified(app, client):
+    """Test repeat polls revalidate to an empty 304 without recomputing"""
+    init_response_cache(app)
+    process_single_log(TEST_DATA)
+
+    first = client.get('/api/stats')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    with mock.patch('app.routes.api.get_processing_stats') as stats:
+        second = client.get('/api/stats', headers={'If-None-Match': etag})
+        again = client.get('/api/stats')
+    stats.assert_not_called()
+    assert second.status_code == 304 and second.data == b''
+    assert again.status_code == 200 and again.data == first.data
+
+def test_writes_invalidate(app, client):
+    """Test new entries and errors change the ETags of the endpoints built from them"""
+    init_response_cache(app)
+    stats_etag = client.get('/api/stats').headers['ETag']
+    errors_etag = client.get('/api/errors').headers['ETag']
+
+    process_single_log(TEST_DATA)
+    response = client.get('/api/stats', headers={'If-None-Match': stats_etag})
+    assert response.status_code == 200
+    assert response.get_json()['total_logs_processed'] == 1
+    assert client.get('/api/errors', headers={'If-None-Match': errors_etag}).status_code == 304
+
+    ValidationError.log_error("ValidationError", "bad", {"a": 1})
+    response = client.get('/api/errors', headers={'If-None-Match': errors_etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
+
+def test_errors_are_not_cached(app, client):
+    """Test non-200 responses are passed through"""
+    init_response_cache(app)
+    assert client.get('/api/logs?cursor=bogus').status_code == 400
+    assert len(app.extensions['response_cache']._entries) == 0
+
+def test_lru_and_ttl():
+    """Test the store evicts least recently used entries and expires by TTL"""
+    cache = ResponseCache(max_entries=2, ttl=60)
+    for key in ('a', 'b'):
+        cache.put(key, cache.versions(()), (key.encode(), 'text/plain', key))
+    cache.get('a', ())
+    cache.put('c', cache.versions(()), (b'c', 'text/plain', 'c'))
+    assert cache.get('b', ()) is None
+    assert cache.get('a', ()) is not None
+
+    with mock.patch('app.utils.response_cache.time.monotonic', return_value=1e12):
+        assert cache.get('a', ()) is None
+
+def test_write_during_compute_leaves_entry_stale():
+    """Test a response computed before an invalidation is not served after it"""
+    cache = ResponseCache()
+    versions = cache.versions(('log_entries',))
+    cache.invalidate('log_entries')
+    cache.put('k', versions, (b'old', 'text/plain', 'e'))
+    assert cache.get('k', ('log_entries',)) is None
@@ -0,0 +1,90 @@
+import copy
+import json
+from pathlib import Path
+from app.commands import register_commands
+from app.models.database import db, SearchDocument
+from app.services.log_processor import process_batch_logs
+from app.services.search import init_search, match_expression, search_logs
+from app.utils.response_cache import init_response_cache
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def document(prompt, model='gpt-x', step_text=None):
+    doc = copy.deepcopy(TEST_DATA)
+    doc['input'] = prompt
+    doc['model'] = model
+    if step_text:
+        doc['output']['steps'][0]['description'] = step_text
+    return doc
+
+def test_match_expression_quotes_terms():
+    """Test user input cannot inject FTS5 syntax"""
+    assert match_expression('hotel AND "paris" book*') == '"hotel" "AND" "paris" "book"*'
+
+def test_search_ranks_and_filters(app, client):
+    """Test hits are indexed on write, filtered by model and carry snippets"""
+    init_search(app)
+    process_batch_logs([
+        document("Book a hotel in Paris near the river"),
+        document("Find a cheap flight to Lisbon", model='gpt-y'),
+        document("Plan a weekend", step_text="Reserve the hotel_booking slot in Paris")
+    ])
+
+    response = client.get('/api/search?q=paris')
+    assert response.status_code == 200
+    items = response.get_json()['items']
+    assert len(items) == 2
+    assert items[0]['score'] >= items[1]['score']
+    snippets = {item['input_snippet'] or item['steps_snippet'] for item in items}
+    assert "Book a hotel in <mark>Paris</mark> near the river" in snippets
+    assert any(text.startswith("Reserve the hotel_booking slot in <mark>Paris</mark>\n") for text in snippets)
+
+    assert search_logs("hotel_booking")['items'][0]['steps_snippet'].startswith("Reserve the <mark>hotel_booking")
+    assert search_logs("lisb*", model='gpt-y')['items'][0]['model'] == 'gpt-y'
+    assert search_logs("lisbon", model='gpt-x')['items'] == []
+
+def test_snippets_escape_logged_markup(app):
+    """Test markup in logged text comes back escaped around the highlights"""
+    init_search(app)
+    process_batch_logs([document('Render <img src=x onerror="alert(1)"> for the paris page & more')])
+
+    assert search_logs("paris")['items'][0]['input_snippet'] == (
+        'Render &lt;img src=x onerror=&quot;alert(1)&quot;&gt; for the <mark>paris</mark> page &amp; more'
+    )
+
+def test_search_pagination(app):
+    """Test cursors walk every hit exactly once"""
+    init_search(app)
+    process_batch_logs([document(f"hotel request {'hotel ' * i}{i}") for i in range(7)])
+
+    seen = []
+    cursor = None
+    while True:
+        page = search_logs("hotel", limit=3, cursor=cursor)
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 7
+
+def test_search_rejects_empty_query(app, client):
+    """Test a query without words is a client error"""
+    init_search(app)
+    assert client.get('/api/search?q=%20').status_code == 400
+
+def test_rebuild_indexes_existing_entries(app, client):
+    """Test the rebuild command indexes entries written before search was enabled and drops cached results"""
+    init_response_cache(app)
+    process_batch_logs([document("Museum tickets in Rome"), document("Train to Florence")])
+    init_search(app)
+    assert client.get('/api/search?q=rome').get_json()['items'] == []
+
+    register_commands(app)
+    result = app.test_cli_runner().invoke(args=['search', 'rebuild', '--chunk-size', '1'])
+
+    assert result.exit_code == 0, result.output
+    assert "Indexed 2 log entries" in result.output
+    assert len(client.get('/api/search?q=rome').get_json()['items']) == 1
+    assert db.session.query(SearchDocument).count() == 2
@@ -0,0 +1,138 @@
+import logging
+import os
+import pickle
+import queue
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+import requests
+from app.database.writer import FileLock, SingleWriter, fcntl
+from app.server import RESPAWN_BACKOFF, InFlightRequests, PreforkServer, worker_config
+from app.utils.logger import ProcessQueueHandler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_in_flight_requests_are_counted_until_the_body_is_closed():
+    """Test graceful shutdown waits for responses that are still being sent"""
+    def wsgi_app(environ, start_response):
+        start_response("200 OK", [])
+        return [b"body"]
+    in_flight = InFlightRequests(wsgi_app)
+
+    response = in_flight({}, lambda status, headers: None)
+    assert in_flight.active == 1
+    assert not in_flight.wait_idle(0.01)
+    response.close()
+    assert in_flight.wait_idle(0.01)
+
+def test_only_the_first_worker_runs_retention(tmp_path):
+    """Test workers share the lock file and metrics dir and skip the schema step"""
+    first, second = worker_config(0, 2, str(tmp_path)), worker_config(1, 2, str(tmp_path))
+
+    assert first['SQLITE_WRITE_LOCK_FILE'] == second['SQLITE_WRITE_LOCK_FILE']
+    assert not first['SCHEMA_AUTO_CREATE'] and not first['DEBUG']
+    assert 'ERROR_RETENTION_DAYS' not in first
+    assert second['ERROR_RETENTION_DAYS'] is None and second['ERROR_RETENTION_MAX_ROWS'] is None
+
+def test_workers_that_fail_to_start_are_retried_with_backoff(monkeypatch):
+    """Test a failed worker keeps its slot and is retried after a growing delay"""
+    server = PreforkServer("127.0.0.1", 0, workers=2)
+    spawned = []
+    monkeypatch.setattr(server, 'spawn', spawned.append)
+
+    delays = [server.schedule_retry(1) for _ in range(3)]
+    assert delays == [RESPAWN_BACKOFF[0], RESPAWN_BACKOFF[0] * 2, RESPAWN_BACKOFF[0] * 4]
+    server.retry_failed()
+    assert spawned == []
+
+    server.failed[1] = (time.monotonic() - 1, delays[-1])
+    server.retry_failed()
+    assert spawned == [1]
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="prefork server needs fork")
+def test_master_exits_when_no_worker_starts(tmp_path):
+    """Test the master exits non-zero instead of holding a socket nobody serves"""
+    probe = (
+        "import sys, app.server as server\n"
+        "def broken(*args, **kwargs):\n"
+        "    raise RuntimeError('create_app failed')\n"
+        "server.run_worker = broken\n"
+        "server.PreforkServer.prepare_database = lambda self: True\n"
+        "sys.exit(server.PreforkServer('127.0.0.1', 0, workers=2).run())\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(ROOT), LOG_DIR=str(tmp_path / "logs"))
+    result = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, env=env, capture_output=True, timeout=60)
+
+    assert result.returncode == 1
+    log = (tmp_path / "logs" / "app.log").read_text()
+    assert "create_app failed" in log and "No worker started" in log
+
+@pytest.mark.skipif(fcntl is None, reason="file locks need fcntl")
+def test_writer_holds_the_file_lock_for_a_batch_of_writes(app, tmp_path):
+    """Test queued writes run in one turn holding the inter-process lock"""
+    path = str(tmp_path / "write.lock")
+    writer = SingleWriter(app, lock=FileLock(path), max_batch=10)
+    # flock locks belong to the open file, so another descriptor sees the holder
+    probe = os.open(path, os.O_RDWR | os.O_CREAT)
+    held = []
+
+    def write(n):
+        try:
+            fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(probe, fcntl.LOCK_UN)
+            held.append(False)
+        except BlockingIOError:
+            held.append(True)
+        return n
+
+    futures = [writer.submit(write, n) for n in range(5)]
+    writer.start()
+    assert [future.result(5) for future in futures] == list(range(5))
+    writer.stop()
+    os.close(probe)
+    assert held == [True] * 5
+
+def test_process_queue_handler_sends_picklable_preformatted_records():
+    """Test records forwarded to the master survive pickling and skip re-sampling"""
+    log_queue = queue.Queue()
+    handler = ProcessQueueHandler(log_queue)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("json_processor", logging.ERROR, __file__, 1, "failed %s", ("x",), sys.exc_info())
+    handler.emit(record)
+
+    sent = pickle.loads(pickle.dumps(log_queue.get_nowait()))
+    assert sent.getMessage().startswith("failed x") and "ValueError: boom" in sent.getMessage()
+    assert sent.sampled and sent.exc_info is None
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="prefork server needs fork")
+def test_server_serves_from_several_workers_and_stops_gracefully(tmp_path):
+    """Test the master creates the schema, starts workers and drains them on SIGTERM"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT), DATABASE_URL=f"sqlite:///{tmp_path / 'server.db'}",
+               LOG_DIR=str(tmp_path / "logs"))
+    server = subprocess.Popen([sys.executable, "-m", "app.server", "--bind", "127.0.0.1:8797", "--workers", "2"],
+                              cwd=tmp_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if requests.get("http://127.0.0.1:8797/api/health", timeout=1).ok:
+                    break
+            except requests.RequestException:
+                assert time.monotonic() < deadline and server.poll() is None
+                time.sleep(0.2)
+        with open(ROOT / "source.json", 'rb') as f:
+            response = requests.post("http://127.0.0.1:8797/api/validate", data=f.read(),
+                                     headers={"Content-Type": "application/json"}, timeout=10)
+        assert response.status_code == 200
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(60) == 0
+
+    log = (tmp_path / "logs" / "app.log").read_text()
+    assert log.count("serving on 127.0.0.1:8797") == 2
+    assert log.count("stopped") >= 2 and "Server stopped" in log
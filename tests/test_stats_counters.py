@@ -0,0 +1,43 @@
+import json
+import copy
+from pathlib import Path
+from app.commands import register_commands
+from app.models.database import db, LogEntry, StatsCounter, ValidationError, read_counters
+from app.services.log_processor import get_processing_stats, process_batch_logs, process_single_log
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def with_model(model):
+    doc = copy.deepcopy(TEST_DATA)
+    doc['model'] = model
+    return doc
+
+def test_counters_follow_writes(app):
+    """Test entries, errors and per-model counts are maintained on insert"""
+    invalid = with_model('gpt-x')
+    invalid['response_time_seconds'] = -1
+    process_single_log(with_model('gpt-x'))
+    process_batch_logs([with_model('gpt-x'), with_model('gpt-y'), invalid])
+
+    stats = get_processing_stats()
+    assert stats['total_logs_processed'] == LogEntry.query.count() == 3
+    assert stats['total_validation_errors'] == ValidationError.query.count() == 1
+    assert stats['models'] == {'gpt-x': 2, 'gpt-y': 1}
+    latest = db.session.query(db.func.max(LogEntry.created_at)).scalar()
+    assert stats['last_processed'] == latest.isoformat()
+
+def test_reconcile_command_repairs_drift(app):
+    """Test the CLI recomputes counters from the base tables"""
+    register_commands(app)
+    process_batch_logs([with_model('gpt-x'), with_model('gpt-x')])
+    db.session.execute(StatsCounter.__table__.update().values(count=99))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['stats', 'reconcile'])
+
+    assert result.exit_code == 0, result.output
+    assert read_counters()['log_entries'][0] == 2
+    assert read_counters()['model:gpt-x'][0] == 2
+    assert 'model:gpt-x' in result.output
@@ -0,0 +1,89 @@
+import json
+import threading
+from pathlib import Path
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from app.database.storage import StorageProfileError, resolve_pragmas
+from app.database.writer import WriterStoppedError, WriteTimeoutError, init_single_writer, run_write
+from app.models.database import db, init_db, LogEntry, ValidationError
+from app.services.log_processor import process_single_log
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+@pytest.fixture
+def wal_app(tmp_path):
+    """App using the WAL profile and the single writer thread"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'wal.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLITE_STORAGE_PROFILE='wal',
+        SQLITE_PRAGMAS={'busy_timeout': 2000},
+        SQLITE_SINGLE_WRITER=True
+    )
+    init_db(app)
+    writer = init_single_writer(app)
+    with app.app_context():
+        yield app
+        writer.stop()
+        db.session.remove()
+        db.engine.dispose()
+
+def test_profile_pragmas_are_applied(wal_app):
+    """Test connections open in WAL mode with the overridden busy timeout"""
+    assert db.session.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+    assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 2000
+
+def test_unknown_profile_is_rejected():
+    """Test an unknown profile name raises"""
+    with pytest.raises(StorageProfileError):
+        resolve_pragmas('turbo')
+
+def test_concurrent_writes_are_serialized(wal_app):
+    """Test writes from many threads all land and run on the writer thread"""
+    errors = []
+
+    def worker():
+        with wal_app.app_context():
+            for _ in range(5):
+                success, result = process_single_log(TEST_DATA)
+                if not success:
+                    errors.append(result)
+                ValidationError.log_error("ValidationError", "bad entry")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert LogEntry.query.count() == 20
+    assert ValidationError.query.count() == 20
+    assert run_write(lambda: threading.current_thread().name) == "sqlite-writer"
+
+def test_blocked_writer_times_out_and_fails_queued_writes(wal_app):
+    """Test run_write gives up after SQLITE_WRITE_TIMEOUT and stop fails what is still queued"""
+    wal_app.config['SQLITE_WRITE_TIMEOUT'] = 0.05
+    writer = wal_app.extensions['single_writer']
+    release = threading.Event()
+    blocking = writer.submit(release.wait, 5)
+    ran = []
+
+    with pytest.raises(WriteTimeoutError):
+        run_write(ran.append, "cancelled")
+    queued = writer.submit(ran.append, "queued")
+    writer.stop(timeout=0.05)
+    release.set()
+
+    assert blocking.result(5) is True
+    with pytest.raises(WriterStoppedError):
+        queued.result(1)
+    with pytest.raises(WriterStoppedError):
+        writer.submit(ran.append, "late")
+    assert ran == []
+
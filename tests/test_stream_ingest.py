@@ -0,0 +1,116 @@
+import io
+import json
+from pathlib import Path
+from app.models.database import LogEntry, ValidationError
+from app.utils.json_stream import iter_json_array, iter_ndjson
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+def test_iter_ndjson_reports_bad_lines():
+    """Test line numbering, blank lines and oversized lines"""
+    body = b'{"a": 1}\n\n{broken\n' + b'"' + b'x' * 50 + b'"\n{"b": 2}'
+    results = list(iter_ndjson(io.BytesIO(body), max_line_bytes=32))
+
+    assert [line for line, _, _ in results] == [1, 3, 4, 5]
+    assert results[0][1] == {"a": 1}
+    assert results[1][2].startswith("Invalid JSON format")
+    assert results[2][2] == "Line exceeds 32 bytes"
+    assert results[3][1] == {"b": 2}
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+def test_iter_json_array_stops_at_an_early_syntax_error():
+    """Test a syntax error is reported without reading the rest of a large array"""
+    valid = [{"text": "split across reads \u00e9 " * 3, "flag": True, "n": -1.25} for _ in range(200)]
+    parsed = list(iter_json_array(io.BytesIO(json.dumps(valid).encode()), read_size=7))
+    assert [document for _, document, _ in parsed] == valid
+
+    body = b'[{"a": 1}, {"b" 2}, ' + b', '.join([b'{"c": 3}'] * 100000) + b']'
+    stream = CountingStream(body)
+    results = list(iter_json_array(stream, read_size=1024))
+
+    assert results[0] == (0, {"a": 1}, None)
+    assert results[1][0] == -1 and "Expecting ':' delimiter" in results[1][2]
+    assert stream.bytes_read <= 4096 < len(body)
+
+def test_stream_endpoint_summary(client):
+    """Test the NDJSON endpoint stores entries and reports rejected lines"""
+    invalid = dict(TEST_DATA, response_time_seconds=-1)
+    lines = [TEST_DATA, TEST_DATA, invalid, TEST_DATA]
+    body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+
+    response = client.post('/api/ingest/stream', data=body,
+                           content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['accepted'] == 3
+    assert summary['rejected'] == 2
+    assert summary['rejected_lines'] == [3, 5]
+    assert LogEntry.query.count() == 3
+    assert ValidationError.query.count() == 2
+
+def test_stream_endpoint_requires_ndjson(client):
+    response = client.post('/api/ingest/stream', json=[TEST_DATA])
+    assert response.status_code == 415
+
+def test_uploaded_archives(app):
+    """Test gzip and zip uploads are decoded and ingested incrementally"""
+    import gzip
+    import zipfile
+    from app.services.log_processor import process_uploaded_file
+
+    array_gz = gzip.compress(json.dumps([TEST_DATA, TEST_DATA]).encode())
+    ndjson_gz = gzip.compress(f"{json.dumps(TEST_DATA)}\n{{oops\n".encode())
+    bundle = io.BytesIO()
+    with zipfile.ZipFile(bundle, 'w') as archive:
+        archive.writestr('day/a.json.gz', array_gz)
+        archive.writestr('day/b.ndjson.gz', ndjson_gz)
+        archive.writestr('day/c.json', json.dumps(TEST_DATA))
+        archive.writestr('README.txt', 'ignored')
+    bundle.seek(0)
+
+    summary = process_uploaded_file(bundle, 'export.zip')
+
+    assert summary['files_processed'] == 3
+    assert summary['accepted'] == 4
+    assert summary['rejected_documents'] == [{"file": "day/b.ndjson.gz", "position": 2}]
+    assert LogEntry.query.count() == 4
+
+def test_upload_has_its_own_body_limit(tmp_path):
+    """Test /upload takes archives beyond MAX_CONTENT_LENGTH, up to UPLOAD_MAX_CONTENT_LENGTH"""
+    import gzip
+    import os
+    from app.main import create_app
+    from app.server import stop_app
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'upload.db'}",
+        'MAX_CONTENT_LENGTH': 32 * 1024,
+        'UPLOAD_MAX_CONTENT_LENGTH': 1024 * 1024
+    })
+    try:
+        documents = [dict(TEST_DATA, input=os.urandom(256).hex()) for _ in range(200)]
+        archive = gzip.compress(json.dumps(documents).encode())
+        assert app.config['MAX_CONTENT_LENGTH'] < len(archive) < app.config['UPLOAD_MAX_CONTENT_LENGTH']
+        client = app.test_client()
+
+        response = client.post('/upload', data={'file': (io.BytesIO(archive), 'export.json.gz')})
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()['result']['accepted'] == 200
+
+        app.config['UPLOAD_MAX_CONTENT_LENGTH'] = 16 * 1024
+        response = client.post('/upload', data={'file': (io.BytesIO(archive), 'export.json.gz')})
+        assert response.status_code == 413
+    finally:
+        stop_app(app)
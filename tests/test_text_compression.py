@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from sqlalchemy import text
+from app.commands import register_commands
+from app.database.compression import ZLIB_DICTIONARY, configure_compression, decompress_text
+from app.models.database import db, LogEntry, Step
+from app.services.log_processor import process_batch_logs
+from app.services.log_query import get_log
+from app.services.text_compression import compress_existing_rows, compression_report, train_and_store_dictionary
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+LONG_INPUT = "Summarize the following travel itinerary and list every booking step. " * 10
+
+def stored(column, table):
+    """Raw stored values, bypassing the column type"""
+    return [value for value, in db.session.execute(text(f'SELECT "{column}" FROM "{table}"'))]
+
+def test_large_text_is_stored_compressed(app):
+    """Test long values are written as BLOBs and read back as the original text"""
+    process_batch_logs([dict(TEST_DATA, input=LONG_INPUT)])
+
+    raw = stored('input_text', 'log_entries')[0]
+    assert isinstance(raw, bytes) and len(raw) < len(LONG_INPUT)
+    entry = LogEntry.query.one()
+    assert entry.input_text == LONG_INPUT
+    assert get_log(entry.id)['output']['steps'][0]['description'] == TEST_DATA['output']['steps'][0]['description']
+
+def test_short_text_stays_plain(app):
+    """Test values under TEXT_COMPRESSION_MIN_BYTES are stored as text"""
+    process_batch_logs([dict(TEST_DATA, input="short prompt")])
+    assert stored('input_text', 'log_entries') == ["short prompt"]
+
+def test_text_is_loaded_only_when_read(app):
+    """Test ORM loads defer the compressed columns until they are accessed"""
+    process_batch_logs([dict(TEST_DATA, input=LONG_INPUT)])
+    entry = LogEntry.query.one()
+    assert 'input_text' not in entry.__dict__
+    assert entry.input_text == LONG_INPUT
+
+def test_migrate_existing_plain_rows(app):
+    """Test the migration compresses rows written before compression, with a trained dictionary"""
+    configure_compression(enabled=False)
+    process_batch_logs([dict(TEST_DATA, input=f"{LONG_INPUT} #{i}") for i in range(5)])
+    assert all(isinstance(value, str) for value in stored('input_text', 'log_entries'))
+    configure_compression(enabled=True)
+
+    assert train_and_store_dictionary() == 1
+    rewritten = compress_existing_rows(chunk_size=2)
+
+    assert rewritten['log_entries.input_text'] == 5
+    raw = stored('input_text', 'log_entries')
+    assert all(value[0] == ZLIB_DICTIONARY for value in raw)
+    assert sorted(decompress_text(value) for value in raw) == sorted(f"{LONG_INPUT} #{i}" for i in range(5))
+    assert compression_report()['columns']['log_entries.input_text']['compressed_rows'] == 5
+
+def test_storage_commands(app):
+    """Test the compress and report CLI commands"""
+    register_commands(app)
+    process_batch_logs([dict(TEST_DATA, input=LONG_INPUT)])
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['storage', 'compress', '--train-dictionary', '--recompress'])
+    assert result.exit_code == 0, result.output
+    assert 'log_entries.input_text' in result.output
+    assert Step.query.count() == len(TEST_DATA['output']['steps'])
+
+def test_dictionary_trained_by_another_process(app, tmp_path):
+    """Test rows rewritten with a dictionary stored by another process stay readable here"""
+    configure_compression(enabled=False)
+    process_batch_logs([dict(TEST_DATA, input=f"{LONG_INPUT} #{i}") for i in range(5)])
+    configure_compression(enabled=True)
+    db.session.remove()
+
+    env = dict(os.environ, DATABASE_URL=app.config['SQLALCHEMY_DATABASE_URI'], LOG_DIR=str(tmp_path / "logs"))
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app.main", "storage", "compress", "--train-dictionary"],
+                   cwd=Path(__file__).resolve().parent.parent, env=env, check=True, capture_output=True)
+
+    assert all(value[0] == ZLIB_DICTIONARY for value in stored('input_text', 'log_entries'))
+    assert sorted(entry.input_text for entry in LogEntry.query) == sorted(f"{LONG_INPUT} #{i}" for i in range(5))
@@ -0,0 +1,115 @@
+import json
+import copy
+import time
+from pathlib import Path
+import pytest
+from app.models.database import db, LogEntry, ValidationError
+from app.services.batch_ingest import ChunkRows
+from app.database.writer import WriteTimeoutError
+from app.services import write_queue as write_queue_module
+from app.services.write_queue import QueueFullError, WriteBehindQueue, init_write_queue
+
+SOURCE_PATH = Path("source.json")
+with open(SOURCE_PATH) as f:
+    TEST_DATA = json.load(f)
+
+@pytest.fixture
+def write_queue(app):
+    app.config.update(ASYNC_INGEST_ENABLED=True, ASYNC_FLUSH_INTERVAL=0.01)
+    write_queue = init_write_queue(app)
+    yield write_queue
+    write_queue.stop()
+
+def test_batch_is_accepted_and_written_in_background(client, write_queue):
+    """Test a batch returns 202 and its job completes once the queue drains"""
+    invalid = copy.deepcopy(TEST_DATA)
+    invalid['response_time_seconds'] = -1
+    response = client.post('/api/batch/process', json=[TEST_DATA, invalid, TEST_DATA])
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['queued'] == 2
+    assert body['validation_failed'] == 1
+    assert body['duplicates'] == 0 and body['duplicate_ids'] == []
+
+    write_queue.stop()
+    status = client.get(body['status_url']).get_json()
+    assert status['status'] == 'completed'
+    assert status['written'] == 2
+    assert LogEntry.query.count() == 2
+    assert ValidationError.query.count() == 1
+
+def test_single_entry_is_queued(client, write_queue):
+    """Test a valid single entry returns 202 with its future id"""
+    response = client.post('/api/validate', json=TEST_DATA)
+
+    assert response.status_code == 202
+    write_queue.stop()
+    assert db.session.get(LogEntry, response.get_json()['id']) is not None
+
+def test_queued_duplicates_get_the_id_that_is_written(client, app):
+    """Test with idempotency on, repeats inside a batch and retries of queued entries share one stored id"""
+    app.config['IDEMPOTENCY_ENABLED'] = True
+    write_queue = WriteBehindQueue(app, flush_interval=0.01)
+    app.extensions['write_queue'] = write_queue  # not started yet, so everything stays queued
+
+    batch = client.post('/api/batch/process', json=[TEST_DATA, TEST_DATA]).get_json()
+    retry = client.post('/api/validate', json=TEST_DATA)
+    assert batch['queued'] == 1 and batch['duplicate_ids'] == batch['queued_ids']
+    assert retry.status_code == 200 and retry.get_json()['id'] == batch['queued_ids'][0]
+
+    write_queue.start()
+    deadline = time.monotonic() + 5
+    while write_queue.get_job(batch['job_id']).status != 'completed' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    after_write = client.post('/api/validate', json=TEST_DATA).get_json()
+    write_queue.stop()
+    assert after_write['id'] == batch['queued_ids'][0]
+    for entry_id in batch['queued_ids'] + batch['duplicate_ids']:
+        assert client.get(f'/api/logs/{entry_id}').status_code == 200
+    status = client.get(f"/api/jobs/{batch['job_id']}").get_json()
+    assert status['written'] == 1 and status['duplicates'] == 1
+    assert LogEntry.query.count() == 1
+
+def test_timed_out_writes_are_not_retried(client, write_queue, monkeypatch):
+    """Test a rolled-back batch is retried per job but a timed-out one, which may still commit, is not"""
+    calls = []
+    def write_rows(rows):
+        calls.append(len(rows))
+        raise (WriteTimeoutError("slow") if len(calls) == 1 else RuntimeError("rolled back"))
+    monkeypatch.setattr(write_queue_module, 'write_rows', write_rows)
+
+    timed_out = client.post('/api/batch/process', json=[TEST_DATA, TEST_DATA]).get_json()
+    deadline = time.monotonic() + 5
+    while write_queue.get_job(timed_out['job_id']).status == 'queued' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    failed = client.post('/api/batch/process', json=[TEST_DATA]).get_json()
+    write_queue.stop()
+
+    assert calls == [2, 1, 1]
+    status = client.get(timed_out['status_url']).get_json()
+    assert status['status'] == 'unknown' and status['write_unknown'] == 2 and status['write_failed'] == 0
+    status = client.get(failed['status_url']).get_json()
+    assert status['status'] == 'failed' and status['write_failed'] == 1
+
+def test_full_queue_is_rejected(app):
+    """Test submissions beyond the queue depth raise instead of blocking"""
+    write_queue = WriteBehindQueue(app, max_depth=1)
+    rows = ChunkRows()
+    rows.add_error("ValidationError", "bad")
+    write_queue.submit(rows, total=1, accepted=0, rejected=1)
+
+    with pytest.raises(QueueFullError):
+        write_queue.submit(rows, total=1, accepted=0, rejected=1)
+
+def test_full_queue_returns_503(client, write_queue, monkeypatch):
+    """Test the API sheds load with 503 and Retry-After"""
+    monkeypatch.setattr(write_queue, 'max_depth', 0)
+    response = client.post('/api/batch/process', json=[TEST_DATA])
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_unknown_job_is_404(client):
+    """Test job lookups without a queue or with an unknown id"""
+    assert client.get('/api/jobs/missing').status_code == 404